@@ -1,16 +1,20 @@
-from fastapi import Depends, HTTPException, Security
+import time
+
+from fastapi import Depends, HTTPException, Request, Security
 from fastapi.security import APIKeyHeader
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import get_db, APIKey
+from app.models import get_async_db, APIKey
 from app.services.api_key_service import api_key_service
+from app.core.tracing import tracer
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
 async def get_api_key(
+    request: Request,
     api_key: str = Security(api_key_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> APIKey:
     if not api_key:
         raise HTTPException(
@@ -18,7 +22,12 @@ async def get_api_key(
             detail="Missing API key. Include X-API-Key header.",
         )
 
-    verified_key = api_key_service.verify(db, api_key)
+    start = time.perf_counter()
+    with tracer.span("auth.get_api_key"):
+        verified_key = await api_key_service.verify(db, api_key)
+        # End the read so the connection goes back to the pool while the pipeline runs
+        await db.commit()
+    request.state.auth_ms = (time.perf_counter() - start) * 1000
     if not verified_key:
         raise HTTPException(
             status_code=401,
@@ -0,0 +1,21 @@
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+
+def parse_fields(fields: str | None, model: type[BaseModel]) -> list[str]:
+    """Field names of ``model`` selected by a comma-separated ``?fields=`` value.
+
+    Returns every field when ``fields`` is empty, otherwise the requested
+    ones in the model's declaration order. Unknown names are a 400.
+    """
+    available = list(model.model_fields)
+    if not fields:
+        return available
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(available)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(available)}",
+        )
+    return [name for name in available if name in requested]
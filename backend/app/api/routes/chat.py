@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.schemas import ChatRequest, ChatResponse
-from app.models import get_db, Space
+from app.models import get_async_db, Space
 from app.services.rag_pipeline import rag_pipeline
-from app.services.query_logger import query_logger
+from app.services.query_logger import query_logger, StageTimings
+from app.core.metrics import observe_stages
 from app.core.auth import require_admin
 
 router = APIRouter()
@@ -18,33 +19,40 @@ limiter = Limiter(key_func=get_remote_address)
 async def query_chat(
     request: Request,
     body: ChatRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: bool = Depends(require_admin),
 ):
-    space = db.query(Space).filter(Space.id == body.space_id).first()
+    space = await db.get(Space, body.space_id)
     if not space:
         raise HTTPException(status_code=404, detail="Space not found")
 
+    timings = StageTimings()
+
     with query_logger.timer() as get_latency:
         result = await rag_pipeline.query(
             query_text=body.query,
             space_id=body.space_id,
             top_k=body.top_k,
+            timings=timings,
         )
         latency_ms = get_latency()
 
-    query_logger.log(
-        db=db,
-        query_text=body.query,
-        response_text=result.answer,
-        chunks_retrieved=result.chunks_retrieved,
-        latency_ms=latency_ms,
-        model_used=result.model,
-        source="admin_chat",
-        prompt_tokens=result.prompt_tokens,
-        completion_tokens=result.completion_tokens,
-        cost=result.cost,
-    )
+    with timings.stage("log"):
+        await query_logger.log(
+            db=db,
+            query_text=body.query,
+            response_text=result.answer,
+            chunks_retrieved=result.chunks_retrieved,
+            latency_ms=latency_ms,
+            model_used=result.model,
+            source="admin_chat",
+            prompt_tokens=result.prompt_tokens,
+            completion_tokens=result.completion_tokens,
+            cost=result.cost,
+            stage_timings=timings.stages,
+            coalesced=result.coalesced,
+        )
+    observe_stages(timings.stages, source="admin_chat")
 
     sources = [
         {
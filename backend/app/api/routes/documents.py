@@ -1,33 +1,27 @@
-import re
 from pathlib import Path
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only, selectinload
 
+from app.api.projection import parse_fields
 from app.api.schemas import DocumentResponse, DocumentListResponse, UploadResponse
 from app.config import UPLOAD_DIR, settings
-from app.models import get_db, Document, Space
-from app.services.document_processor import document_processor
+from app.models import get_db, get_async_db, Document, Space
+from app.services.document_processor import document_processor, sanitize_filename
 from app.services.rag_pipeline import rag_pipeline
+from app.services.reconciler import vector_reconciler
 from app.core.auth import require_admin
+from app.core.responses import ORJSONResponse
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
 
 
-def sanitize_filename(filename: str) -> str:
-    name = Path(filename).name
-    name = re.sub(r'[^\w\s\-.]', '', name)
-    name = re.sub(r'\s+', '_', name)
-    if len(name) > 200:
-        ext = Path(name).suffix
-        name = name[:200 - len(ext)] + ext
-    return name or "document"
-
-
 @router.post("/upload", response_model=UploadResponse)
 @limiter.limit("10/minute")
 async def upload_document(
@@ -100,26 +94,37 @@ async def upload_document(
 @router.get("", response_model=DocumentListResponse)
 async def list_documents(
     space_id: int | None = Query(None, gt=0),
-    db: Session = Depends(get_db),
+    fields: str | None = Query(None, description="Comma-separated document fields to return"),
+    db: AsyncSession = Depends(get_async_db),
     _: bool = Depends(require_admin),
 ):
-    query = db.query(Document)
+    selected = parse_fields(fields, DocumentResponse)
+    columns = [getattr(Document, name) for name in selected if name != "spaces"]
+    query = select(Document).options(load_only(Document.id, *columns))
+    if "spaces" in selected:
+        query = query.options(selectinload(Document.spaces).load_only(Space.id, Space.name))
     if space_id:
-        query = query.join(Document.spaces).filter(Space.id == space_id)
-    documents = query.order_by(Document.created_at.desc()).all()
-    return DocumentListResponse(
-        documents=[DocumentResponse.model_validate(doc) for doc in documents],
-        total=len(documents),
-    )
+        query = query.join(Document.spaces).where(Space.id == space_id)
+    documents = (await db.scalars(query.order_by(Document.created_at.desc()))).all()
+
+    # Rows are built directly; per-row model validation dominated large listings
+    rows = [
+        {
+            name: [{"id": s.id, "name": s.name} for s in doc.spaces] if name == "spaces" else getattr(doc, name)
+            for name in selected
+        }
+        for doc in documents
+    ]
+    return ORJSONResponse({"documents": rows, "total": len(rows)})
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document(
     document_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: bool = Depends(require_admin),
 ):
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = await db.get(Document, document_id, options=[selectinload(Document.spaces)])
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     return DocumentResponse.model_validate(document)
@@ -143,6 +148,7 @@ async def add_document_to_space(
     if space not in document.spaces:
         document.spaces.append(space)
         db.commit()
+        vector_reconciler.sync_documents(db, [document.id])
 
     return {"message": "Document added to space"}
 
@@ -165,6 +171,7 @@ async def remove_document_from_space(
     if space in document.spaces:
         document.spaces.remove(space)
         db.commit()
+        vector_reconciler.sync_documents(db, [document.id])
 
     return {"message": "Document removed from space"}
 
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api.schemas import ProfilingConfigRequest, ProfilingStatusResponse
+from app.core.auth import require_admin
+from app.core.profiling import profiler
+
+router = APIRouter()
+
+
+@router.get("", response_model=ProfilingStatusResponse)
+async def get_profiling_status(
+    _: bool = Depends(require_admin),
+):
+    return ProfilingStatusResponse(**profiler.status())
+
+
+@router.put("", response_model=ProfilingStatusResponse)
+async def configure_profiling(
+    request: ProfilingConfigRequest,
+    _: bool = Depends(require_admin),
+):
+    profiler.configure(
+        enabled=request.enabled,
+        sample_rate=request.sample_rate,
+        interval_ms=request.interval_ms,
+        endpoints=request.endpoints,
+    )
+    return ProfilingStatusResponse(**profiler.status())
+
+
+@router.get("/report", response_class=PlainTextResponse)
+async def download_profiling_report(
+    endpoint: str | None = Query(None),
+    _: bool = Depends(require_admin),
+):
+    if endpoint is not None and endpoint not in profiler.status()["samples"]:
+        raise HTTPException(status_code=404, detail="No samples recorded for this endpoint")
+
+    name = endpoint.strip("/").replace("/", "_") if endpoint else "all"
+    return PlainTextResponse(
+        profiler.report(endpoint),
+        headers={"Content-Disposition": f'attachment; filename="profile_{name}.collapsed"'},
+    )
+
+
+@router.delete("")
+async def reset_profiling(
+    _: bool = Depends(require_admin),
+):
+    profiler.reset()
+    return {"message": "Profiling data cleared"}
@@ -1,48 +1,172 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import logging
 
-from app.api.schemas import ExternalQueryRequest, ExternalQueryResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas import (
+    ExternalQueryRequest,
+    ExternalQueryResponse,
+    BatchQueryRequest,
+    BatchQueryResponse,
+    BatchQueryResult,
+)
 from app.api.auth import get_api_key
-from app.models import get_db, APIKey
-from app.services.rag_pipeline import rag_pipeline
+from app.models import get_async_db, APIKey
+from app.services.rag_pipeline import rag_pipeline, BatchQuery, Source
 from app.services.api_key_service import api_key_service
-from app.services.query_logger import query_logger
+from app.services.query_logger import query_logger, StageTimings
+from app.core.metrics import observe_stages
+from app.core.deadline import Deadline, DeadlineExceeded
+from app.core.admission import Overloaded
+from app.config import settings
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+
+
+def request_deadline(timeout_ms: int | None, http_request: Request) -> Deadline | None:
+    """Deadline from the ``timeout_ms`` body field or timeout header, whichever is tighter."""
+    timeouts = [timeout_ms] if timeout_ms else []
+    header = http_request.headers.get(TIMEOUT_HEADER)
+    if header:
+        try:
+            timeouts.append(int(header))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid {TIMEOUT_HEADER} header")
+    if not timeouts:
+        return None
+
+    timeout_ms = min(min(timeouts), settings.query_max_timeout_ms)
+    # API key verification has already used part of the budget
+    return Deadline.after((timeout_ms - http_request.state.auth_ms) / 1000)
 
 
 @router.post("/query", response_model=ExternalQueryResponse)
 async def external_query(
     request: ExternalQueryRequest,
+    http_request: Request,
     api_key: APIKey = Depends(get_api_key),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    timings = StageTimings()
+    timings.add("auth", http_request.state.auth_ms)
+    deadline = request_deadline(request.timeout_ms, http_request)
+
     with query_logger.timer() as get_latency:
-        result = await rag_pipeline.query(
+        try:
+            result = await rag_pipeline.query(
+                query_text=request.query,
+                space_id=api_key.space_id,
+                top_k=request.top_k,
+                system_prompt=request.system_prompt,
+                timings=timings,
+                deadline=deadline,
+            )
+        except DeadlineExceeded:
+            raise HTTPException(status_code=504, detail="Deadline exceeded before retrieval completed")
+        latency_ms = get_latency()
+
+    with timings.stage("log"):
+        await api_key_service.update_usage(db, api_key)
+
+        await query_logger.log(
+            db=db,
             query_text=request.query,
-            space_id=api_key.space_id,
-            top_k=request.top_k,
-            system_prompt=request.system_prompt,
+            response_text=result.answer,
+            chunks_retrieved=result.chunks_retrieved,
+            latency_ms=latency_ms,
+            model_used=result.model,
+            source="external_api",
+            api_key_id=api_key.id,
+            prompt_tokens=result.prompt_tokens,
+            completion_tokens=result.completion_tokens,
+            cost=result.cost,
+            stage_timings=timings.stages,
+            coalesced=result.coalesced,
+            degraded=result.degraded,
         )
-        latency_ms = get_latency()
+    observe_stages(timings.stages, source="external_api")
 
-    api_key_service.update_usage(db, api_key)
-
-    query_logger.log(
-        db=db,
-        query_text=request.query,
-        response_text=result.answer,
-        chunks_retrieved=result.chunks_retrieved,
-        latency_ms=latency_ms,
-        model_used=result.model,
-        source="external_api",
-        api_key_id=api_key.id,
-        prompt_tokens=result.prompt_tokens,
-        completion_tokens=result.completion_tokens,
-        cost=result.cost,
+    return ExternalQueryResponse(
+        answer=result.answer,
+        sources=format_sources(result.sources),
+        degraded=result.degraded,
     )
 
-    sources = [
+
+@router.post("/query/batch", response_model=BatchQueryResponse)
+async def external_query_batch(
+    request: BatchQueryRequest,
+    http_request: Request,
+    api_key: APIKey = Depends(get_api_key),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if len(request.queries) > settings.batch_query_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_query_max_items} queries per batch",
+        )
+
+    timings = StageTimings()
+    timings.add("auth", http_request.state.auth_ms)
+    deadline = request_deadline(request.timeout_ms, http_request)
+
+    try:
+        results, item_timings, latencies = await rag_pipeline.query_batch(
+            queries=[
+                BatchQuery(query_text=q.query, top_k=q.top_k, system_prompt=q.system_prompt)
+                for q in request.queries
+            ],
+            space_id=api_key.space_id,
+            timings=timings,
+            deadline=deadline,
+        )
+    except DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Deadline exceeded before retrieval completed")
+
+    items = []
+    entries = []
+    for query, result, stages, latency_ms in zip(request.queries, results, item_timings, latencies):
+        if isinstance(result, (ValueError, Overloaded)):
+            items.append(BatchQueryResult(error=str(result)))
+            continue
+        if isinstance(result, Exception):
+            logger.error(f"Batch query item failed: {result!r}")
+            items.append(BatchQueryResult(error="Internal error"))
+            continue
+        items.append(BatchQueryResult(
+            answer=result.answer,
+            sources=format_sources(result.sources),
+            degraded=result.degraded,
+        ))
+        entries.append({
+            "api_key_id": api_key.id,
+            "query_text": query.query,
+            "response_text": result.answer,
+            "chunks_retrieved": result.chunks_retrieved,
+            "latency_ms": latency_ms,
+            "model_used": result.model,
+            "source": "external_api_batch",
+            "prompt_tokens": result.prompt_tokens,
+            "completion_tokens": result.completion_tokens,
+            "cost": result.cost,
+            "stage_timings": stages.stages,
+            "degraded": result.degraded,
+        })
+        observe_stages(stages.stages, source="external_api_batch")
+
+    # Like single queries, only answered items are billed and logged
+    if entries:
+        await api_key_service.update_usage(db, api_key, count=len(entries))
+        await query_logger.log_many_async(db, entries)
+
+    return BatchQueryResponse(results=items)
+
+
+def format_sources(sources: list[Source]) -> list[dict]:
+    return [
         {
             "document_id": s.document_id,
             "filename": s.filename,
@@ -50,11 +174,9 @@ async def external_query(
             "content": s.content[:500] + "..." if len(s.content) > 500 else s.content,
             "score": round(s.score, 4),
         }
-        for s in result.sources
+        for s in sources
     ]
 
-    return ExternalQueryResponse(answer=result.answer, sources=sources)
-
 
 @router.get("/health")
 async def health():
@@ -0,0 +1,124 @@
+import time
+
+from fastapi import APIRouter, Depends, Request
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.api.schemas import RetrieveRequest, RetrieveResponse, RetrievedChunk, RetrievedDocument, NeighborChunk
+from app.api.auth import get_api_key
+from app.models import get_db, APIKey, Document, Chunk
+from app.services.rag_pipeline import rag_pipeline
+from app.services.context_packer import ContextCandidate
+from app.services.api_key_service import api_key_service
+from app.services.query_logger import query_log_buffer, StageTimings
+from app.core.metrics import observe_stages
+from app.config import settings
+
+router = APIRouter()
+
+
+def api_key_or_address(request: Request) -> str:
+    api_key = request.headers.get("X-API-Key")
+    return api_key_service.get_prefix(api_key) if api_key else get_remote_address(request)
+
+
+limiter = Limiter(key_func=api_key_or_address)
+
+
+def neighbor_chunks(db: Session, hits: list[ContextCandidate], window: int) -> dict[tuple[int, int], list[NeighborChunk]]:
+    """Chunks within ``window`` positions of each hit, fetched in one query."""
+    ranges = [
+        and_(Chunk.document_id == hit.document_id, Chunk.chunk_index.between(hit.chunk_index - window, hit.chunk_index + window))
+        for hit in hits
+    ]
+    rows = db.execute(
+        select(Chunk.document_id, Chunk.chunk_index, Chunk.content).where(or_(*ranges))
+    ).all()
+    by_document: dict[int, dict[int, str]] = {}
+    for document_id, chunk_index, content in rows:
+        by_document.setdefault(document_id, {})[chunk_index] = content
+
+    neighbors = {}
+    for hit in hits:
+        chunks = by_document.get(hit.document_id, {})
+        neighbors[(hit.document_id, hit.chunk_index)] = [
+            NeighborChunk(chunk_index=i, content=chunks[i])
+            for i in range(hit.chunk_index - window, hit.chunk_index + window + 1)
+            if i != hit.chunk_index and i in chunks
+        ]
+    return neighbors
+
+
+def document_metadata(db: Session, document_ids: set[int]) -> dict[int, RetrievedDocument]:
+    rows = db.execute(
+        select(Document.id, Document.file_type, Document.file_size, Document.chunk_count, Document.created_at)
+        .where(Document.id.in_(document_ids))
+    ).all()
+    return {
+        row.id: RetrievedDocument(
+            file_type=row.file_type,
+            file_size=row.file_size,
+            chunk_count=row.chunk_count,
+            created_at=row.created_at,
+        )
+        for row in rows
+    }
+
+
+@router.post("/retrieve", response_model=RetrieveResponse)
+@limiter.limit(settings.retrieve_rate_limit)
+def retrieve(
+    request: Request,
+    body: RetrieveRequest,
+    api_key: APIKey = Depends(get_api_key),
+    db: Session = Depends(get_db),
+):
+    start = time.perf_counter()
+    timings = StageTimings()
+    timings.add("auth", request.state.auth_ms)
+
+    hits = rag_pipeline.retrieve(
+        query_text=body.query,
+        space_id=api_key.space_id,
+        top_k=body.top_k,
+        timings=timings,
+    )
+
+    with timings.stage("expand"):
+        neighbors = neighbor_chunks(db, hits, body.neighbors) if body.neighbors and hits else {}
+        documents = document_metadata(db, {h.document_id for h in hits}) if body.include_metadata and hits else {}
+
+    results = [
+        RetrievedChunk(
+            document_id=hit.document_id,
+            filename=hit.filename,
+            chunk_index=hit.chunk_index,
+            content=hit.content if body.full_content or len(hit.content) <= 500 else hit.content[:500] + "...",
+            score=round(hit.score, 4),
+            start_char=hit.start_char,
+            end_char=hit.end_char,
+            neighbors=neighbors.get((hit.document_id, hit.chunk_index)) if body.neighbors else None,
+            document=documents.get(hit.document_id),
+        )
+        for hit in hits
+    ]
+    took_ms = (time.perf_counter() - start) * 1000
+
+    query_log_buffer.add({
+        "api_key_id": api_key.id,
+        "query_text": body.query,
+        "response_text": "",
+        "chunks_retrieved": len(results),
+        "latency_ms": took_ms,
+        "model_used": "",
+        "source": "external_retrieve",
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cost": 0.0,
+        "stage_timings": timings.stages,
+    })
+    observe_stages(timings.stages, source="external_retrieve")
+
+    return RetrieveResponse(results=results, took_ms=round(took_ms, 3))
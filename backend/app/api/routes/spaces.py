@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.api.schemas import SpaceCreate, SpaceResponse, SpaceListResponse, SpaceDetailResponse
-from app.models import get_db, Space
+from app.models import get_db, Space, APIKey, document_spaces
 from app.core.auth import require_admin
+from app.services.api_key_service import api_key_service
+from app.services.reconciler import vector_reconciler
 
 router = APIRouter()
 
@@ -44,15 +47,24 @@ async def get_space(
     db: Session = Depends(get_db),
     _: bool = Depends(require_admin),
 ):
-    space = db.query(Space).filter(Space.id == space_id).first()
-    if not space:
+    document_count = (
+        select(func.count()).select_from(document_spaces)
+        .where(document_spaces.c.space_id == Space.id)
+        .scalar_subquery()
+    )
+    api_key_count = select(func.count(APIKey.id)).where(APIKey.space_id == Space.id).scalar_subquery()
+    row = db.execute(
+        select(Space, document_count, api_key_count).where(Space.id == space_id)
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Space not found")
+    space, document_count, api_key_count = row
     return SpaceDetailResponse(
         id=space.id,
         name=space.name,
         description=space.description,
-        document_count=len(space.documents),
-        api_key_count=len(space.api_keys),
+        document_count=document_count,
+        api_key_count=api_key_count,
         created_at=space.created_at,
         updated_at=space.updated_at,
     )
@@ -68,7 +80,13 @@ async def delete_space(
     if not space:
         raise HTTPException(status_code=404, detail="Space not found")
 
+    document_ids = list(db.scalars(
+        select(document_spaces.c.document_id).where(document_spaces.c.space_id == space_id)
+    ))
+    api_key_ids = list(db.scalars(select(APIKey.id).where(APIKey.space_id == space_id)))
     db.delete(space)
     db.commit()
+    api_key_service.invalidate_many(api_key_ids)
+    vector_reconciler.sync_documents(db, document_ids)
 
     return {"message": "Space deleted successfully"}
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 from app.api.schemas import QueryLogResponse, QueryLogListResponse, StatsResponse, UsageResponse, UsageLogResponse
+from app.api.projection import parse_fields
 from app.models import get_db, QueryLog, Document, Chunk, Space
 from app.services.query_logger import query_logger
 from app.core.auth import require_admin
+from app.core.responses import ORJSONResponse
 
 router = APIRouter()
 
@@ -13,14 +15,12 @@ router = APIRouter()
 @router.get("/logs", response_model=QueryLogListResponse)
 async def get_query_logs(
     limit: int = Query(100, ge=1, le=500),
+    fields: str | None = Query(None, description="Comma-separated log fields to return, e.g. id,query_text,latency_ms"),
     db: Session = Depends(get_db),
     _: bool = Depends(require_admin),
 ):
-    logs = query_logger.get_recent(db, limit=limit)
-    return QueryLogListResponse(
-        logs=[QueryLogResponse.model_validate(log) for log in logs],
-        total=len(logs),
-    )
+    logs = query_logger.get_recent(db, parse_fields(fields, QueryLogResponse), limit=limit)
+    return ORJSONResponse({"logs": logs, "total": len(logs)})
 
 
 @router.get("/overview", response_model=StatsResponse)
@@ -30,9 +30,11 @@ async def get_stats(
 ):
     query_stats = query_logger.get_stats(db)
 
-    total_documents = db.query(func.count(Document.id)).scalar() or 0
-    total_chunks = db.query(func.count(Chunk.id)).scalar() or 0
-    total_spaces = db.query(func.count(Space.id)).scalar() or 0
+    total_documents, total_chunks, total_spaces = db.query(
+        select(func.count(Document.id)).scalar_subquery(),
+        select(func.count(Chunk.id)).scalar_subquery(),
+        select(func.count(Space.id)).scalar_subquery(),
+    ).one()
 
     return StatsResponse(
         total_queries=query_stats["total_queries"],
@@ -48,26 +50,23 @@ async def get_stats(
 async def get_usage(
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    fields: str | None = Query(None, description="Comma-separated log fields to return, e.g. id,cost,created_at"),
     db: Session = Depends(get_db),
     _: bool = Depends(require_admin),
 ):
-    total_cost = db.query(func.sum(QueryLog.cost)).scalar() or 0.0
-    total_prompt_tokens = db.query(func.sum(QueryLog.prompt_tokens)).scalar() or 0
-    total_completion_tokens = db.query(func.sum(QueryLog.completion_tokens)).scalar() or 0
-    total_requests = db.query(func.count(QueryLog.id)).scalar() or 0
+    total_cost, total_prompt_tokens, total_completion_tokens, total_requests = db.query(
+        func.coalesce(func.sum(QueryLog.cost), 0.0),
+        func.coalesce(func.sum(QueryLog.prompt_tokens), 0),
+        func.coalesce(func.sum(QueryLog.completion_tokens), 0),
+        func.count(QueryLog.id),
+    ).one()
 
-    logs = (
-        db.query(QueryLog)
-        .order_by(QueryLog.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+    logs = query_logger.get_recent(db, parse_fields(fields, UsageLogResponse), limit=limit, offset=offset)
 
-    return UsageResponse(
-        total_cost=round(total_cost, 6),
-        total_prompt_tokens=total_prompt_tokens,
-        total_completion_tokens=total_completion_tokens,
-        total_requests=total_requests,
-        logs=[UsageLogResponse.model_validate(log) for log in logs],
-    )
+    return ORJSONResponse({
+        "total_cost": round(total_cost, 6),
+        "total_prompt_tokens": total_prompt_tokens,
+        "total_completion_tokens": total_completion_tokens,
+        "total_requests": total_requests,
+        "logs": logs,
+    })
@@ -82,11 +82,72 @@ class ExternalQueryRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=10000)
     top_k: int = Field(default=5, ge=1, le=50)
     system_prompt: str | None = Field(None, max_length=2000)
+    timeout_ms: int | None = Field(None, ge=1, le=600000)
 
 
 class ExternalQueryResponse(BaseModel):
     answer: str
     sources: list[dict]
+    degraded: bool = False
+
+
+class BatchQueryItem(BaseModel):
+    query: str = Field(..., min_length=1, max_length=10000)
+    top_k: int = Field(default=5, ge=1, le=50)
+    system_prompt: str | None = Field(None, max_length=2000)
+
+
+class BatchQueryRequest(BaseModel):
+    queries: list[BatchQueryItem] = Field(..., min_length=1)
+    timeout_ms: int | None = Field(None, ge=1, le=600000)
+
+
+class BatchQueryResult(BaseModel):
+    answer: str | None = None
+    sources: list[dict] = []
+    degraded: bool = False
+    error: str | None = None
+
+
+class BatchQueryResponse(BaseModel):
+    results: list[BatchQueryResult]
+
+
+class RetrieveRequest(BaseModel):
+    query: str = Field(..., min_length=1, max_length=10000)
+    top_k: int = Field(default=5, ge=1, le=50)
+    full_content: bool = False
+    neighbors: int = Field(default=0, ge=0, le=5)
+    include_metadata: bool = False
+
+
+class NeighborChunk(BaseModel):
+    chunk_index: int
+    content: str
+
+
+class RetrievedDocument(BaseModel):
+    file_type: str
+    file_size: int
+    chunk_count: int
+    created_at: datetime
+
+
+class RetrievedChunk(BaseModel):
+    document_id: int
+    filename: str
+    chunk_index: int
+    content: str
+    score: float
+    start_char: int | None = None
+    end_char: int | None = None
+    neighbors: list[NeighborChunk] | None = None
+    document: RetrievedDocument | None = None
+
+
+class RetrieveResponse(BaseModel):
+    results: list[RetrievedChunk]
+    took_ms: float
 
 
 class APIKeyCreate(BaseModel):
@@ -129,6 +190,9 @@ class QueryLogResponse(BaseModel):
     prompt_tokens: int
     completion_tokens: int
     cost: float
+    stage_timings: dict[str, float] | None = None
+    coalesced: bool = False
+    degraded: bool = False
     created_at: datetime
 
     class Config:
@@ -164,6 +228,22 @@ class UsageLogResponse(BaseModel):
         from_attributes = True
 
 
+class ProfilingConfigRequest(BaseModel):
+    enabled: bool
+    sample_rate: float | None = Field(None, ge=0.0, le=1.0)
+    interval_ms: float | None = Field(None, ge=1.0, le=1000.0)
+    endpoints: list[str] | None = None
+
+
+class ProfilingStatusResponse(BaseModel):
+    enabled: bool
+    sample_rate: float
+    interval_ms: float
+    endpoints: list[str]
+    profiled_requests: dict[str, int]
+    samples: dict[str, int]
+
+
 class UsageResponse(BaseModel):
     total_cost: float
     total_prompt_tokens: int
@@ -0,0 +1,134 @@
+"""Maintenance commands, run from the backend directory::
+
+    python -m app.cli reconcile --dry-run
+    python -m app.cli reconcile --restore
+    python -m app.cli rebuild-index --backend flat
+    python -m app.cli backfill-embeddings
+    python -m app.cli snapshot-export 1 staging-space.tar
+    python -m app.cli snapshot-import staging-space.tar --name production
+"""
+import argparse
+import json
+import logging
+import sys
+
+from app.config import ensure_data_dirs, settings
+from app.models import init_db
+from app.services.vector_index import IndexLocked
+
+
+def reconcile(args: argparse.Namespace) -> int:
+    from app.services.reconciler import VectorReconciler
+
+    reconciler = VectorReconciler(page_size=args.page_size, grace_seconds=args.grace_seconds)
+    report = reconciler.run(dry_run=args.dry_run, restore=args.restore)
+    print(json.dumps(report.to_dict(), indent=2))
+    return 0
+
+
+def rebuild_index(args: argparse.Namespace) -> int:
+    from app.services.index_builder import IndexBuilder
+    from app.services.vector_backends import create_backend
+
+    report = IndexBuilder(batch_size=args.batch_size).rebuild(create_backend(args.backend), reset=not args.keep)
+    print(json.dumps(report.to_dict(), indent=2))
+    if report.skipped:
+        print(f"{report.skipped} chunks have no stored embedding; run backfill-embeddings or reconcile --restore")
+    return 0
+
+
+def backfill_embeddings(args: argparse.Namespace) -> int:
+    from app.services.index_builder import IndexBuilder
+    from app.services.vector_backends import create_backend
+
+    report = IndexBuilder(batch_size=args.batch_size).backfill(create_backend(args.backend))
+    print(json.dumps(report.to_dict(), indent=2))
+    return 0
+
+
+def snapshot_export(args: argparse.Namespace) -> int:
+    from app.models import SessionLocal
+    from app.services.snapshot import SpaceSnapshot
+
+    snapshot = SpaceSnapshot(segment_size=args.segment_size)
+    with SessionLocal() as db:
+        if args.output == "-":
+            report = snapshot.export_space(db, args.space_id, sys.stdout.buffer, include_files=args.with_files)
+        else:
+            with open(args.output, "wb") as target:
+                report = snapshot.export_space(db, args.space_id, target, include_files=args.with_files)
+    print(json.dumps(report.to_dict(), indent=2), file=sys.stderr)
+    return 0
+
+
+def snapshot_import(args: argparse.Namespace) -> int:
+    from app.models import SessionLocal
+    from app.services.snapshot import space_snapshot
+
+    with SessionLocal() as db:
+        if args.archive == "-":
+            report = space_snapshot.import_space(db, sys.stdin.buffer, name=args.name)
+        else:
+            with open(args.archive, "rb") as source:
+                report = space_snapshot.import_space(db, source, name=args.name)
+    print(json.dumps(report.to_dict(), indent=2))
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Polidex maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_reconcile = commands.add_parser(
+        "reconcile", help="diff the vector store against SQLite chunks and repair drift"
+    )
+    parser_reconcile.add_argument("--dry-run", action="store_true", help="report drift without changing anything")
+    parser_reconcile.add_argument(
+        "--restore", action="store_true",
+        help="re-add missing vectors from stored embeddings, re-embedding chunks that have none"
+    )
+    parser_reconcile.add_argument("--page-size", type=int, default=settings.reconcile_page_size)
+    parser_reconcile.add_argument("--grace-seconds", type=int, default=settings.reconcile_grace_seconds)
+    parser_reconcile.set_defaults(handler=reconcile)
+
+    parser_rebuild = commands.add_parser(
+        "rebuild-index", help="load the vector store from the embeddings stored with each chunk"
+    )
+    parser_rebuild.add_argument("--backend", default=settings.vector_store_backend, help="backend to build")
+    parser_rebuild.add_argument("--batch-size", type=int, default=5000)
+    parser_rebuild.add_argument("--keep", action="store_true", help="add to the existing index instead of clearing it")
+    parser_rebuild.set_defaults(handler=rebuild_index)
+
+    parser_backfill = commands.add_parser(
+        "backfill-embeddings", help="copy vectors from the vector store into chunks that have no stored embedding"
+    )
+    parser_backfill.add_argument("--backend", default=settings.vector_store_backend, help="backend to read from")
+    parser_backfill.add_argument("--batch-size", type=int, default=1000)
+    parser_backfill.set_defaults(handler=backfill_embeddings)
+
+    parser_export = commands.add_parser("snapshot-export", help="write a space to a snapshot archive")
+    parser_export.add_argument("space_id", type=int)
+    parser_export.add_argument("output", help="archive path, or - for stdout")
+    parser_export.add_argument("--with-files", action="store_true", help="include the original uploaded files")
+    parser_export.add_argument("--segment-size", type=int, default=5000, help="chunks per archive segment")
+    parser_export.set_defaults(handler=snapshot_export)
+
+    parser_import = commands.add_parser("snapshot-import", help="create a space from a snapshot archive")
+    parser_import.add_argument("archive", help="archive path, or - for stdin")
+    parser_import.add_argument("--name", help="space name (defaults to the exported space's name)")
+    parser_import.set_defaults(handler=snapshot_import)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=settings.log_level)
+    ensure_data_dirs()
+    init_db()
+    try:
+        return args.handler(args)
+    except ValueError as e:
+        parser.exit(1, f"error: {e}\n")
+    except IndexLocked as e:
+        parser.exit(1, f"error: {e}; stop the server before running this command\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
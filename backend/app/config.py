@@ -4,18 +4,81 @@ from pathlib import Path
 
 class Settings(BaseSettings):
     openrouter_api_key: str = ""
+    openrouter_base_url: str = ""
+    openrouter_timeout: float = 30.0
+    openrouter_max_retries: int = 2
+    openrouter_retry_backoff: float = 0.5
+    openrouter_retry_backoff_cap: float = 4.0
+    openrouter_hedge_enabled: bool = False
+    openrouter_hedge_quantile: float = 0.95
+    openrouter_hedge_min_delay: float = 1.0
+    openrouter_fallback_models: list[str] = []
+    openrouter_breaker_threshold: int = 5
+    openrouter_breaker_cooldown: float = 30.0
     secret_key: str = "dev-secret-key-change-in-production"
     admin_token: str = ""
     database_url: str = "sqlite:///./data/polidex.db"
     chroma_persist_dir: str = "./data/chroma"
+    vector_store_backend: str = "chroma"
+    vector_index_dir: str = "./data/vector_index"
+    vector_index_precision: str = "int8"
+    vector_index_rescore_factor: int = 4
+    # Every worker process runs its own schedule, so this is off by default
+    reconcile_interval_minutes: float = 0.0
+    reconcile_page_size: int = 1000
+    reconcile_grace_seconds: int = 900
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_server_url: str = ""
+    embedding_server_timeout: float = 30.0
+    embedding_server_max_batch: int = 128
+    embedding_server_max_wait_ms: float = 0.0
     default_llm_model: str = "anthropic/claude-3-haiku"
 
     chunk_size: int = 1000
     chunk_overlap: int = 200
     top_k_results: int = 5
+    context_token_budget: int = 3000
+    context_token_budgets: dict[str, int] = {}
+    context_mmr_lambda: float = 0.7
+    context_duplicate_threshold: float = 0.95
+    context_chars_per_token: float = 4.0
+    query_coalescing_enabled: bool = True
+    query_max_timeout_ms: int = 120000
+    query_min_generation_ms: int = 1500
+    batch_query_max_items: int = 100
+    batch_llm_concurrency: int = 8
+    admission_embed_concurrency: int = 4
+    admission_embed_queue: int = 64
+    admission_embed_max_wait_ms: float = 2000.0
+    admission_search_concurrency: int = 8
+    admission_search_queue: int = 64
+    admission_search_max_wait_ms: float = 2000.0
+    admission_llm_concurrency: int = 32
+    admission_llm_queue: int = 128
+    admission_llm_max_wait_ms: float = 10000.0
     max_file_size: int = 50 * 1024 * 1024
     rate_limit: str = "60/minute"
+    retrieve_rate_limit: str = "600/minute"
+    api_key_cache_ttl: float = 30.0
+    log_buffer_flush_interval: float = 1.0
+    log_buffer_max_rows: int = 500
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    log_level: str = "INFO"
+
+    tracing_enabled: bool = False
+    tracing_sample_rate: float = 0.01
+    tracing_exporter: str = "jsonl"
+    tracing_jsonl_path: str = "./data/traces/spans.jsonl"
+    tracing_jsonl_max_bytes: int = 50 * 1024 * 1024
+    tracing_jsonl_backups: int = 5
+    tracing_otlp_endpoint: str = "http://localhost:4318"
+    tracing_service_name: str = "polidex-backend"
+
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.1
+    profiling_interval_ms: float = 5.0
 
     class Config:
         env_file = ".env"
@@ -28,5 +91,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 UPLOAD_DIR = DATA_DIR / "uploads"
 
-DATA_DIR.mkdir(exist_ok=True)
-UPLOAD_DIR.mkdir(exist_ok=True)
+
+def ensure_data_dirs() -> None:
+    DATA_DIR.mkdir(exist_ok=True)
+    UPLOAD_DIR.mkdir(exist_ok=True)
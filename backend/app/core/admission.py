@@ -0,0 +1,144 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from app.config import settings
+from app.core.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTIONS, ADMISSION_WAIT
+
+
+class Overloaded(Exception):
+    def __init__(self, stage: str, retry_after: float):
+        super().__init__(f"Service overloaded at the {stage} stage, retry later")
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+class StageLimiter:
+    """Concurrency limit with a bounded wait queue for one stage of the query path.
+
+    At most ``concurrency`` callers hold a slot; the rest wait in FIFO order.
+    A caller is rejected with ``Overloaded`` instead of queueing when
+    ``max_queue`` callers are already waiting, or when its expected wait
+    (its queue position times the recent average time a slot is held,
+    spread over ``concurrency`` slots) exceeds ``max_wait`` seconds. A
+    ``concurrency`` of 0 disables the limit.
+    """
+
+    # Weight of the newest sample in the moving average of slot hold times
+    SMOOTHING = 0.2
+
+    def __init__(self, stage: str, concurrency: int, max_queue: int, max_wait: float):
+        self.stage = stage
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.service_time: float | None = None
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def expected_wait(self) -> float:
+        """Seconds a caller arriving now would wait for a slot."""
+        if self.in_flight < self.concurrency and self.waiting == 0:
+            return 0.0
+        if self.service_time is None:
+            return 0.0
+        return (self.waiting + 1) * self.service_time / self.concurrency
+
+    def _admit(self) -> None:
+        if self.waiting >= self.max_queue:
+            reason = "queue_full"
+        elif self.expected_wait() > self.max_wait:
+            reason = "wait"
+        else:
+            return
+        ADMISSION_REJECTIONS.labels(stage=self.stage, reason=reason).inc()
+        raise Overloaded(self.stage, retry_after=max(self.expected_wait(), 1.0))
+
+    async def _acquire(self) -> None:
+        if self.in_flight < self.concurrency and not self._waiters:
+            self.in_flight += 1
+            return
+
+        # Waiters are futures rather than an asyncio.Semaphore so the limiter
+        # isn't tied to the event loop it was first used on.
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.labels(stage=self.stage).set(self.waiting)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        finally:
+            ADMISSION_QUEUE_DEPTH.labels(stage=self.stage).set(self.waiting)
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the next waiter; in_flight is unchanged
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.concurrency <= 0:
+            yield
+            return
+
+        self._admit()
+        queued = time.perf_counter()
+        await self._acquire()
+        started = time.perf_counter()
+        ADMISSION_WAIT.labels(stage=self.stage).observe(started - queued)
+        ADMISSION_IN_FLIGHT.labels(stage=self.stage).set(self.in_flight)
+        try:
+            yield
+        finally:
+            self._release()
+            ADMISSION_IN_FLIGHT.labels(stage=self.stage).set(self.in_flight)
+            held = time.perf_counter() - started
+            if self.service_time is None:
+                self.service_time = held
+            else:
+                self.service_time += self.SMOOTHING * (held - self.service_time)
+
+
+class AdmissionController:
+    """Per-stage limiters for the query path: embedding, vector search and LLM calls.
+
+    Limits are per worker process.
+    """
+
+    def __init__(self):
+        self.embed = StageLimiter(
+            "embed",
+            settings.admission_embed_concurrency,
+            settings.admission_embed_queue,
+            settings.admission_embed_max_wait_ms / 1000,
+        )
+        self.search = StageLimiter(
+            "search",
+            settings.admission_search_concurrency,
+            settings.admission_search_queue,
+            settings.admission_search_max_wait_ms / 1000,
+        )
+        self.llm = StageLimiter(
+            "llm",
+            settings.admission_llm_concurrency,
+            settings.admission_llm_queue,
+            settings.admission_llm_max_wait_ms / 1000,
+        )
+
+
+admission = AdmissionController()
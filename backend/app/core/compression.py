@@ -0,0 +1,85 @@
+import asyncio
+import gzip
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+# Bodies above this are compressed in a worker thread instead of on the event loop
+THREAD_MINIMUM_SIZE = 256 * 1024
+
+
+def accepted_encodings(header: str) -> set[str]:
+    encodings = set()
+    for part in header.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        encodings.add(name.strip())
+    return encodings
+
+
+def choose_encoding(header: str) -> str | None:
+    """``br`` when the client accepts it and ``brotli`` is installed, else ``gzip`` if accepted."""
+    accepted = accepted_encodings(header)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+
+
+class CompressionMiddleware(BaseHTTPMiddleware):
+    """Compresses complete JSON and text responses of at least ``minimum_size`` bytes.
+
+    Only responses with a known ``Content-Length`` are considered, so
+    streamed bodies (server-sent events, file downloads) pass through as
+    they are produced.
+    """
+
+    def __init__(self, app, minimum_size: int = settings.compression_minimum_size):
+        super().__init__(app)
+        self.minimum_size = minimum_size
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        if encoding is None or "content-encoding" in response.headers:
+            return response
+
+        length = response.headers.get("content-length")
+        content_type = response.headers.get("content-type", "")
+        if (
+            length is None
+            or int(length) < self.minimum_size
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            compressed = await asyncio.to_thread(compress, body, encoding)
+        else:
+            compressed = compress(body, encoding)
+
+        compressed_response = Response(content=compressed, status_code=response.status_code)
+        compressed_response.raw_headers = [
+            (name, value) for name, value in response.raw_headers if name != b"content-length"
+        ] + [(b"content-length", str(len(compressed)).encode()), (b"content-encoding", encoding.encode())]
+        compressed_response.headers.add_vary_header("Accept-Encoding")
+        return compressed_response
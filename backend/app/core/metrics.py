@@ -0,0 +1,126 @@
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_LATENCY = Histogram(
+    "polidex_query_stage_seconds",
+    "Time spent in each stage of a RAG query",
+    ["stage", "source"],
+    buckets=LATENCY_BUCKETS,
+)
+
+CACHE_REQUESTS = Counter(
+    "polidex_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+
+INGESTED_DOCUMENTS = Counter(
+    "polidex_ingested_documents_total",
+    "Documents processed by the ingestion pipeline",
+)
+
+INGESTED_CHUNKS = Counter(
+    "polidex_ingested_chunks_total",
+    "Chunks embedded and stored by the ingestion pipeline",
+)
+
+INGESTION_STAGE_LATENCY = Histogram(
+    "polidex_ingestion_stage_seconds",
+    "Time spent in each stage of document ingestion",
+    ["stage"],
+    buckets=LATENCY_BUCKETS + (60.0, 120.0, 300.0),
+)
+
+CONTEXT_TOKENS = Counter(
+    "polidex_context_tokens_total",
+    "Estimated prompt context tokens before (unpacked) and after (packed) context assembly",
+    ["kind"],
+)
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "polidex_embedding_batch_size",
+    "Number of texts per embedding model call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+
+EMBEDDING_SERVER_REQUESTS_PER_BATCH = Histogram(
+    "polidex_embedding_server_requests_per_batch",
+    "Client requests merged into each embedding model call by the embedding server",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+
+
+DEADLINE_OUTCOMES = Counter(
+    "polidex_query_deadline_total",
+    "Queries that ran out of their deadline, by outcome (degraded to sources only, or exceeded)",
+    ["outcome"],
+)
+
+LLM_REQUESTS = Counter(
+    "polidex_llm_requests_total",
+    "OpenRouter attempts by model and outcome",
+    ["model", "outcome"],
+)
+
+LLM_HEDGES = Counter(
+    "polidex_llm_hedges_total",
+    "Hedged (duplicate) OpenRouter requests sent after the latency threshold",
+    ["model"],
+)
+
+LLM_CIRCUIT_OPEN = Gauge(
+    "polidex_llm_circuit_open",
+    "1 while the circuit breaker for a model is open or half-open",
+    ["model"],
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "polidex_admission_queue_depth",
+    "Queries waiting for a slot at each query stage",
+    ["stage"],
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "polidex_admission_in_flight",
+    "Queries holding a slot at each query stage",
+    ["stage"],
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "polidex_admission_rejections_total",
+    "Queries shed with 503 at each query stage, by reason (queue_full, wait)",
+    ["stage", "reason"],
+)
+
+ADMISSION_WAIT = Histogram(
+    "polidex_admission_wait_seconds",
+    "Time admitted queries spent queued for a slot at each query stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+VECTOR_DRIFT = Gauge(
+    "polidex_vector_drift",
+    "Drift between SQLite chunks and the vector store found by the last reconciliation, by kind",
+    ["kind"],
+)
+
+RECONCILE_RUNS = Counter(
+    "polidex_reconcile_runs_total",
+    "Vector store reconciliation runs by outcome",
+    ["outcome"],
+)
+
+
+def observe_stages(stages: dict[str, float], source: str) -> None:
+    for stage, ms in stages.items():
+        STAGE_LATENCY.labels(stage=stage, source=source).observe(ms / 1000)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_latest() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,9 +1,15 @@
+import asyncio
 import logging
+import time
 from dataclasses import dataclass
 
 import httpx
 
 from app.config import settings
+from app.core.tracing import tracer
+from app.core.deadline import Deadline, DeadlineExceeded
+from app.core.resilience import UpstreamError, CircuitBreaker, LatencyTracker, backoff_delay
+from app.core.metrics import LLM_REQUESTS, LLM_HEDGES, LLM_CIRCUIT_OPEN
 
 logger = logging.getLogger(__name__)
 
@@ -23,64 +29,215 @@ class ChatResponse:
 
 class OpenRouterClient:
     BASE_URL = "https://openrouter.ai/api/v1"
+    RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+    FATAL_STATUSES = {400, 401, 402, 403}
 
     def __init__(
         self,
         api_key: str = settings.openrouter_api_key,
         default_model: str = settings.default_llm_model,
+        base_url: str = settings.openrouter_base_url,
+        fallback_models: list[str] = settings.openrouter_fallback_models,
+        transport: httpx.AsyncBaseTransport | None = None,
     ):
         self.api_key = api_key
         self.default_model = default_model
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.fallback_models = list(fallback_models)
+        self.timeout = settings.openrouter_timeout
+        self.max_retries = settings.openrouter_max_retries
+        self.retry_backoff = settings.openrouter_retry_backoff
+        self.retry_backoff_cap = settings.openrouter_retry_backoff_cap
+        self.hedge_enabled = settings.openrouter_hedge_enabled
+        self.hedge_quantile = settings.openrouter_hedge_quantile
+        self.hedge_min_delay = settings.openrouter_hedge_min_delay
+        self.breaker_threshold = settings.openrouter_breaker_threshold
+        self.breaker_cooldown = settings.openrouter_breaker_cooldown
+        self.latencies = LatencyTracker()
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self._breakers:
+            self._breakers[model] = CircuitBreaker(
+                threshold=self.breaker_threshold,
+                cooldown=self.breaker_cooldown,
+            )
+        return self._breakers[model]
+
+    @tracer.traced("openrouter.chat")
     async def chat(
         self,
         messages: list[ChatMessage],
         model: str | None = None,
         temperature: float = 0.7,
         max_tokens: int = 1024,
+        deadline: Deadline | None = None,
     ) -> ChatResponse:
+        """Send a chat completion, retrying and falling back across models.
+
+        With a ``deadline``, attempt timeouts are capped by the remaining
+        budget and ``DeadlineExceeded`` is raised once it runs out.
+        """
         model = model or self.default_model
+        payload = {
+            "messages": [{"role": m.role, "content": m.content} for m in messages],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+
+        candidates = [model] + [m for m in self.fallback_models if m != model]
+        last_error = UpstreamError("External service unavailable", retryable=True)
+        for candidate in candidates:
+            breaker = self.breaker(candidate)
+            if not breaker.allow():
+                LLM_REQUESTS.labels(model=candidate, outcome="circuit_open").inc()
+                continue
+            probe = breaker.state == CircuitBreaker.HALF_OPEN
+
+            span = tracer.current_span()
+            if span is not None:
+                span.set("llm.model", candidate)
+
+            try:
+                response = await self._chat_with_retries(candidate, payload, deadline)
+            except UpstreamError as e:
+                last_error = e
+                if e.status in self.FATAL_STATUSES:
+                    break
+                breaker.record_failure()
+                LLM_CIRCUIT_OPEN.labels(model=candidate).set(int(breaker.state != CircuitBreaker.CLOSED))
+                if candidate != candidates[-1]:
+                    logger.warning(f"Falling back from {candidate} after: {e}")
+                continue
+            finally:
+                if probe:
+                    breaker.release_probe()
+
+            breaker.record_success()
+            LLM_CIRCUIT_OPEN.labels(model=candidate).set(0)
+            return response
+
+        raise ValueError(str(last_error))
+
+    async def _chat_with_retries(self, model: str, payload: dict, deadline: Deadline | None) -> ChatResponse:
+        attempt = 0
+        while True:
+            timeout = self.timeout
+            if deadline is not None:
+                deadline.check("LLM request")
+                timeout = min(timeout, deadline.remaining())
+            try:
+                return await self._hedged(model, payload, timeout)
+            except UpstreamError as e:
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded("Deadline exceeded during LLM request") from e
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.retry_backoff, self.retry_backoff_cap)
+                if e.retry_after is not None:
+                    delay = max(delay, min(e.retry_after, self.retry_backoff_cap))
+                if deadline is not None and delay >= deadline.remaining():
+                    raise DeadlineExceeded("Deadline too close to retry LLM request") from e
+                attempt += 1
+                await asyncio.sleep(delay)
 
+    async def _hedged(self, model: str, payload: dict, timeout: float) -> ChatResponse:
+        if not self.hedge_enabled:
+            return await self._send(model, payload, timeout)
+
+        hedge_after = self.latencies.quantile(model, self.hedge_quantile)
+        if hedge_after is None or max(hedge_after, self.hedge_min_delay) >= timeout:
+            return await self._send(model, payload, timeout)
+        hedge_after = max(hedge_after, self.hedge_min_delay)
+
+        primary = asyncio.create_task(self._send(model, payload, timeout))
+        pending = {primary}
+        error: BaseException | None = None
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.BASE_URL}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://polidex.app",
-                        "X-Title": "Polidex RAG",
-                    },
-                    json={
-                        "model": model,
-                        "messages": [{"role": m.role, "content": m.content} for m in messages],
-                        "temperature": temperature,
-                        "max_tokens": max_tokens,
-                    },
-                    timeout=30.0,
-                )
-                response.raise_for_status()
-                data = response.json()
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                return primary.result()
 
-            content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            if not content:
-                logger.error("Empty response from OpenRouter")
-                raise ValueError("Empty response from LLM")
-
-            return ChatResponse(
-                content=content,
-                model=data.get("model", model),
-                usage=data.get("usage", {}),
+            LLM_HEDGES.labels(model=model).inc()
+            pending.add(asyncio.create_task(self._send(model, payload, timeout - hedge_after)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise error
+
+    async def _send(self, model: str, payload: dict, timeout: float) -> ChatResponse:
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(
+                f"{self.base_url}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "https://polidex.app",
+                    "X-Title": "Polidex RAG",
+                },
+                json={"model": model, **payload},
+                timeout=timeout,
             )
+            response.raise_for_status()
+            data = response.json()
         except httpx.HTTPStatusError as e:
-            logger.error(f"OpenRouter API error: {e.response.status_code}")
-            raise ValueError("External service error")
+            status = e.response.status_code
+            logger.error(f"OpenRouter API error: {status}")
+            LLM_REQUESTS.labels(model=model, outcome=f"http_{status}").inc()
+            retry_after = e.response.headers.get("Retry-After")
+            raise UpstreamError(
+                "External service error",
+                retryable=status in self.RETRYABLE_STATUSES,
+                status=status,
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
         except httpx.RequestError as e:
             logger.error(f"OpenRouter request error: {e}")
-            raise ValueError("External service unavailable")
-        except (KeyError, IndexError) as e:
+            LLM_REQUESTS.labels(model=model, outcome="request_error").inc()
+            raise UpstreamError("External service unavailable", retryable=True)
+
+        try:
+            content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        except (KeyError, IndexError, AttributeError) as e:
             logger.error(f"Unexpected response format: {e}")
-            raise ValueError("Invalid response from LLM")
+            LLM_REQUESTS.labels(model=model, outcome="invalid_response").inc()
+            raise UpstreamError("Invalid response from LLM", retryable=False)
+
+        if not content:
+            logger.error("Empty response from OpenRouter")
+            LLM_REQUESTS.labels(model=model, outcome="empty_response").inc()
+            raise UpstreamError("Empty response from LLM", retryable=True)
+
+        self.latencies.record(model, time.perf_counter() - start)
+        LLM_REQUESTS.labels(model=model, outcome="success").inc()
+        return ChatResponse(
+            content=content,
+            model=data.get("model", model),
+            usage=data.get("usage", {}),
+        )
 
     async def generate_rag_response(
         self,
@@ -88,6 +245,7 @@ class OpenRouterClient:
         context_chunks: list[str],
         model: str | None = None,
         custom_system_prompt: str | None = None,
+        deadline: Deadline | None = None,
     ) -> ChatResponse:
         context = "\n\n---\n\n".join(context_chunks)
 
@@ -121,7 +279,7 @@ Answer the question using only the information from the context above:"""
             ChatMessage(role="user", content=user_prompt),
         ]
 
-        return await self.chat(messages, model=model)
+        return await self.chat(messages, model=model, deadline=deadline)
 
 
 openrouter_client = OpenRouterClient()
@@ -0,0 +1,235 @@
+import asyncio
+import random
+import sys
+import threading
+import weakref
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.config import settings
+
+DEFAULT_ENDPOINTS = ("/api/v1/query", "/api/documents/upload")
+
+# Endpoint of the profiled request the current task or worker call belongs to
+profiled_endpoint: ContextVar[str | None] = ContextVar("profiled_endpoint", default=None)
+
+
+class ProfiledExecutor(ThreadPoolExecutor):
+    """Default executor that marks worker threads while they run a profiled request's work.
+
+    ``asyncio.to_thread`` submits from the calling task's context, so the
+    endpoint is known at submit time.
+    """
+
+    def __init__(self, profiler: "SamplingProfiler", **kwargs):
+        super().__init__(**kwargs)
+        self.profiler = profiler
+
+    def submit(self, fn, /, *args, **kwargs):
+        endpoint = profiled_endpoint.get()
+        if endpoint is None:
+            return super().submit(fn, *args, **kwargs)
+        return super().submit(self.profiler.run_attached, endpoint, fn, *args, **kwargs)
+
+
+class SamplingProfiler:
+    """Statistical profiler for live requests.
+
+    A background thread samples stacks and aggregates them per endpoint in
+    collapsed (flamegraph) format. Samples are attributed by task: the event
+    loop thread counts only while it is running a task of a profiled request
+    (the request's own task or one created from it), so idle time and other
+    requests on the loop are left out. Work handed to ``asyncio.to_thread``
+    is sampled on its worker thread for as long as it runs.
+    """
+
+    MAX_DEPTH = 128
+
+    def __init__(
+        self,
+        enabled: bool = settings.profiling_enabled,
+        sample_rate: float = settings.profiling_sample_rate,
+        interval_ms: float = settings.profiling_interval_ms,
+        endpoints: tuple[str, ...] = DEFAULT_ENDPOINTS,
+    ):
+        self.enabled = False
+        self.sample_rate = sample_rate
+        self.interval_ms = interval_ms
+        self.endpoints = set(endpoints)
+        self._tasks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._loops: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._threads: dict[int, str] = {}
+        self._stacks: dict[str, Counter] = {}
+        self._requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        if enabled:
+            self.configure(enabled=True)
+
+    def configure(
+        self,
+        enabled: bool | None = None,
+        sample_rate: float | None = None,
+        interval_ms: float | None = None,
+        endpoints: list[str] | None = None,
+    ) -> None:
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if interval_ms is not None:
+            self.interval_ms = interval_ms
+        if endpoints is not None:
+            self.endpoints = set(endpoints)
+        if enabled is True and not self.enabled:
+            self._start()
+        elif enabled is False and self.enabled:
+            self._stop_sampler()
+
+    def should_profile(self, path: str) -> bool:
+        return self.enabled and path in self.endpoints and random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self, endpoint: str):
+        """Attribute the current task, and tasks and thread work started from it, to ``endpoint``."""
+        loop = asyncio.get_running_loop()
+        self._instrument(loop)
+        task = asyncio.current_task()
+        token = profiled_endpoint.set(endpoint)
+        with self._lock:
+            self._tasks[task] = endpoint
+            self._requests[endpoint] += 1
+        try:
+            yield
+        finally:
+            profiled_endpoint.reset(token)
+            with self._lock:
+                self._tasks.pop(task, None)
+
+    def run_attached(self, endpoint: str, fn, *args, **kwargs):
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] = endpoint
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._threads.pop(thread_id, None)
+
+    def _instrument(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Install the task factory and executor that carry attribution, once per loop."""
+        if loop in self._loops:
+            return
+        previous = loop.get_task_factory()
+
+        def task_factory(loop, coro, **kwargs):
+            task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+            context = kwargs.get("context")
+            endpoint = context.get(profiled_endpoint) if context is not None else profiled_endpoint.get()
+            if endpoint is not None:
+                with self._lock:
+                    self._tasks[task] = endpoint
+                task.add_done_callback(self._forget_task)
+            return task
+
+        loop.set_task_factory(task_factory)
+        loop.set_default_executor(ProfiledExecutor(self, thread_name_prefix="asyncio"))
+        with self._lock:
+            self._loops[loop] = threading.get_ident()
+
+    def _forget_task(self, task: asyncio.Task) -> None:
+        with self._lock:
+            self._tasks.pop(task, None)
+
+    def _start(self) -> None:
+        self._stop.clear()
+        self.enabled = True
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def _stop_sampler(self) -> None:
+        self.enabled = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_ms / 1000):
+            with self._lock:
+                tasks = dict(self._tasks)
+                loops = list(self._loops.items())
+                targets = list(self._threads.items())
+            if not tasks and not targets:
+                continue
+
+            for loop, thread_id in loops:
+                endpoint = tasks.get(asyncio.current_task(loop))
+                if endpoint is not None:
+                    targets.append((thread_id, endpoint))
+            frames = sys._current_frames()
+            for thread_id, endpoint in targets:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = self._collapse(frame)
+                with self._lock:
+                    self._stacks.setdefault(endpoint, Counter())[stack] += 1
+
+    def _collapse(self, frame) -> str:
+        parts = []
+        while frame is not None and len(parts) < self.MAX_DEPTH:
+            code = frame.f_code
+            module = frame.f_globals.get("__name__", "?")
+            parts.append(f"{module}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(parts))
+
+    def status(self) -> dict:
+        with self._lock:
+            samples = {endpoint: sum(stacks.values()) for endpoint, stacks in self._stacks.items()}
+            requests = dict(self._requests)
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval_ms,
+            "endpoints": sorted(self.endpoints),
+            "profiled_requests": requests,
+            "samples": samples,
+        }
+
+    def report(self, endpoint: str | None = None) -> str:
+        """Collapsed stacks (``frame;frame;frame count`` per line), prefixed by endpoint when reporting all."""
+        with self._lock:
+            if endpoint is not None:
+                stacks = self._stacks.get(endpoint, Counter())
+                lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+            else:
+                lines = [
+                    f"{name};{stack} {count}"
+                    for name, stacks in sorted(self._stacks.items())
+                    for stack, count in stacks.most_common()
+                ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not profiler.enabled or scope["type"] != "http" or not profiler.should_profile(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        with profiler.profile(scope["path"]):
+            await self.app(scope, receive, send)
+
+
+profiler = SamplingProfiler()
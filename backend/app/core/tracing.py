@@ -0,0 +1,351 @@
+import functools
+import inspect
+import json
+import logging
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.config import settings, BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+TRACE_ID_HEADER = "X-Trace-Id"
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current_span: ContextVar[Span | None] = ContextVar("polidex_current_span", default=None)
+
+
+class JsonlSpanExporter:
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        file_path = Path(path)
+        if not file_path.is_absolute():
+            file_path = BASE_DIR / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        handler = RotatingFileHandler(file_path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger = logging.getLogger("polidex.spans")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.handlers = [handler]
+
+    def export(self, spans: list[Span]) -> None:
+        for span in spans:
+            self._logger.info(json.dumps(span.to_dict(), default=str))
+
+    def shutdown(self) -> None:
+        for handler in self._logger.handlers:
+            handler.close()
+
+
+class OtlpHttpExporter:
+    def __init__(self, endpoint: str, service_name: str):
+        import httpx
+
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=5.0)
+
+    def _attribute(self, key: str, value) -> dict:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _span(self, span: Span) -> dict:
+        payload = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 2 if span.parent_id is None else 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [self._attribute(k, v) for k, v in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            payload["parentSpanId"] = span.parent_id
+        return payload
+
+    def export(self, spans: list[Span]) -> None:
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": [self._attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "polidex"},
+                    "spans": [self._span(s) for s in spans],
+                }],
+            }],
+        }
+        try:
+            self._client.post(self.url, json=body).raise_for_status()
+        except Exception as e:
+            logger.warning(f"OTLP span export failed: {e}")
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+class Tracer:
+    BATCH_SIZE = 512
+    FLUSH_INTERVAL = 1.0
+    QUEUE_SIZE = 10_000
+
+    def __init__(
+        self,
+        enabled: bool = settings.tracing_enabled,
+        sample_rate: float = settings.tracing_sample_rate,
+    ):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self._exporter = None
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._worker: threading.Thread | None = None
+        self._worker_lock = threading.Lock()
+
+    def _build_exporter(self):
+        if settings.tracing_exporter == "otlp":
+            return OtlpHttpExporter(settings.tracing_otlp_endpoint, settings.tracing_service_name)
+        return JsonlSpanExporter(
+            settings.tracing_jsonl_path,
+            max_bytes=settings.tracing_jsonl_max_bytes,
+            backups=settings.tracing_jsonl_backups,
+        )
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._exporter = self._build_exporter()
+                self._worker = threading.Thread(target=self._run_worker, name="span-exporter", daemon=True)
+                self._worker.start()
+
+    def _run_worker(self) -> None:
+        stop = False
+        while not stop:
+            try:
+                span = self._queue.get(timeout=self.FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+
+            batch: list[Span] = []
+            while True:
+                if span is None:
+                    stop = True
+                    break
+                batch.append(span)
+                if len(batch) >= self.BATCH_SIZE:
+                    break
+                try:
+                    span = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._exporter.export(batch)
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def should_sample(self, parent_sampled: bool | None) -> bool:
+        if parent_sampled is not None:
+            return parent_sampled
+        return random.random() < self.sample_rate
+
+    @contextmanager
+    def start_trace(self, name: str, trace_id: str | None = None, parent_id: str | None = None, sampled: bool | None = None):
+        """Open a root span for an incoming request. Yields ``None`` when the trace is not sampled."""
+        if not self.enabled or not self.should_sample(sampled):
+            yield None
+            return
+
+        span = Span(
+            trace_id=trace_id or secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent_id,
+            name=name,
+            start_ns=time.time_ns(),
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+
+        span = Span(
+            trace_id=parent.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id,
+            name=name,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span)
+
+    def traced(self, name: str):
+        """Decorator wrapping a sync or async callable in a child span of the current trace."""
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if _current_span.get() is None:
+                        return await func(*args, **kwargs)
+                    with self.span(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return func(*args, **kwargs)
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def current_span(self) -> Span | None:
+        return _current_span.get()
+
+    def instrument_engine(self, engine) -> None:
+        from sqlalchemy import event
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            parent = _current_span.get()
+            if parent is None:
+                return
+            context._polidex_span = Span(
+                trace_id=parent.trace_id,
+                span_id=secrets.token_hex(8),
+                parent_id=parent.span_id,
+                name="db.query",
+                start_ns=time.time_ns(),
+                attributes={"db.statement": statement[:500], "db.executemany": executemany},
+            )
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            span = getattr(context, "_polidex_span", None)
+            if span is not None:
+                context._polidex_span = None
+                self._finish(span)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            context = exception_context.execution_context
+            span = getattr(context, "_polidex_span", None) if context else None
+            if span is not None:
+                context._polidex_span = None
+                span.error = str(exception_context.original_exception)
+                self._finish(span)
+
+    def shutdown(self) -> None:
+        if self._worker is None:
+            return
+        self._queue.put(None)
+        self._worker.join(timeout=5)
+        self._exporter.shutdown()
+
+
+def parse_traceparent(header: str | None) -> tuple[str | None, str | None, bool | None]:
+    """Parse a W3C ``traceparent`` header into (trace_id, parent_span_id, sampled)."""
+    if not header:
+        return None, None, None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None, None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None, None, None
+    return parts[1], parts[2], bool(flags & 0x01)
+
+
+class TracingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        trace_id, parent_id, sampled = parse_traceparent(request.headers.get("traceparent"))
+        if trace_id is None:
+            incoming = request.headers.get(TRACE_ID_HEADER, "")
+            if len(incoming) == 32 and all(c in "0123456789abcdef" for c in incoming.lower()):
+                trace_id = incoming.lower()
+
+        with tracer.start_trace(f"{request.method} {request.url.path}", trace_id, parent_id, sampled) as span:
+            response = await call_next(request)
+            if span is not None:
+                span.set("http.method", request.method)
+                span.set("http.target", request.url.path)
+                span.set("http.status_code", response.status_code)
+                response.headers[TRACE_ID_HEADER] = span.trace_id
+            return response
+
+
+tracer = Tracer()
@@ -0,0 +1,156 @@
+"""Shared embedding server for multi-worker deployments.
+
+One process owns the SentenceTransformer model and serves embeddings over a
+Unix socket or local HTTP. Concurrent requests from all workers are merged
+into shared model calls. Start it from the backend directory and point the
+workers at it::
+
+    python -m app.embedding_server --socket ./data/embedding.sock
+    EMBEDDING_SERVER_URL=unix://./data/embedding.sock uvicorn app.main:app --workers 4
+
+``POST /embed`` takes ``{"texts": [...]}`` and returns float32 rows as
+``application/octet-stream`` with the row width in ``X-Embedding-Dimension``.
+"""
+import argparse
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import numpy as np
+from fastapi import FastAPI, Response
+from pydantic import BaseModel
+
+from app.config import settings
+from app.core.metrics import EMBEDDING_SERVER_REQUESTS_PER_BATCH, render_latest
+from app.services.embedder import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+
+class EmbedRequest(BaseModel):
+    texts: list[str]
+
+
+class EmbeddingBatcher:
+    """Merges concurrent embed requests into shared model calls.
+
+    A single loop runs the model, one call at a time, in a worker thread.
+    Requests that arrive while a call is running queue up and go into the
+    next call together, up to ``max_batch`` texts. With ``max_wait_ms`` above
+    zero, a request that finds the model idle also waits that long for
+    company before it is encoded.
+    """
+
+    def __init__(self, service: EmbeddingService, max_batch: int, max_wait_ms: float):
+        self.service = service
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue[tuple[list[str], asyncio.Future]] = asyncio.Queue()
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    async def run(self) -> None:
+        while True:
+            pending = await self._collect()
+            texts = [text for batch, _ in pending for text in batch]
+            EMBEDDING_SERVER_REQUESTS_PER_BATCH.observe(len(pending))
+            try:
+                embeddings = await asyncio.to_thread(self.service.encode, texts)
+            except Exception as e:
+                logger.exception(f"Embedding {len(texts)} texts failed")
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for batch, future in pending:
+                if not future.done():
+                    future.set_result(embeddings[offset:offset + len(batch)])
+                offset += len(batch)
+
+    async def _collect(self) -> list[tuple[list[str], asyncio.Future]]:
+        pending = [await self._queue.get()]
+        size = len(pending[0][0])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while size < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+
+def create_app(service: EmbeddingService, max_batch: int, max_wait_ms: float) -> FastAPI:
+    batcher = EmbeddingBatcher(service, max_batch, max_wait_ms)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await asyncio.to_thread(service.load)
+        logger.info(f"Embedding server ready with {service.model_name} ({service.dimension} dims)")
+        task = asyncio.create_task(batcher.run())
+        yield
+        task.cancel()
+
+    app = FastAPI(title="Polidex embedding server", lifespan=lifespan)
+
+    @app.post("/embed")
+    async def embed(request: EmbedRequest):
+        if request.texts:
+            embeddings = await batcher.embed(request.texts)
+        else:
+            embeddings = np.empty((0, service.dimension))
+        return Response(
+            content=np.ascontiguousarray(embeddings, dtype="<f4").tobytes(),
+            media_type="application/octet-stream",
+            headers={"X-Embedding-Dimension": str(service.dimension)},
+        )
+
+    @app.get("/health")
+    async def health():
+        return {"model": service.model_name, "dimension": service.dimension}
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        payload, content_type = render_latest()
+        return Response(content=payload, media_type=content_type)
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", help="Unix socket path (takes precedence over --host/--port)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--model", default=settings.embedding_model)
+    parser.add_argument("--max-batch", type=int, default=settings.embedding_server_max_batch)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.embedding_server_max_wait_ms)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=settings.log_level)
+    app = create_app(EmbeddingService(args.model, server_url=""), args.max_batch, args.max_wait_ms)
+    if args.socket:
+        Path(args.socket).unlink(missing_ok=True)
+        uvicorn.run(app, uds=args.socket, log_level="warning")
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
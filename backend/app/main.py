@@ -1,17 +1,35 @@
+import asyncio
+import logging
+import math
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from app.api.routes import documents, chat, query, api_keys, spaces, stats
-from app.models import init_db
-from app.config import settings
+from app.api.routes import documents, chat, query, retrieve, api_keys, spaces, stats, profiling
+from app.models import init_db, engine, async_engine
+from app.config import settings, ensure_data_dirs
 from app.services.seed import seed_database
+from app.services.warmup import warmup_service
+from app.core.metrics import render_latest
+from app.core.admission import Overloaded
+from app.core.compression import CompressionMiddleware
+from app.core.responses import ORJSONResponse
+from app.core.tracing import TracingMiddleware, tracer
+from app.core.profiling import ProfilingMiddleware, profiler
+from app.core.openrouter import openrouter_client
+from app.services.query_logger import query_log_buffer
+from app.services.reconciler import vector_reconciler
+from app.services.vector_index import IndexLocked
+from app.services.vector_store import vector_store
+
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
 
 limiter = Limiter(key_func=get_remote_address, default_limits=[settings.rate_limit])
 
@@ -26,15 +44,56 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         return response
 
 
+async def run_startup_tasks():
+    await asyncio.to_thread(warmup_service.run)
+    try:
+        await asyncio.to_thread(seed_database)
+    except Exception:
+        logger.warning("Seeding did not complete; serving without demo data")
+
+
+async def run_reconciliation(interval_minutes: float):
+    while True:
+        await asyncio.sleep(interval_minutes * 60)
+        try:
+            await asyncio.to_thread(vector_reconciler.run)
+        except Exception:
+            logger.exception("Vector store reconciliation failed")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    ensure_data_dirs()
     init_db()
-    seed_database()
+    if settings.vector_store_backend == "flat":
+        # The flat index is single-process; fail here rather than corrupt it
+        try:
+            await asyncio.to_thread(vector_store.count)
+        except IndexLocked as e:
+            logger.error(f"{e}. VECTOR_STORE_BACKEND=flat needs a single worker and no CLI writers running")
+            raise
+    if settings.tracing_enabled:
+        tracer.instrument_engine(engine)
+        tracer.instrument_engine(async_engine.sync_engine)
+    startup_task = asyncio.create_task(run_startup_tasks())
+    reconcile_task = None
+    if settings.reconcile_interval_minutes > 0:
+        reconcile_task = asyncio.create_task(run_reconciliation(settings.reconcile_interval_minutes))
     yield
+    if not startup_task.done():
+        startup_task.cancel()
+    if reconcile_task is not None:
+        reconcile_task.cancel()
+    await openrouter_client.aclose()
+    await async_engine.dispose()
+    await asyncio.to_thread(query_log_buffer.shutdown)
+    tracer.shutdown()
+    profiler.configure(enabled=False)
 
 
 app = FastAPI(
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     title="Polidex RAG API",
     description="RAG Admin System for managing knowledge base documents",
     version="0.1.0",
@@ -51,23 +110,56 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
     )
 
 
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilingMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization", "X-API-Key"],
+    allow_headers=["Content-Type", "Authorization", "X-API-Key", "traceparent", "X-Trace-Id"],
+    expose_headers=["X-Trace-Id"],
 )
 
 app.include_router(spaces.router, prefix="/api/spaces", tags=["spaces"])
 app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 app.include_router(query.router, prefix="/api/v1", tags=["external"])
+app.include_router(retrieve.router, prefix="/api/v1", tags=["external"])
 app.include_router(api_keys.router, prefix="/api/api-keys", tags=["api-keys"])
 app.include_router(stats.router, prefix="/api/stats", tags=["stats"])
+app.include_router(profiling.router, prefix="/api/profiling", tags=["profiling"])
 
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    state = warmup_service.state
+    if not state.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "failed" if state.error else "warming_up", "error": state.error},
+        )
+    return {"status": "ready", "warmup_ms": state.phases}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
@@ -1,4 +1,4 @@
-from app.models.database import Base, engine, SessionLocal, get_db
+from app.models.database import Base, engine, SessionLocal, get_db, async_engine, AsyncSessionLocal, get_async_db
 from app.models.space import Space, document_spaces
 from app.models.document import Document, Chunk
 from app.models.api_key import APIKey
@@ -9,6 +9,9 @@ __all__ = [
     "engine",
     "SessionLocal",
     "get_db",
+    "async_engine",
+    "AsyncSessionLocal",
+    "get_async_db",
     "Space",
     "document_spaces",
     "Document",
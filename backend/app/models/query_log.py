@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, DateTime, Integer, Text, ForeignKey, Float
+from sqlalchemy import String, DateTime, Integer, Text, ForeignKey, Float, JSON, Boolean
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.database import Base
@@ -19,4 +19,7 @@ class QueryLog(Base):
     prompt_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     completion_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     cost: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    stage_timings: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    coalesced: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    degraded: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
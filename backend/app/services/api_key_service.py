@@ -1,11 +1,20 @@
+import asyncio
+import hashlib
 import secrets
+import threading
+import time
 from datetime import datetime
 
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 from app.models import APIKey, Space
+from app.config import settings
+from app.core.metrics import record_cache
+from app.core.tracing import tracer
 
 ph = PasswordHasher()
 
@@ -13,6 +22,18 @@ ph = PasswordHasher()
 class APIKeyService:
     PREFIX = "pdx_"
     KEY_LENGTH = 32
+    CACHE_MAX_ENTRIES = 10_000
+
+    def __init__(self, cache_ttl: float = settings.api_key_cache_ttl):
+        # SHA-256 of verified raw keys -> (api_key_id, key_hash, expiry), so
+        # repeat requests skip the Argon2 check. Keys are random 256-bit
+        # tokens, so a fast hash is enough here. The row is still re-read on
+        # every hit and must be active and carry the same Argon2 hash, so a
+        # deleted key whose id is reused by a new one never matches, and
+        # revocations from other workers apply on their next request.
+        self.cache_ttl = cache_ttl
+        self._verified: dict[str, tuple[int, str, float]] = {}
+        self._cache_lock = threading.Lock()
 
     def generate_key(self) -> str:
         return self.PREFIX + secrets.token_hex(self.KEY_LENGTH)
@@ -56,25 +77,71 @@ class APIKeyService:
 
         return api_key, raw_key
 
-    def verify(self, db: Session, raw_key: str) -> APIKey | None:
+    @tracer.traced("api_key_service.verify")
+    async def verify(self, db: AsyncSession, raw_key: str) -> APIKey | None:
+        digest = hashlib.sha256(raw_key.encode()).hexdigest()
+        if self.cache_ttl > 0:
+            cached = self._verified.get(digest)
+            if cached is not None and cached[2] > time.monotonic():
+                api_key = await db.get(APIKey, cached[0])
+                if api_key is not None and api_key.is_active and api_key.key_hash == cached[1]:
+                    record_cache("api_key", hit=True)
+                    return api_key
+                self._forget(digest)
+            record_cache("api_key", hit=False)
+
         key_prefix = self.get_prefix(raw_key)
-        candidates = db.query(APIKey).filter(
-            APIKey.key_prefix == key_prefix,
-            APIKey.is_active == True,
-        ).all()
+        candidates = (await db.scalars(
+            select(APIKey).where(APIKey.key_prefix == key_prefix, APIKey.is_active == True)
+        )).all()
 
         for api_key in candidates:
-            if self.verify_hash(api_key.key_hash, raw_key):
+            # Argon2 is deliberately slow; keep it off the event loop
+            if await asyncio.to_thread(self.verify_hash, api_key.key_hash, raw_key):
                 if ph.check_needs_rehash(api_key.key_hash):
-                    api_key.key_hash = self.hash_key(raw_key)
-                    db.commit()
+                    api_key.key_hash = await asyncio.to_thread(self.hash_key, raw_key)
+                    await db.commit()
+                self._remember(digest, api_key)
                 return api_key
 
         return None
 
-    def update_usage(self, db: Session, api_key: APIKey) -> None:
-        api_key.request_count += 1
-        api_key.last_used_at = datetime.utcnow()
+    def _remember(self, digest: str, api_key: APIKey) -> None:
+        if self.cache_ttl <= 0:
+            return
+        with self._cache_lock:
+            if len(self._verified) >= self.CACHE_MAX_ENTRIES:
+                self._verified.clear()
+            self._verified[digest] = (api_key.id, api_key.key_hash, time.monotonic() + self.cache_ttl)
+
+    def _forget(self, digest: str) -> None:
+        with self._cache_lock:
+            self._verified.pop(digest, None)
+
+    def invalidate(self, api_key_id: int) -> None:
+        self.invalidate_many([api_key_id])
+
+    def invalidate_many(self, api_key_ids: list[int]) -> None:
+        ids = set(api_key_ids)
+        with self._cache_lock:
+            self._verified = {d: v for d, v in self._verified.items() if v[0] not in ids}
+
+    async def update_usage(self, db: AsyncSession, api_key: APIKey, count: int = 1) -> None:
+        await db.execute(
+            update(APIKey)
+            .where(APIKey.id == api_key.id)
+            .values(request_count=APIKey.request_count + count, last_used_at=datetime.utcnow())
+        )
+        await db.commit()
+
+    def add_usage(self, db: Session, counts: dict[int, int], last_used_at: datetime) -> None:
+        """Apply aggregated request counts for many keys without loading them."""
+        for api_key_id, count in counts.items():
+            db.execute(
+                update(APIKey)
+                .where(APIKey.id == api_key_id)
+                .values(request_count=APIKey.request_count + count, last_used_at=last_used_at)
+            )
         db.commit()
 
     def revoke(self, db: Session, api_key_id: int) -> bool:
@@ -83,6 +150,7 @@ class APIKeyService:
             return False
         api_key.is_active = False
         db.commit()
+        self.invalidate(api_key_id)
         return True
 
     def delete(self, db: Session, api_key_id: int) -> bool:
@@ -91,13 +159,20 @@ class APIKeyService:
             return False
         db.delete(api_key)
         db.commit()
+        self.invalidate(api_key_id)
         return True
 
     def list_all(self, db: Session) -> list[APIKey]:
-        return db.query(APIKey).order_by(APIKey.created_at.desc()).all()
+        return db.query(APIKey).options(joinedload(APIKey.space)).order_by(APIKey.created_at.desc()).all()
 
     def list_by_space(self, db: Session, space_id: int) -> list[APIKey]:
-        return db.query(APIKey).filter(APIKey.space_id == space_id).order_by(APIKey.created_at.desc()).all()
+        return (
+            db.query(APIKey)
+            .options(joinedload(APIKey.space))
+            .filter(APIKey.space_id == space_id)
+            .order_by(APIKey.created_at.desc())
+            .all()
+        )
 
 
 api_key_service = APIKeyService()
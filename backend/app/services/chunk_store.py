@@ -0,0 +1,73 @@
+import numpy as np
+from sqlalchemy import Engine, bindparam, select
+
+from app.core.tracing import tracer
+from app.models import engine as default_engine, Chunk
+
+EMBEDDING_DTYPE = np.dtype("<f2")
+
+
+def pack_embeddings(embeddings) -> list[bytes]:
+    """One packed little-endian float16 blob per embedding, for ``Chunk.embedding``."""
+    return [row.tobytes() for row in np.asarray(embeddings, dtype=EMBEDDING_DTYPE)]
+
+
+def unpack_embeddings(blobs: list[bytes]) -> np.ndarray:
+    """Stack packed blobs of equal length into a float32 matrix."""
+    if not blobs:
+        return np.zeros((0, 0), dtype=np.float32)
+    packed = np.frombuffer(b"".join(blobs), dtype=EMBEDDING_DTYPE)
+    return packed.reshape(len(blobs), -1).astype(np.float32)
+
+
+def vector_metadata(
+    document_id: int,
+    filename: str,
+    chunk_index: int,
+    start_char: int,
+    end_char: int,
+    space_ids: str,
+    indexed_at: int,
+) -> dict:
+    return {
+        "document_id": document_id,
+        "filename": filename,
+        "chunk_index": chunk_index,
+        "start_char": start_char,
+        "end_char": end_char,
+        "space_ids": space_ids,
+        "indexed_at": indexed_at,
+    }
+
+
+class ChunkTextStore:
+    """Chunk text, looked up by vector id from the ``chunks`` table.
+
+    SQLite is the only copy of chunk text; the vector stores keep ids,
+    embeddings and metadata. Query results are hydrated with one indexed
+    ``chroma_id IN (...)`` lookup per batch of ids.
+    """
+
+    BATCH = 500
+
+    def __init__(self, engine: Engine | None = None):
+        self.engine = engine or default_engine
+        self._lookup = select(Chunk.chroma_id, Chunk.content).where(Chunk.chroma_id.in_(bindparam("ids", expanding=True)))
+
+    def get(self, ids: list[str]) -> dict[str, str]:
+        texts: dict[str, str] = {}
+        unique = list(dict.fromkeys(ids))
+        with self.engine.connect() as conn:
+            for start in range(0, len(unique), self.BATCH):
+                texts.update(conn.execute(self._lookup, {"ids": unique[start:start + self.BATCH]}).all())
+        return texts
+
+    @tracer.traced("chunk_store.hydrate")
+    def hydrate(self, results: dict) -> dict:
+        """Fill ``documents`` of a multi-query vector store result; ids without a chunk row get ``None``."""
+        texts = self.get([chroma_id for row in results["ids"] for chroma_id in row])
+        results["documents"] = [[texts.get(chroma_id) for chroma_id in row] for row in results["ids"]]
+        return results
+
+
+chunk_texts = ChunkTextStore()
@@ -0,0 +1,189 @@
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.config import settings
+from app.core.metrics import CONTEXT_TOKENS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ContextCandidate:
+    document_id: int
+    filename: str
+    chunk_index: int
+    content: str
+    score: float
+    embedding: list[float] | None = None
+    start_char: int | None = None
+    end_char: int | None = None
+
+
+@dataclass
+class ContextBlock:
+    document_id: int
+    text: str
+    members: list[ContextCandidate] = field(default_factory=list)
+
+
+@dataclass
+class PackedContext:
+    chunks: list[str]
+    sources: list[ContextCandidate]
+    tokens: int
+    tokens_unpacked: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.tokens_unpacked - self.tokens, 0)
+
+
+class ContextPacker:
+    def __init__(
+        self,
+        mmr_lambda: float = settings.context_mmr_lambda,
+        duplicate_threshold: float = settings.context_duplicate_threshold,
+        chars_per_token: float = settings.context_chars_per_token,
+    ):
+        self.mmr_lambda = mmr_lambda
+        self.duplicate_threshold = duplicate_threshold
+        self.chars_per_token = chars_per_token
+
+    def token_budget(self, model: str) -> int:
+        return settings.context_token_budgets.get(model, settings.context_token_budget)
+
+    def estimate_tokens(self, text: str) -> int:
+        return int(len(text) / self.chars_per_token) + 1
+
+    def select(self, query_embedding: list[float], candidates: list[ContextCandidate], k: int) -> list[int]:
+        """Greedy maximal marginal relevance over the candidate embeddings.
+
+        Candidates whose cosine similarity to an already selected one reaches
+        ``duplicate_threshold`` are dropped outright.
+        """
+        if not candidates:
+            return []
+        if any(c.embedding is None for c in candidates):
+            return sorted(range(len(candidates)), key=lambda i: candidates[i].score, reverse=True)[:k]
+
+        vectors = np.asarray([c.embedding for c in candidates], dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) + 1e-12
+
+        relevance = vectors @ query
+        similarity = vectors @ vectors.T
+        available = np.ones(len(candidates), dtype=bool)
+        max_similarity = np.zeros(len(candidates), dtype=np.float32)
+
+        selected: list[int] = []
+        while len(selected) < k and available.any():
+            if selected:
+                scores = self.mmr_lambda * relevance - (1 - self.mmr_lambda) * max_similarity
+            else:
+                scores = relevance.copy()
+            scores[~available] = -np.inf
+            best = int(np.argmax(scores))
+
+            selected.append(best)
+            available[best] = False
+            max_similarity = np.maximum(max_similarity, similarity[best])
+            available &= similarity[best] < self.duplicate_threshold
+
+        return selected
+
+    def merge_adjacent(self, ranked: list[ContextCandidate]) -> list[ContextBlock]:
+        """Merge overlapping or consecutive chunks of the same document into one block.
+
+        Blocks keep the rank of their best member.
+        """
+        by_document: dict[int, list[tuple[int, ContextCandidate]]] = {}
+        for rank, candidate in enumerate(ranked):
+            by_document.setdefault(candidate.document_id, []).append((rank, candidate))
+
+        blocks: list[tuple[int, ContextBlock]] = []
+        for document_id, members in by_document.items():
+            members.sort(key=lambda item: item[1].chunk_index)
+            current_rank, first = members[0]
+            current = ContextBlock(document_id=document_id, text=first.content, members=[first])
+
+            for rank, candidate in members[1:]:
+                previous = current.members[-1]
+                if self._is_adjacent(previous, candidate):
+                    current.text = self._join_overlapping(current.text, candidate.content, previous, candidate)
+                    current.members.append(candidate)
+                    current_rank = min(current_rank, rank)
+                else:
+                    blocks.append((current_rank, current))
+                    current_rank = rank
+                    current = ContextBlock(document_id=document_id, text=candidate.content, members=[candidate])
+            blocks.append((current_rank, current))
+
+        blocks.sort(key=lambda item: item[0])
+        return [block for _, block in blocks]
+
+    def _is_adjacent(self, previous: ContextCandidate, candidate: ContextCandidate) -> bool:
+        if candidate.chunk_index == previous.chunk_index + 1:
+            return True
+        if previous.end_char is None or candidate.start_char is None:
+            return False
+        return candidate.start_char <= previous.end_char
+
+    def _join_overlapping(
+        self,
+        text: str,
+        addition: str,
+        previous: ContextCandidate,
+        candidate: ContextCandidate,
+    ) -> str:
+        overlap = settings.chunk_overlap
+        if previous.end_char is not None and candidate.start_char is not None:
+            overlap = previous.end_char - candidate.start_char
+        for size in range(min(overlap, len(text), len(addition)), max(overlap // 2, 0), -1):
+            if text.endswith(addition[:size]):
+                return text + addition[size:]
+        return f"{text}\n{addition}"
+
+    def pack(
+        self,
+        query_embedding: list[float],
+        candidates: list[ContextCandidate],
+        top_k: int,
+        model: str,
+    ) -> PackedContext:
+        ranked = [candidates[i] for i in self.select(query_embedding, candidates, top_k)]
+        by_score = sorted(candidates, key=lambda c: c.score, reverse=True)[:top_k]
+        tokens_unpacked = sum(self.estimate_tokens(c.content) for c in by_score)
+
+        budget = self.token_budget(model)
+        chunks: list[str] = []
+        sources: list[ContextCandidate] = []
+        used = 0
+
+        for block in self.merge_adjacent(ranked):
+            tokens = self.estimate_tokens(block.text)
+            if used + tokens > budget:
+                if chunks:
+                    continue
+                block.text = block.text[:int(budget * self.chars_per_token)]
+                tokens = self.estimate_tokens(block.text)
+            chunks.append(block.text)
+            sources.extend(block.members)
+            used += tokens
+
+        rank = {id(c): i for i, c in enumerate(ranked)}
+        sources.sort(key=lambda c: rank[id(c)])
+        packed = PackedContext(chunks=chunks, sources=sources, tokens=used, tokens_unpacked=tokens_unpacked)
+
+        CONTEXT_TOKENS.labels(kind="unpacked").inc(tokens_unpacked)
+        CONTEXT_TOKENS.labels(kind="packed").inc(used)
+        logger.info(
+            f"Context packed {len(candidates)} candidates into {len(chunks)} blocks: "
+            f"{used} tokens (budget {budget}), {packed.tokens_saved} saved vs. top-{top_k} join"
+        )
+        return packed
+
+
+context_packer = ContextPacker()
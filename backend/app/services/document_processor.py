@@ -1,8 +1,16 @@
 import hashlib
+import re
 from pathlib import Path
 
-import fitz
-from docx import Document as DocxDocument
+
+def sanitize_filename(filename: str) -> str:
+    name = Path(filename).name
+    name = re.sub(r'[^\w\s\-.]', '', name)
+    name = re.sub(r'\s+', '_', name)
+    if len(name) > 200:
+        ext = Path(name).suffix
+        name = name[:200 - len(ext)] + ext
+    return name or "document"
 
 
 class DocumentProcessor:
@@ -21,6 +29,8 @@ class DocumentProcessor:
             raise ValueError(f"Unsupported file type: {suffix}")
 
     def _extract_pdf(self, file_path: Path) -> str:
+        import fitz
+
         text_parts = []
         with fitz.open(file_path) as doc:
             for page in doc:
@@ -28,6 +38,8 @@ class DocumentProcessor:
         return "\n".join(text_parts)
 
     def _extract_docx(self, file_path: Path) -> str:
+        from docx import Document as DocxDocument
+
         doc = DocxDocument(file_path)
         paragraphs = [para.text for para in doc.paragraphs]
         return "\n".join(paragraphs)
@@ -1,30 +1,104 @@
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import httpx
+import numpy as np
 
 from app.config import settings
+from app.core.metrics import EMBEDDING_BATCH_SIZE
+from app.core.tracing import tracer
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+class EmbeddingServerClient:
+    """Client for ``app.embedding_server``.
+
+    ``url`` is either ``unix:///path/to/socket`` or a plain ``http://host:port``
+    base URL. Embeddings come back as raw little-endian float32 rows.
+    """
+
+    def __init__(self, url: str, timeout: float = settings.embedding_server_timeout):
+        if url.startswith("unix://"):
+            transport = httpx.HTTPTransport(uds=url.removeprefix("unix://"))
+            self._client = httpx.Client(transport=transport, base_url="http://embedding-server", timeout=timeout)
+        else:
+            self._client = httpx.Client(base_url=url, timeout=timeout)
+        self.url = url
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        response = self._client.post("/embed", json={"texts": texts})
+        response.raise_for_status()
+        dimension = int(response.headers["X-Embedding-Dimension"])
+        return np.frombuffer(response.content, dtype="<f4").reshape(-1, dimension)
+
+    def info(self) -> dict:
+        response = self._client.get("/health")
+        response.raise_for_status()
+        return response.json()
 
 
 class EmbeddingService:
-    def __init__(self, model_name: str = settings.embedding_model):
+    """Embeds text with the local SentenceTransformer model, or through the
+    shared embedding server when ``server_url`` is set, so multi-worker
+    deployments hold one copy of the model instead of one per worker."""
+
+    def __init__(self, model_name: str = settings.embedding_model, server_url: str = settings.embedding_server_url):
         self.model_name = model_name
         self._model = None
+        self._model_lock = threading.Lock()
+        self._dimension: int | None = None
+        self.server = EmbeddingServerClient(server_url) if server_url else None
 
     @property
-    def model(self) -> SentenceTransformer:
+    def model(self) -> "SentenceTransformer":
         if self._model is None:
-            self._model = SentenceTransformer(self.model_name)
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    self._model = SentenceTransformer(self.model_name)
         return self._model
 
+    def load(self, timeout: float = settings.embedding_server_timeout) -> None:
+        """Load the model, or wait up to ``timeout`` seconds for the embedding server to answer."""
+        if self.server is None:
+            self.model
+            return
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self._dimension = self.server.info()["dimension"]
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        if self.server is not None:
+            return self.server.encode(texts)
+        EMBEDDING_BATCH_SIZE.observe(len(texts))
+        return self.model.encode(texts, convert_to_numpy=True)
+
+    @tracer.traced("embedding.embed")
     def embed(self, text: str) -> list[float]:
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        return self.encode([text])[0].tolist()
 
+    @tracer.traced("embedding.embed_batch")
     def embed_batch(self, texts: list[str]) -> list[list[float]]:
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
-        return embeddings.tolist()
+        return self.encode(texts).tolist()
 
     @property
     def dimension(self) -> int:
-        return self.model.get_sentence_embedding_dimension()
+        if self._dimension is None:
+            if self.server is not None:
+                self._dimension = self.server.info()["dimension"]
+            else:
+                self._dimension = self.model.get_sentence_embedding_dimension()
+        return self._dimension
 
 
 embedding_service = EmbeddingService()
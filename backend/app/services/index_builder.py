@@ -0,0 +1,147 @@
+import logging
+import time
+from dataclasses import dataclass, asdict
+
+from sqlalchemy import bindparam, select, update
+
+from app.models import SessionLocal, Chunk, Document, document_spaces
+from app.services.chunk_store import pack_embeddings, unpack_embeddings, vector_metadata
+from app.services.reconciler import space_label
+from app.services.vector_backends import VectorStoreBackend
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BuildReport:
+    chunks: int = 0
+    written: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.written / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "chunks_per_second": round(self.chunks_per_second, 1)}
+
+
+class IndexBuilder:
+    """Moves embeddings between ``Chunk.embedding`` and a vector store backend.
+
+    ``rebuild`` streams the stored embeddings into a backend in large
+    batches, so a lost or switched index comes back without running the
+    embedding model. With ``reset`` it writes to the backend's staging
+    store and promotes it at the end, so backends that support it keep
+    serving the old index during the rebuild. ``backfill`` copies vectors the other way, for chunks
+    ingested before embeddings were kept in SQLite.
+    """
+
+    def __init__(self, batch_size: int = 5000, session_factory=SessionLocal):
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+
+    def rebuild(self, backend: VectorStoreBackend, reset: bool = True) -> BuildReport:
+        report = BuildReport()
+        started = time.perf_counter()
+        target = backend.staging() if reset else backend
+        indexed_at = int(time.time())
+
+        with self.session_factory() as db:
+            after = 0
+            while True:
+                page = db.execute(
+                    select(
+                        Chunk.id, Chunk.chroma_id, Chunk.document_id, Chunk.chunk_index,
+                        Chunk.start_char, Chunk.end_char, Chunk.embedding, Document.filename,
+                    )
+                    .join(Document, Document.id == Chunk.document_id)
+                    .where(Chunk.id > after)
+                    .order_by(Chunk.id)
+                    .limit(self.batch_size)
+                ).all()
+                if not page:
+                    break
+                after = page[-1].id
+                report.chunks += len(page)
+
+                rows = [r for r in page if r.embedding is not None]
+                report.skipped += len(page) - len(rows)
+                if not rows:
+                    continue
+
+                spaces = self._space_labels(db, {r.document_id for r in rows})
+                target.add(
+                    [r.chroma_id for r in rows],
+                    unpack_embeddings([r.embedding for r in rows]),
+                    [
+                        vector_metadata(
+                            r.document_id, r.filename, r.chunk_index, r.start_char, r.end_char,
+                            spaces.get(r.document_id, ""), indexed_at,
+                        )
+                        for r in rows
+                    ],
+                )
+                report.written += len(rows)
+
+        if reset:
+            backend.promote(target)
+        report.seconds = time.perf_counter() - started
+        logger.info(
+            f"Rebuilt {backend.name} index with {report.written} chunks in {report.seconds:.1f}s "
+            f"({report.chunks_per_second:.0f} chunks/s), {report.skipped} without a stored embedding"
+        )
+        return report
+
+    def backfill(self, backend: VectorStoreBackend) -> BuildReport:
+        report = BuildReport()
+        started = time.perf_counter()
+        statement = (
+            update(Chunk)
+            .where(Chunk.id == bindparam("chunk_id"))
+            .values(embedding=bindparam("blob"))
+        )
+
+        with self.session_factory() as db:
+            after = 0
+            while True:
+                page = db.execute(
+                    select(Chunk.id, Chunk.chroma_id)
+                    .where(Chunk.id > after, Chunk.embedding.is_(None))
+                    .order_by(Chunk.id)
+                    .limit(self.batch_size)
+                ).all()
+                if not page:
+                    break
+                after = page[-1].id
+                report.chunks += len(page)
+
+                found = backend.get_embeddings([r.chroma_id for r in page])
+                rows = [r for r in page if r.chroma_id in found]
+                report.skipped += len(page) - len(rows)
+                if not rows:
+                    continue
+
+                blobs = pack_embeddings([found[r.chroma_id] for r in rows])
+                db.connection().execute(
+                    statement, [{"chunk_id": r.id, "blob": blob} for r, blob in zip(rows, blobs)]
+                )
+                db.commit()
+                report.written += len(rows)
+
+        report.seconds = time.perf_counter() - started
+        logger.info(
+            f"Backfilled {report.written} chunk embeddings from {backend.name} in {report.seconds:.1f}s, "
+            f"{report.skipped} not found in the vector store"
+        )
+        return report
+
+    def _space_labels(self, db, document_ids: set[int]) -> dict[int, str]:
+        spaces: dict[int, list[int]] = {}
+        for document_id, space_id in db.execute(
+            select(document_spaces.c.document_id, document_spaces.c.space_id)
+            .where(document_spaces.c.document_id.in_(list(document_ids)))
+        ):
+            spaces.setdefault(document_id, []).append(space_id)
+        return {document_id: space_label(ids) for document_id, ids in spaces.items()}
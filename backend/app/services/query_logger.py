@@ -1,9 +1,35 @@
+import logging
+import threading
 import time
+from collections import Counter
 from contextlib import contextmanager
+from datetime import datetime
 
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.models import QueryLog
+from app.models import QueryLog, SessionLocal
+from app.config import settings
+from app.core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimings:
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name: str, ms: float) -> None:
+        self.stages[name] = round(self.stages.get(name, 0.0) + ms, 3)
 
 
 class QueryLogger:
@@ -12,9 +38,10 @@ class QueryLogger:
         start = time.perf_counter()
         yield lambda: (time.perf_counter() - start) * 1000
 
-    def log(
+    @tracer.traced("query_logger.log")
+    async def log(
         self,
-        db: Session,
+        db: AsyncSession,
         query_text: str,
         response_text: str,
         chunks_retrieved: int,
@@ -25,6 +52,9 @@ class QueryLogger:
         prompt_tokens: int = 0,
         completion_tokens: int = 0,
         cost: float = 0.0,
+        stage_timings: dict[str, float] | None = None,
+        coalesced: bool = False,
+        degraded: bool = False,
     ) -> QueryLog:
         log_entry = QueryLog(
             api_key_id=api_key_id,
@@ -37,32 +67,126 @@ class QueryLogger:
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             cost=cost,
+            stage_timings=dict(stage_timings) if stage_timings else None,
+            coalesced=coalesced,
+            degraded=degraded,
         )
         db.add(log_entry)
-        db.commit()
-        db.refresh(log_entry)
+        await db.commit()
         return log_entry
 
-    def get_recent(self, db: Session, limit: int = 100) -> list[QueryLog]:
-        return (
-            db.query(QueryLog)
+    @tracer.traced("query_logger.log_many")
+    def log_many(self, db: Session, entries: list[dict]) -> None:
+        """Insert many log rows in one executemany; ``entries`` take the same fields as ``log``."""
+        if not entries:
+            return
+        db.execute(insert(QueryLog), self._rows(entries))
+        db.commit()
+
+    @tracer.traced("query_logger.log_many")
+    async def log_many_async(self, db: AsyncSession, entries: list[dict]) -> None:
+        """``log_many`` for request handlers holding an ``AsyncSession``."""
+        if not entries:
+            return
+        await db.execute(insert(QueryLog), self._rows(entries))
+        await db.commit()
+
+    def _rows(self, entries: list[dict]) -> list[dict]:
+        return [{"degraded": False, "coalesced": False, **entry} for entry in entries]
+
+    def get_recent(self, db: Session, fields: list[str], limit: int = 100, offset: int = 0) -> list[dict]:
+        """Newest log rows as dicts of the ``QueryLog`` columns named in ``fields``."""
+        rows = db.execute(
+            select(*[getattr(QueryLog, name) for name in fields])
             .order_by(QueryLog.created_at.desc())
+            .offset(offset)
             .limit(limit)
-            .all()
-        )
+        ).mappings()
+        return [dict(row) for row in rows]
 
     def get_stats(self, db: Session) -> dict:
         from sqlalchemy import func
 
-        total = db.query(func.count(QueryLog.id)).scalar() or 0
-        avg_latency = db.query(func.avg(QueryLog.latency_ms)).scalar() or 0
-        avg_chunks = db.query(func.avg(QueryLog.chunks_retrieved)).scalar() or 0
+        total, avg_latency, avg_chunks = db.query(
+            func.count(QueryLog.id),
+            func.avg(QueryLog.latency_ms),
+            func.avg(QueryLog.chunks_retrieved),
+        ).one()
 
         return {
-            "total_queries": total,
-            "avg_latency_ms": round(avg_latency, 2),
-            "avg_chunks_retrieved": round(avg_chunks, 2),
+            "total_queries": total or 0,
+            "avg_latency_ms": round(avg_latency or 0, 2),
+            "avg_chunks_retrieved": round(avg_chunks or 0, 2),
         }
 
 
+class QueryLogBuffer:
+    """Collects query log rows and API key usage off the request path.
+
+    A background thread writes them in batches every ``flush_interval``
+    seconds, or sooner once ``max_rows`` are pending. Rows still buffered
+    when the process dies are lost, so this is for high-volume endpoints
+    where per-request commits would dominate latency.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = settings.log_buffer_flush_interval,
+        max_rows: int = settings.log_buffer_max_rows,
+    ):
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self._rows: list[dict] = []
+        self._usage: Counter = Counter()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, entry: dict) -> None:
+        with self._lock:
+            self._rows.append(entry)
+            if entry.get("api_key_id") is not None:
+                self._usage[entry["api_key_id"]] += 1
+            pending = len(self._rows)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="query-log-buffer", daemon=True)
+                self._thread.start()
+        if pending >= self.max_rows:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        from app.services.api_key_service import api_key_service
+
+        with self._lock:
+            rows, self._rows = self._rows, []
+            usage, self._usage = self._usage, Counter()
+        if not rows:
+            return
+
+        db = SessionLocal()
+        try:
+            query_logger.log_many(db, rows)
+            api_key_service.add_usage(db, usage, last_used_at=datetime.utcnow())
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Dropped {len(rows)} buffered query log rows: {e}")
+        finally:
+            db.close()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+
 query_logger = QueryLogger()
+query_log_buffer = QueryLogBuffer()
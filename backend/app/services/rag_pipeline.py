@@ -1,5 +1,7 @@
+import asyncio
+import time
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
 
 from sqlalchemy.orm import Session
@@ -9,7 +11,16 @@ from app.services.document_processor import document_processor
 from app.services.chunker import text_chunker
 from app.services.embedder import embedding_service
 from app.services.vector_store import vector_store
+from app.services.query_logger import StageTimings
+from app.services.context_packer import context_packer, ContextCandidate
+from app.services.chunk_store import pack_embeddings, vector_metadata
+from app.services.single_flight import SingleFlight
+from app.config import settings
 from app.core.openrouter import openrouter_client
+from app.core.deadline import Deadline, DeadlineExceeded
+from app.core.admission import admission
+from app.core.metrics import INGESTED_DOCUMENTS, INGESTED_CHUNKS, INGESTION_STAGE_LATENCY, DEADLINE_OUTCOMES, record_cache
+from app.core.tracing import tracer
 
 
 @dataclass
@@ -30,19 +41,41 @@ class RAGResponse:
     prompt_tokens: int = 0
     completion_tokens: int = 0
     cost: float = 0.0
+    coalesced: bool = False
+    degraded: bool = False
+
+
+@dataclass
+class BatchQuery:
+    query_text: str
+    top_k: int = 5
+    system_prompt: str | None = None
+
+
+DEGRADED_ANSWER = (
+    "An answer could not be generated within the requested time. "
+    "The most relevant sources from the knowledge base are included."
+)
 
 
 class RAGPipeline:
-    def process_document(self, document: Document, db: Session) -> int:
+    def __init__(self):
+        self._single_flight = SingleFlight()
+
+    @tracer.traced("rag.process_document")
+    def process_document(self, document: Document, db: Session, commit: bool = True) -> int:
         file_path = Path(document.file_path)
-        text = document_processor.extract_text(file_path)
-        chunks = text_chunker.chunk(text)
+        with INGESTION_STAGE_LATENCY.labels(stage="extract").time():
+            text = document_processor.extract_text(file_path)
+        with INGESTION_STAGE_LATENCY.labels(stage="chunk").time():
+            chunks = text_chunker.chunk(text)
 
         if not chunks:
             return 0
 
         chunk_contents = [c.content for c in chunks]
-        embeddings = embedding_service.embed_batch(chunk_contents)
+        with INGESTION_STAGE_LATENCY.labels(stage="embed").time():
+            embeddings = embedding_service.embed_batch(chunk_contents)
 
         space_ids = ",".join(str(s.id) for s in document.spaces)
 
@@ -50,16 +83,15 @@ class RAGPipeline:
         chroma_metadatas = []
         db_chunks = []
 
-        for chunk, embedding in zip(chunks, embeddings):
+        packed = pack_embeddings(embeddings)
+        for chunk, embedding in zip(chunks, packed):
             chroma_id = f"doc-{document.id}-chunk-{chunk.index}-{uuid.uuid4().hex[:8]}"
             chroma_ids.append(chroma_id)
 
-            chroma_metadatas.append({
-                "document_id": document.id,
-                "filename": document.filename,
-                "chunk_index": chunk.index,
-                "space_ids": space_ids,
-            })
+            chroma_metadatas.append(vector_metadata(
+                document.id, document.filename, chunk.index, chunk.start_char, chunk.end_char,
+                space_ids, int(time.time()),
+            ))
 
             db_chunk = Chunk(
                 document_id=document.id,
@@ -68,20 +100,26 @@ class RAGPipeline:
                 start_char=chunk.start_char,
                 end_char=chunk.end_char,
                 chroma_id=chroma_id,
+                embedding=embedding,
             )
             db_chunks.append(db_chunk)
 
-        vector_store.add_chunks(
-            ids=chroma_ids,
-            embeddings=embeddings,
-            documents=chunk_contents,
-            metadatas=chroma_metadatas,
-        )
+        with INGESTION_STAGE_LATENCY.labels(stage="store").time():
+            vector_store.add_chunks(
+                ids=chroma_ids,
+                embeddings=embeddings,
+                metadatas=chroma_metadatas,
+            )
 
-        db.add_all(db_chunks)
-        document.chunk_count = len(chunks)
-        db.commit()
+            db.add_all(db_chunks)
+            document.chunk_count = len(chunks)
+            if commit:
+                db.commit()
+            else:
+                db.flush()
 
+        INGESTED_DOCUMENTS.inc()
+        INGESTED_CHUNKS.inc(len(chunks))
         return len(chunks)
 
     def delete_document_chunks(self, document: Document, db: Session) -> None:
@@ -90,6 +128,34 @@ class RAGPipeline:
         document.chunk_count = 0
         db.commit()
 
+    def _space_candidates(self, results: dict, space_id: int) -> list[ContextCandidate]:
+        if not results["documents"] or not results["documents"][0]:
+            return []
+
+        documents = results["documents"][0]
+        metadatas = results["metadatas"][0]
+        distances = results["distances"][0]
+        embeddings = results.get("embeddings")
+        embeddings = embeddings[0] if embeddings is not None else [None] * len(documents)
+
+        space_id_str = str(space_id)
+        candidates = []
+        for doc, meta, dist, embedding in zip(documents, metadatas, distances, embeddings):
+            if doc is None or space_id_str not in meta["space_ids"].split(","):
+                continue
+            candidates.append(ContextCandidate(
+                document_id=meta["document_id"],
+                filename=meta["filename"],
+                chunk_index=meta["chunk_index"],
+                content=doc,
+                score=1 - dist,
+                embedding=embedding,
+                start_char=meta.get("start_char"),
+                end_char=meta.get("end_char"),
+            ))
+        return candidates
+
+    @tracer.traced("rag.query")
     async def query(
         self,
         query_text: str,
@@ -97,55 +163,215 @@ class RAGPipeline:
         top_k: int = 5,
         model: str | None = None,
         system_prompt: str | None = None,
+        timings: StageTimings | None = None,
+        deadline: Deadline | None = None,
     ) -> RAGResponse:
-        query_embedding = embedding_service.embed(query_text)
+        """Answer a query from the space's documents.
+
+        With a ``deadline``, generation is skipped (or abandoned) when the
+        remaining budget can't cover it and the sources are returned with
+        ``degraded=True``. ``DeadlineExceeded`` is raised only if the budget
+        runs out before retrieval. ``Overloaded`` is raised when a stage's
+        wait queue is full or its expected wait is too long.
+
+        Queries with a deadline are never coalesced: each has to degrade on
+        its own budget, and a shared flight would carry the leader's.
+        """
+        timings = timings or StageTimings()
+        model = model or openrouter_client.default_model
+
+        if not settings.query_coalescing_enabled or deadline is not None:
+            return await self._query(query_text, space_id, top_k, model, system_prompt, timings, deadline)
 
-        results = vector_store.query(
-            query_embedding=query_embedding,
-            n_results=top_k * 3,
+        key = (space_id, " ".join(query_text.lower().split()), top_k, model, system_prompt)
+        start = time.perf_counter()
+        result, shared = await self._single_flight.do(
+            key,
+            lambda: self._query(query_text, space_id, top_k, model, system_prompt, timings),
         )
+        record_cache("single_flight", hit=shared)
+        if not shared:
+            return result
 
-        sources = []
-        context_chunks = []
-        space_id_str = str(space_id)
+        timings.add("coalesced", (time.perf_counter() - start) * 1000)
+        return replace(result, coalesced=True, prompt_tokens=0, completion_tokens=0, cost=0.0)
+
+    async def _query(
+        self,
+        query_text: str,
+        space_id: int,
+        top_k: int,
+        model: str,
+        system_prompt: str | None,
+        timings: StageTimings,
+        deadline: Deadline | None = None,
+    ) -> RAGResponse:
+        self._check_deadline(deadline, "embedding")
+        async with admission.embed.slot():
+            with timings.stage("embed"):
+                query_embedding = await asyncio.to_thread(embedding_service.embed, query_text)
+
+        self._check_deadline(deadline, "retrieval")
+        async with admission.search.slot():
+            with timings.stage("retrieve"):
+                results = await asyncio.to_thread(
+                    vector_store.query,
+                    query_embedding=query_embedding,
+                    n_results=top_k * 3,
+                    include_embeddings=True,
+                    space_id=space_id,
+                )
+
+        return await self._answer(
+            query_text, query_embedding, results, space_id, top_k, model, system_prompt, timings, deadline
+        )
+
+    @tracer.traced("rag.retrieve")
+    def retrieve(
+        self,
+        query_text: str,
+        space_id: int,
+        top_k: int = 5,
+        timings: StageTimings | None = None,
+    ) -> list[ContextCandidate]:
+        """Search only: the space's ``top_k`` best-scoring chunks, no packing or generation."""
+        timings = timings or StageTimings()
+        with timings.stage("embed"):
+            query_embedding = embedding_service.embed(query_text)
+
+        with timings.stage("retrieve"):
+            results = vector_store.query(query_embedding=query_embedding, n_results=top_k * 3, space_id=space_id)
 
-        if results["documents"] and results["documents"][0]:
-            documents = results["documents"][0]
-            metadatas = results["metadatas"][0]
-            distances = results["distances"][0]
-
-            for doc, meta, dist in zip(documents, metadatas, distances):
-                space_ids_list = meta["space_ids"].split(",")
-                if space_id_str not in space_ids_list:
-                    continue
-
-                if len(sources) >= top_k:
-                    break
-
-                score = 1 - dist
-                sources.append(Source(
-                    document_id=meta["document_id"],
-                    filename=meta["filename"],
-                    chunk_index=meta["chunk_index"],
-                    content=doc,
-                    score=score,
-                ))
-                context_chunks.append(doc)
+        with timings.stage("filter"):
+            candidates = self._space_candidates(results, space_id)
+        return candidates[:top_k]
+
+    async def query_batch(
+        self,
+        queries: list[BatchQuery],
+        space_id: int,
+        model: str | None = None,
+        timings: StageTimings | None = None,
+        deadline: Deadline | None = None,
+    ) -> tuple[list[RAGResponse | Exception], list[StageTimings], list[float]]:
+        """Answer many queries against one space with shared embedding and retrieval.
+
+        All queries are embedded in one batch and searched in one vector store
+        call; generations run with at most ``batch_llm_concurrency`` in flight.
+        Returns per-query results in input order, with the exception in place
+        of a result for queries whose generation failed, per-query stage
+        timings (shared stages are copied from ``timings``) and per-query
+        latencies in milliseconds, from the start of the batch until that
+        query's answer was ready.
+        """
+        started = time.perf_counter()
+        timings = timings or StageTimings()
+        model = model or openrouter_client.default_model
+
+        self._check_deadline(deadline, "embedding")
+        async with admission.embed.slot():
+            with timings.stage("embed"):
+                query_embeddings = await asyncio.to_thread(
+                    embedding_service.embed_batch, [q.query_text for q in queries]
+                )
+
+        self._check_deadline(deadline, "retrieval")
+        n_results = max(q.top_k for q in queries) * 3
+        async with admission.search.slot():
+            with timings.stage("retrieve"):
+                results = await asyncio.to_thread(
+                    vector_store.query_batch,
+                    query_embeddings=query_embeddings,
+                    n_results=n_results,
+                    include_embeddings=True,
+                    space_id=space_id,
+                )
+
+        semaphore = asyncio.Semaphore(settings.batch_llm_concurrency)
+        item_timings = [StageTimings() for _ in queries]
+        latencies = [0.0] * len(queries)
+
+        async def answer(i: int, query: BatchQuery) -> RAGResponse:
+            item_timings[i].stages.update(timings.stages)
+            row = self._result_row(results, i, query.top_k * 3)
+            try:
+                async with semaphore:
+                    return await self._answer(
+                        query.query_text, query_embeddings[i], row, space_id, query.top_k,
+                        model, query.system_prompt, item_timings[i], deadline,
+                    )
+            finally:
+                latencies[i] = (time.perf_counter() - started) * 1000
+
+        answers = await asyncio.gather(
+            *(answer(i, query) for i, query in enumerate(queries)),
+            return_exceptions=True,
+        )
+        return list(answers), item_timings, latencies
+
+    def _result_row(self, results: dict, i: int, n: int) -> dict:
+        """The ``i``-th query of a multi-query result, in single-query shape and cut to ``n`` hits."""
+        embeddings = results.get("embeddings")
+        return {
+            "documents": [results["documents"][i][:n]],
+            "metadatas": [results["metadatas"][i][:n]],
+            "distances": [results["distances"][i][:n]],
+            "embeddings": [embeddings[i][:n]] if embeddings is not None else None,
+        }
+
+    async def _answer(
+        self,
+        query_text: str,
+        query_embedding: list[float],
+        results: dict,
+        space_id: int,
+        top_k: int,
+        model: str,
+        system_prompt: str | None,
+        timings: StageTimings,
+        deadline: Deadline | None,
+    ) -> RAGResponse:
+        with timings.stage("filter"):
+            candidates = self._space_candidates(results, space_id)
+
+        with timings.stage("pack"):
+            packed = context_packer.pack(query_embedding, candidates, top_k, model)
+
+        sources = [
+            Source(
+                document_id=c.document_id,
+                filename=c.filename,
+                chunk_index=c.chunk_index,
+                content=c.content,
+                score=c.score,
+            )
+            for c in packed.sources
+        ]
+        context_chunks = packed.chunks
 
         if not context_chunks:
             return RAGResponse(
                 answer="I couldn't find any relevant information in the knowledge base to answer your question.",
                 sources=[],
-                model=model or openrouter_client.default_model,
+                model=model,
                 chunks_retrieved=0,
             )
 
-        response = await openrouter_client.generate_rag_response(
-            query=query_text,
-            context_chunks=context_chunks,
-            model=model,
-            custom_system_prompt=system_prompt,
-        )
+        if deadline is not None and deadline.remaining() * 1000 < settings.query_min_generation_ms:
+            return self._degraded(sources, model)
+
+        try:
+            async with admission.llm.slot():
+                with timings.stage("llm"):
+                    response = await openrouter_client.generate_rag_response(
+                        query=query_text,
+                        context_chunks=context_chunks,
+                        model=model,
+                        custom_system_prompt=system_prompt,
+                        deadline=deadline,
+                    )
+        except DeadlineExceeded:
+            return self._degraded(sources, model)
 
         usage = response.usage
         return RAGResponse(
@@ -158,5 +384,20 @@ class RAGPipeline:
             cost=usage.get("total_cost", 0.0) or usage.get("cost", 0.0),
         )
 
+    def _check_deadline(self, deadline: Deadline | None, stage: str) -> None:
+        if deadline is not None and deadline.expired:
+            DEADLINE_OUTCOMES.labels(outcome="exceeded").inc()
+            raise DeadlineExceeded(f"Deadline exceeded before {stage}")
+
+    def _degraded(self, sources: list[Source], model: str) -> RAGResponse:
+        DEADLINE_OUTCOMES.labels(outcome="degraded").inc()
+        return RAGResponse(
+            answer=DEGRADED_ANSWER,
+            sources=sources,
+            model=model,
+            chunks_retrieved=len(sources),
+            degraded=True,
+        )
+
 
 rag_pipeline = RAGPipeline()
@@ -0,0 +1,241 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, asdict
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, undefer
+
+from app.config import settings
+from app.core.metrics import VECTOR_DRIFT, RECONCILE_RUNS
+from app.models import SessionLocal, Chunk, document_spaces
+from app.services.chunk_store import pack_embeddings, unpack_embeddings, vector_metadata
+from app.services.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReconcileReport:
+    vectors_scanned: int = 0
+    chunks_scanned: int = 0
+    orphan_vectors: int = 0
+    orphan_vectors_pending: int = 0
+    stale_metadata: int = 0
+    missing_vectors: int = 0
+    deleted_vectors: int = 0
+    rewritten_metadata: int = 0
+    restored_vectors: int = 0
+    dry_run: bool = False
+    took_ms: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def space_label(space_ids) -> str:
+    return ",".join(str(s) for s in sorted(space_ids))
+
+
+def normalize_label(label) -> str:
+    return space_label(int(s) for s in str(label).split(",") if s)
+
+
+class VectorReconciler:
+    """Brings the vector store back in line with the ``chunks`` table.
+
+    Pass one pages through the vector store and looks each page's ids up in
+    SQLite: vectors without a ``Chunk`` row are orphans, and vectors whose
+    ``space_ids`` no longer match ``document_spaces`` carry stale metadata.
+    Pass two pages through ``chunks`` and asks the store which ids exist, to
+    find chunks whose vectors were lost. Vectors indexed less than
+    ``grace_seconds`` ago are never treated as orphans, since ingestion writes
+    them before the chunk rows are committed.
+    """
+
+    def __init__(
+        self,
+        page_size: int = settings.reconcile_page_size,
+        grace_seconds: int = settings.reconcile_grace_seconds,
+    ):
+        self.page_size = page_size
+        self.grace_seconds = grace_seconds
+        self._run_lock = threading.Lock()
+
+    def run(self, dry_run: bool = False, restore: bool = False) -> ReconcileReport:
+        with self._run_lock:
+            started = time.perf_counter()
+            report = ReconcileReport(dry_run=dry_run)
+            db = SessionLocal()
+            try:
+                orphans, stale = self._scan_vectors(db, report)
+                missing = self._scan_chunks(db, report)
+                if not dry_run:
+                    self._delete(orphans, report)
+                    self._rewrite(db, stale, report)
+                    if restore and missing:
+                        self._restore(db, missing, report)
+            except Exception:
+                RECONCILE_RUNS.labels(outcome="error").inc()
+                raise
+            finally:
+                db.close()
+
+            report.took_ms = (time.perf_counter() - started) * 1000
+            for kind in ("orphan_vectors", "orphan_vectors_pending", "stale_metadata", "missing_vectors"):
+                VECTOR_DRIFT.labels(kind=kind).set(getattr(report, kind))
+            RECONCILE_RUNS.labels(outcome="dry_run" if dry_run else "ok").inc()
+            logger.info(
+                f"Reconciled {report.vectors_scanned} vectors against {report.chunks_scanned} chunks in "
+                f"{report.took_ms:.0f}ms: {report.orphan_vectors} orphaned ({report.orphan_vectors_pending} "
+                f"within grace), {report.stale_metadata} stale, {report.missing_vectors} missing"
+                + (" (dry run)" if dry_run else "")
+            )
+            return report
+
+    def sync_documents(self, db: Session, document_ids: list[int]) -> int:
+        """Rewrite the space metadata of every vector of ``document_ids`` from ``document_spaces``."""
+        if not document_ids:
+            return 0
+        spaces = self._spaces_for(db, document_ids)
+        ids, metadatas = [], []
+        for document_id in document_ids:
+            label = space_label(spaces[document_id])
+            stored = vector_store.get_by_document_id(document_id)
+            for chroma_id, metadata in zip(stored["ids"], stored["metadatas"]):
+                if normalize_label(metadata.get("space_ids", "")) != label:
+                    ids.append(chroma_id)
+                    metadatas.append({**metadata, "space_ids": label})
+        for start in range(0, len(ids), self.page_size):
+            vector_store.update_metadatas(ids[start:start + self.page_size], metadatas[start:start + self.page_size])
+        return len(ids)
+
+    def _scan_vectors(self, db: Session, report: ReconcileReport) -> tuple[list[str], list[str]]:
+        """Ids of orphaned vectors and of vectors with stale metadata; ``_rewrite``
+        rebuilds the metadata from the chunk rows, so none is held here."""
+        orphans: list[str] = []
+        stale: list[str] = []
+        cutoff = time.time() - self.grace_seconds
+
+        for ids, metadatas in vector_store.scan(self.page_size):
+            report.vectors_scanned += len(ids)
+            known = dict(db.execute(
+                select(Chunk.chroma_id, Chunk.document_id).where(Chunk.chroma_id.in_(ids))
+            ).all())
+            spaces = self._spaces_for(db, set(known.values()))
+
+            for chroma_id, metadata in zip(ids, metadatas):
+                document_id = known.get(chroma_id)
+                if document_id is None:
+                    if metadata.get("indexed_at", 0) > cutoff:
+                        report.orphan_vectors_pending += 1
+                    else:
+                        orphans.append(chroma_id)
+                    continue
+                label = space_label(spaces.get(document_id, ()))
+                if label != normalize_label(metadata.get("space_ids", "")) or metadata.get("document_id") != document_id:
+                    stale.append(chroma_id)
+
+        report.orphan_vectors = len(orphans)
+        report.stale_metadata = len(stale)
+        return orphans, stale
+
+    def _scan_chunks(self, db: Session, report: ReconcileReport) -> list[int]:
+        missing: list[int] = []
+        after = 0
+        while True:
+            page = db.execute(
+                select(Chunk.id, Chunk.chroma_id).where(Chunk.id > after).order_by(Chunk.id).limit(self.page_size)
+            ).all()
+            if not page:
+                break
+            after = page[-1][0]
+            report.chunks_scanned += len(page)
+            present = vector_store.existing_ids([chroma_id for _, chroma_id in page])
+            missing.extend(chunk_id for chunk_id, chroma_id in page if chroma_id not in present)
+
+        report.missing_vectors = len(missing)
+        return missing
+
+    def _spaces_for(self, db: Session, document_ids) -> dict[int, set[int]]:
+        spaces: dict[int, set[int]] = {document_id: set() for document_id in document_ids}
+        if not spaces:
+            return spaces
+        rows = db.execute(
+            select(document_spaces.c.document_id, document_spaces.c.space_id)
+            .where(document_spaces.c.document_id.in_(list(spaces)))
+        ).all()
+        for document_id, space_id in rows:
+            spaces[document_id].add(space_id)
+        return spaces
+
+    def _delete(self, orphans: list[str], report: ReconcileReport) -> None:
+        for start in range(0, len(orphans), self.page_size):
+            batch = orphans[start:start + self.page_size]
+            vector_store.delete_ids(batch)
+            report.deleted_vectors += len(batch)
+
+    def _rewrite(self, db: Session, stale: list[str], report: ReconcileReport) -> None:
+        indexed_at = int(time.time())
+        for start in range(0, len(stale), self.page_size):
+            chunks = (
+                db.query(Chunk)
+                .options(joinedload(Chunk.document))
+                .filter(Chunk.chroma_id.in_(stale[start:start + self.page_size]))
+                .all()
+            )
+            spaces = self._spaces_for(db, {c.document_id for c in chunks})
+            vector_store.update_metadatas(
+                [c.chroma_id for c in chunks],
+                [
+                    vector_metadata(
+                        c.document_id, c.document.filename, c.chunk_index, c.start_char, c.end_char,
+                        space_label(spaces[c.document_id]), indexed_at,
+                    )
+                    for c in chunks
+                ],
+            )
+            report.rewritten_metadata += len(chunks)
+            db.expunge_all()
+
+    def _restore(self, db: Session, missing: list[int], report: ReconcileReport) -> None:
+        """Re-add vectors for chunks whose vectors are gone, from the stored
+        embedding when there is one and by re-embedding the text otherwise."""
+        from app.services.embedder import embedding_service
+
+        indexed_at = int(time.time())
+        for start in range(0, len(missing), self.page_size):
+            chunks = (
+                db.query(Chunk)
+                .options(undefer(Chunk.embedding), joinedload(Chunk.document))
+                .filter(Chunk.id.in_(missing[start:start + self.page_size]))
+                .all()
+            )
+            spaces = self._spaces_for(db, {c.document_id for c in chunks})
+            stored = [c for c in chunks if c.embedding is not None]
+            unstored = [c for c in chunks if c.embedding is None]
+            batches = [(stored, unpack_embeddings([c.embedding for c in stored]))]
+            if unstored:
+                embeddings = embedding_service.embed_batch([c.content for c in unstored])
+                for chunk, blob in zip(unstored, pack_embeddings(embeddings)):
+                    chunk.embedding = blob
+                db.commit()
+                batches.append((unstored, embeddings))
+
+            for batch, embeddings in batches:
+                if not batch:
+                    continue
+                vector_store.add_chunks(
+                    ids=[c.chroma_id for c in batch],
+                    embeddings=embeddings,
+                    metadatas=[
+                        vector_metadata(
+                            c.document_id, c.document.filename, c.chunk_index, c.start_char, c.end_char,
+                            space_label(spaces[c.document_id]), indexed_at,
+                        )
+                        for c in batch
+                    ],
+                )
+                report.restored_vectors += len(batch)
+
+vector_reconciler = VectorReconciler()
@@ -1,99 +1,91 @@
 import hashlib
+import logging
 import shutil
-import uuid
 from pathlib import Path
 
-from app.models import Space, Document, Chunk, engine
+from app.models import Space, Document, SessionLocal
 from app.config import UPLOAD_DIR
-from app.services.chunker import text_chunker
-from app.services.embedder import embedding_service
+from app.services.document_processor import document_processor
+from app.services.rag_pipeline import rag_pipeline
 from app.services.vector_store import vector_store
 
-SEED_DIR = Path(__file__).parent.parent.parent / "seed_data"
-
-
-def seed_database():
-    from sqlalchemy.orm import sessionmaker
-    SessionLocal = sessionmaker(bind=engine)
-    db = SessionLocal()
-
-    try:
-        existing = db.query(Space).filter(Space.name == "Polidex Documentation").first()
-        if existing:
-            return
-
-        space = Space(name="Polidex Documentation", description="Official documentation and guides for Polidex")
-        db.add(space)
-        db.commit()
-        db.refresh(space)
-
-        if not SEED_DIR.exists():
-            return
-
-        for filepath in SEED_DIR.glob("*.md"):
-            content = filepath.read_text()
-            filename = filepath.name
-            content_bytes = content.encode()
-            content_hash = hashlib.sha256(content_bytes).hexdigest()
+logger = logging.getLogger(__name__)
 
-            dest_path = UPLOAD_DIR / f"{content_hash}_{filename}"
-            shutil.copy(filepath, dest_path)
-
-            doc = Document(
-                filename=filename,
-                file_type="md",
-                file_size=len(content_bytes),
-                file_path=str(dest_path),
-                content_hash=content_hash,
-            )
-            doc.spaces.append(space)
-            db.add(doc)
-            db.commit()
-            db.refresh(doc)
-
-            chunks = text_chunker.chunk(content)
-            if not chunks:
-                continue
-
-            chunk_contents = [c.content for c in chunks]
-            embeddings = embedding_service.embed_batch(chunk_contents)
-
-            space_ids = str(space.id)
-            chroma_ids = []
-            chroma_metadatas = []
-            db_chunks = []
+SEED_DIR = Path(__file__).parent.parent.parent / "seed_data"
+SEED_SPACE_NAME = "Polidex Documentation"
 
-            for chunk, embedding in zip(chunks, embeddings):
-                chroma_id = f"doc-{doc.id}-chunk-{chunk.index}-{uuid.uuid4().hex[:8]}"
-                chroma_ids.append(chroma_id)
 
-                chroma_metadatas.append({
-                    "document_id": doc.id,
-                    "filename": doc.filename,
-                    "chunk_index": chunk.index,
-                    "space_ids": space_ids,
-                })
+def seed_database() -> int:
+    """Create the documentation space with the seed docs and ingest any that have no chunks yet.
 
-                db_chunk = Chunk(
-                    document_id=doc.id,
-                    chunk_index=chunk.index,
-                    content=chunk.content,
-                    start_char=chunk.start_char,
-                    end_char=chunk.end_char,
-                    chroma_id=chroma_id,
-                )
-                db_chunks.append(db_chunk)
+    The space and a row for every seed file are created together in one
+    short transaction; a seed file whose content is already uploaded is
+    linked instead. Each run then processes the space's seed documents that
+    have no chunks, committing one document at a time, so a restart resumes
+    an interrupted seed. Documents the user deleted from the space are not
+    recreated. Returns the number of documents processed.
+    """
+    if not SEED_DIR.exists():
+        return 0
 
-            vector_store.add_chunks(
-                ids=chroma_ids,
-                embeddings=embeddings,
-                documents=chunk_contents,
-                metadatas=chroma_metadatas,
-            )
+    db = SessionLocal()
+    processed = 0
 
-            db.add_all(db_chunks)
-            doc.chunk_count = len(chunks)
+    try:
+        seed_files = sorted(SEED_DIR.glob("*.md"))
+        hashes = {
+            filepath: hashlib.sha256(filepath.read_bytes()).hexdigest()
+            for filepath in seed_files
+        }
+
+        space = db.query(Space).filter(Space.name == SEED_SPACE_NAME).first()
+        if not space:
+            space = Space(name=SEED_SPACE_NAME, description="Official documentation and guides for Polidex")
+            db.add(space)
+            existing = {
+                doc.content_hash: doc
+                for doc in db.query(Document).filter(Document.content_hash.in_(hashes.values()))
+            }
+            for filepath in seed_files:
+                content_hash = hashes[filepath]
+                doc = existing.get(content_hash)
+                if doc is None:
+                    dest_path = UPLOAD_DIR / f"{content_hash}_{filepath.name}"
+                    if not dest_path.exists():
+                        shutil.copy(filepath, dest_path)
+                    doc = Document(
+                        filename=filepath.name,
+                        file_type=document_processor.get_file_type(filepath.name),
+                        file_size=dest_path.stat().st_size,
+                        file_path=str(dest_path),
+                        content_hash=content_hash,
+                        chunk_count=0,
+                    )
+                    db.add(doc)
+                doc.spaces.append(space)
             db.commit()
 
+        pending = [
+            doc for doc in space.documents
+            if doc.content_hash in hashes.values() and doc.chunk_count == 0
+        ]
+        for doc in pending:
+            # Vectors written before an earlier run died would be duplicated
+            vector_store.delete_by_document_id(doc.id)
+            try:
+                rag_pipeline.process_document(doc, db)
+            except Exception:
+                # Left with no chunks, so the next start retries it
+                db.rollback()
+                vector_store.delete_by_document_id(doc.id)
+                raise
+            processed += 1
+    except Exception:
+        logger.exception("Seeding did not finish; it resumes on the next start")
+        raise
     finally:
         db.close()
+
+    if processed:
+        logger.info(f"Seeded {processed} documents into '{SEED_SPACE_NAME}'")
+    return processed
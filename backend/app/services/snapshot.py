@@ -0,0 +1,380 @@
+import gzip
+import io
+import json
+import logging
+import tarfile
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.config import UPLOAD_DIR
+from app.models import Chunk, Document, Space, document_spaces
+from app.services.chunk_store import EMBEDDING_DTYPE, pack_embeddings, vector_metadata
+from app.services.document_processor import sanitize_filename
+from app.services.reconciler import vector_reconciler
+from app.services.vector_store import VectorStoreService, vector_store
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "polidex-space-snapshot"
+VERSION = 1
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+@dataclass
+class SnapshotReport:
+    space_id: int
+    documents: int = 0
+    linked_documents: int = 0
+    chunks: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "chunks_per_second": round(self.chunks_per_second, 1)}
+
+
+class _Counting:
+    """File wrapper counting the bytes that pass through it."""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.bytes = 0
+
+    def write(self, data: bytes) -> int:
+        self.bytes += len(data)
+        return self.stream.write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.bytes += len(data)
+        return data
+
+
+@dataclass
+class _ImportedDocument:
+    id: int
+    filename: str
+    file_path: str
+
+
+def _add_member(archive: tarfile.TarFile, name: str, data: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    archive.addfile(info, io.BytesIO(data))
+
+
+def _read_member(archive: tarfile.TarFile, member: tarfile.TarInfo) -> bytes:
+    return archive.extractfile(member).read()
+
+
+class SpaceSnapshot:
+    """Streaming export/import of one space: documents, chunks, embeddings and metadata.
+
+    The archive is an uncompressed tar written and read front to back, so it
+    can be piped. ``manifest.json`` and a gzipped ``documents.json.gz`` come
+    first, then optional ``files/<n>`` with the original uploads, then one
+    ``segments/<n>.npz`` per ``segment_size`` chunks. A segment holds its
+    chunks column by column: document index, chunk index and character
+    offsets as integer arrays, the float16 embeddings as one matrix, and the
+    chunk text as a single zlib-compressed buffer split by byte offsets.
+
+    Import never runs the embedding model. Documents whose content hash
+    already exists locally are linked to the imported space instead of being
+    duplicated.
+    """
+
+    def __init__(self, segment_size: int = 5000, store: VectorStoreService = vector_store):
+        self.segment_size = segment_size
+        self.store = store
+
+    def export_space(self, db: Session, space_id: int, target: BinaryIO, include_files: bool = False) -> SnapshotReport:
+        started = time.perf_counter()
+        space = db.get(Space, space_id)
+        if space is None:
+            raise SnapshotError(f"Space {space_id} not found")
+
+        documents = (
+            db.query(Document)
+            .join(document_spaces, document_spaces.c.document_id == Document.id)
+            .filter(document_spaces.c.space_id == space_id)
+            .order_by(Document.id)
+            .all()
+        )
+        refs = {document.id: ref for ref, document in enumerate(documents)}
+        chunk_total = db.scalar(
+            select(func.count(Chunk.id))
+            .join(document_spaces, document_spaces.c.document_id == Chunk.document_id)
+            .where(document_spaces.c.space_id == space_id)
+        ) or 0
+        report = SnapshotReport(space_id=space_id, documents=len(documents))
+
+        writer = _Counting(target)
+        with tarfile.open(fileobj=writer, mode="w|") as archive:
+            manifest = {
+                "format": FORMAT,
+                "version": VERSION,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "space": {"name": space.name, "description": space.description},
+                "documents": len(documents),
+                "chunks": chunk_total,
+                "embedding_dtype": EMBEDDING_DTYPE.str,
+                "files": include_files,
+            }
+            _add_member(archive, "manifest.json", json.dumps(manifest).encode())
+            _add_member(archive, "documents.json.gz", gzip.compress(json.dumps([
+                {
+                    "filename": d.filename,
+                    "file_type": d.file_type,
+                    "file_size": d.file_size,
+                    "content_hash": d.content_hash,
+                    "chunk_count": d.chunk_count,
+                }
+                for d in documents
+            ]).encode()))
+
+            if include_files:
+                for ref, document in enumerate(documents):
+                    path = Path(document.file_path)
+                    if path.exists():
+                        _add_member(archive, f"files/{ref}", path.read_bytes())
+
+            for index, (rows, blobs) in enumerate(self._segments(db, space_id)):
+                _add_member(archive, f"segments/{index:06d}.npz", self._encode_segment(rows, blobs, refs))
+                report.chunks += len(rows)
+
+        report.bytes = writer.bytes
+        report.seconds = time.perf_counter() - started
+        logger.info(
+            f"Exported space {space.name} ({report.documents} documents, {report.chunks} chunks) "
+            f"to {report.bytes / 1e6:.1f} MB in {report.seconds:.1f}s ({report.chunks_per_second:.0f} chunks/s)"
+        )
+        return report
+
+    def _segments(self, db: Session, space_id: int):
+        after = 0
+        while True:
+            page = db.execute(
+                select(
+                    Chunk.id, Chunk.chroma_id, Chunk.document_id, Chunk.chunk_index,
+                    Chunk.start_char, Chunk.end_char, Chunk.content, Chunk.embedding,
+                )
+                .join(document_spaces, document_spaces.c.document_id == Chunk.document_id)
+                .where(document_spaces.c.space_id == space_id, Chunk.id > after)
+                .order_by(Chunk.id)
+                .limit(self.segment_size)
+            ).all()
+            if not page:
+                return
+            after = page[-1].id
+            yield page, self._embeddings(page)
+
+    def _embeddings(self, page: list) -> list[bytes]:
+        """Packed embeddings for ``page``, fetched from the vector store for chunks
+        ingested before embeddings were stored in SQLite."""
+        missing = [r.chroma_id for r in page if r.embedding is None]
+        if not missing:
+            return [r.embedding for r in page]
+        found = self.store.get_embeddings(missing)
+        if len(found) < len(missing):
+            raise SnapshotError(
+                f"{len(missing) - len(found)} chunks have no embedding; run 'python -m app.cli reconcile --restore'"
+            )
+        fetched = dict(zip(found, pack_embeddings(list(found.values()))))
+        return [r.embedding if r.embedding is not None else fetched[r.chroma_id] for r in page]
+
+    def _encode_segment(self, rows: list, blobs: list[bytes], refs: dict[int, int]) -> bytes:
+        texts = [r.content.encode() for r in rows]
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in texts], out=offsets[1:])
+        embeddings = np.frombuffer(b"".join(blobs), dtype=EMBEDDING_DTYPE).reshape(len(rows), -1)
+
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            document=np.array([refs[r.document_id] for r in rows], dtype=np.int32),
+            chunk_index=np.array([r.chunk_index for r in rows], dtype=np.int32),
+            start_char=np.array([r.start_char for r in rows], dtype=np.int64),
+            end_char=np.array([r.end_char for r in rows], dtype=np.int64),
+            embeddings=embeddings,
+            text_offsets=offsets,
+            text=np.frombuffer(zlib.compress(b"".join(texts), 6), dtype=np.uint8),
+        )
+        return buffer.getvalue()
+
+    def import_space(self, db: Session, source: BinaryIO, name: str | None = None) -> SnapshotReport:
+        started = time.perf_counter()
+        space_id: int | None = None
+        created_document_ids: list[int] = []
+        written_files: list[Path] = []
+        reader = _Counting(source)
+        try:
+            with tarfile.open(fileobj=reader, mode="r|") as archive:
+                members = iter(archive)
+                manifest = json.loads(_read_member(archive, self._expect(members, "manifest.json")))
+                if manifest.get("format") != FORMAT or manifest.get("version") != VERSION:
+                    raise SnapshotError("Not a supported space snapshot")
+                if np.dtype(manifest["embedding_dtype"]) != EMBEDDING_DTYPE:
+                    raise SnapshotError(f"Unsupported embedding dtype {manifest['embedding_dtype']}")
+                entries = json.loads(gzip.decompress(_read_member(archive, self._expect(members, "documents.json.gz"))))
+
+                space_name = name or manifest["space"]["name"]
+                if db.query(Space).filter(Space.name == space_name).first():
+                    raise SnapshotError(f"Space '{space_name}' already exists; import under another name")
+                space = Space(name=space_name, description=manifest["space"]["description"])
+                db.add(space)
+                documents, linked = self._import_documents(db, space, entries)
+                space_id = space.id
+                # The space and documents are committed up front and each
+                # segment's chunks on their own, so no write transaction is
+                # held across the whole import; a failure is undone by id.
+                db.commit()
+                created_document_ids.extend(d.id for d in documents if d is not None)
+                report = SnapshotReport(
+                    space_id=space_id, documents=len(created_document_ids), linked_documents=len(linked)
+                )
+
+                for member in members:
+                    if member.name.startswith("files/"):
+                        document = documents[int(member.name.split("/", 1)[1])]
+                        if document is not None:
+                            path = Path(document.file_path)
+                            path.write_bytes(_read_member(archive, member))
+                            written_files.append(path)
+                    elif member.name.startswith("segments/"):
+                        report.chunks += self._import_segment(db, _read_member(archive, member), documents, space_id)
+                        db.commit()
+        except Exception:
+            db.rollback()
+            for document_id in created_document_ids:
+                self.store.delete_by_document_id(document_id)
+            if space_id is not None:
+                self._remove(db, space_id, created_document_ids)
+            for path in written_files:
+                path.unlink(missing_ok=True)
+            raise
+
+        vector_reconciler.sync_documents(db, linked)
+        report.bytes = reader.bytes
+        report.seconds = time.perf_counter() - started
+        logger.info(
+            f"Imported space {space_name}: {report.documents} documents ({report.linked_documents} already present), "
+            f"{report.chunks} chunks in {report.seconds:.1f}s ({report.chunks_per_second:.0f} chunks/s)"
+        )
+        return report
+
+    def _expect(self, members, name: str) -> tarfile.TarInfo:
+        member = next(members, None)
+        if member is None or member.name != name:
+            raise SnapshotError(f"Snapshot is missing {name}")
+        return member
+
+    def _remove(self, db: Session, space_id: int, document_ids: list[int]) -> None:
+        """Delete what a failed import committed: its chunks, new documents and the space."""
+        db.execute(delete(Chunk).where(Chunk.document_id.in_(document_ids)))
+        for document in db.query(Document).filter(Document.id.in_(document_ids)):
+            db.delete(document)
+        space = db.get(Space, space_id)
+        if space is not None:
+            db.delete(space)
+        db.commit()
+
+    def _import_documents(
+        self, db: Session, space: Space, entries: list[dict]
+    ) -> tuple[list[_ImportedDocument | None], list[int]]:
+        """New documents by archive index, ``None`` for documents that already exist here."""
+        existing = {
+            d.content_hash: d
+            for d in db.query(Document).filter(Document.content_hash.in_([e["content_hash"] for e in entries]))
+        }
+        documents: list[Document | None] = []
+        linked: list[int] = []
+        for entry in entries:
+            if sanitize_filename(entry["content_hash"]) != entry["content_hash"]:
+                raise SnapshotError(f"Invalid content hash in snapshot: {entry['content_hash']!r}")
+            present = existing.get(entry["content_hash"])
+            if present is not None:
+                present.spaces.append(space)
+                linked.append(present.id)
+                documents.append(None)
+                continue
+            # Same naming as uploads, so an archive can't place files outside UPLOAD_DIR
+            filename = sanitize_filename(entry["filename"])
+            document = Document(
+                filename=filename,
+                file_type=entry["file_type"],
+                file_size=entry["file_size"],
+                file_path=str(UPLOAD_DIR / f"{entry['content_hash']}_{filename}"),
+                content_hash=entry["content_hash"],
+                chunk_count=entry["chunk_count"],
+            )
+            document.spaces.append(space)
+            db.add(document)
+            documents.append(document)
+        db.flush()
+        # Plain values, so later commits don't expire them
+        imported = [
+            _ImportedDocument(d.id, d.filename, d.file_path) if d is not None else None for d in documents
+        ]
+        return imported, linked
+
+    def _import_segment(
+        self, db: Session, data: bytes, documents: list[_ImportedDocument | None], space_id: int
+    ) -> int:
+        with np.load(io.BytesIO(data)) as segment:
+            columns = {name: segment[name] for name in segment.files}
+        refs = columns["document"].tolist()
+        rows = [i for i, ref in enumerate(refs) if documents[ref] is not None]
+        if not rows:
+            return 0
+
+        text = zlib.decompress(columns["text"].tobytes())
+        offsets = columns["text_offsets"].tolist()
+        chunk_indexes = columns["chunk_index"].tolist()
+        starts, ends = columns["start_char"].tolist(), columns["end_char"].tolist()
+        vectors = columns["embeddings"][rows]
+        blobs = pack_embeddings(vectors)
+        indexed_at = int(time.time())
+        space_label = str(space_id)
+
+        chunks, ids, metadatas = [], [], []
+        for blob, i in zip(blobs, rows):
+            document = documents[refs[i]]
+            chunk_index, start_char, end_char = chunk_indexes[i], starts[i], ends[i]
+            chroma_id = f"doc-{document.id}-chunk-{chunk_index}-{uuid.uuid4().hex[:8]}"
+            chunks.append({
+                "document_id": document.id,
+                "chunk_index": chunk_index,
+                "content": text[offsets[i]:offsets[i + 1]].decode(),
+                "start_char": start_char,
+                "end_char": end_char,
+                "chroma_id": chroma_id,
+                "embedding": blob,
+            })
+            ids.append(chroma_id)
+            metadatas.append(vector_metadata(
+                document.id, document.filename, chunk_index, start_char, end_char, space_label, indexed_at
+            ))
+
+        self.store.add_chunks(ids=ids, embeddings=vectors.astype(np.float32), metadatas=metadatas)
+        db.execute(insert(Chunk), chunks)
+        return len(chunks)
+
+
+space_snapshot = SpaceSnapshot()
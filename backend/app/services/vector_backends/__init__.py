@@ -0,0 +1,29 @@
+from pathlib import Path
+
+from app.config import settings, BASE_DIR
+from app.services.vector_backends.base import VectorStoreBackend
+
+
+def _resolve(path: str) -> Path:
+    resolved = Path(path)
+    return resolved if resolved.is_absolute() else BASE_DIR / path
+
+
+def create_backend(name: str = settings.vector_store_backend, path: Path | None = None) -> VectorStoreBackend:
+    """Build the named backend, stored under ``path`` or its configured directory."""
+    if name == "chroma":
+        from app.services.vector_backends.chroma import ChromaBackend
+
+        return ChromaBackend(path or _resolve(settings.chroma_persist_dir))
+    if name == "flat":
+        from app.services.vector_backends.flat import FlatBackend
+
+        return FlatBackend(
+            path or _resolve(settings.vector_index_dir),
+            precision=settings.vector_index_precision,
+            rescore_factor=settings.vector_index_rescore_factor,
+        )
+    raise ValueError(f"Unknown vector store backend: {name}")
+
+
+__all__ = ["VectorStoreBackend", "create_backend"]
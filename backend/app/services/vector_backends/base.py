@@ -0,0 +1,83 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+
+
+class VectorStoreBackend(ABC):
+    """Storage and similarity search for chunk embeddings.
+
+    Query results use Chroma's multi-query shape: ``ids``, ``metadatas``,
+    ``distances`` (cosine) and optionally ``embeddings``, each a list with
+    one entry per query embedding. Chunk text is not stored here; it lives in
+    the ``chunks`` table (see ``ChunkTextStore``).
+    """
+
+    name: str
+
+    @abstractmethod
+    def add(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict],
+    ) -> None:
+        ...
+
+    @abstractmethod
+    def query(
+        self,
+        query_embeddings: list[list[float]],
+        n_results: int,
+        where: dict | None = None,
+        include_embeddings: bool = False,
+        space_id: int | None = None,
+    ) -> dict:
+        """Nearest chunks per query. ``space_id`` is a hint: backends that can't
+        scope the search return unscoped results and callers filter them."""
+
+    @abstractmethod
+    def delete_documents(self, document_ids: list[int]) -> None:
+        ...
+
+    @abstractmethod
+    def get_by_document_id(self, document_id: int) -> dict:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def scan(self, page_size: int) -> Iterator[tuple[list[str], list[dict]]]:
+        """Yield ``(ids, metadatas)`` pages covering every stored chunk."""
+
+    @abstractmethod
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        ...
+
+    @abstractmethod
+    def delete_ids(self, ids: list[str]) -> None:
+        ...
+
+    @abstractmethod
+    def update_metadatas(self, ids: list[str], metadatas: list[dict]) -> None:
+        ...
+
+    @abstractmethod
+    def get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        """Stored vectors for whichever of ``ids`` exist."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every stored chunk."""
+
+    def staging(self) -> "VectorStoreBackend":
+        """Empty store a full rebuild writes to before ``promote`` makes it live.
+
+        Backends that can't build alongside the live store clear it and are
+        rebuilt in place.
+        """
+        self.clear()
+        return self
+
+    def promote(self, staging: "VectorStoreBackend") -> None:
+        """Replace the live store with ``staging``, as returned by ``staging()``."""
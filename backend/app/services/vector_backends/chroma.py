@@ -0,0 +1,159 @@
+import threading
+from pathlib import Path
+
+from app.services.vector_backends.base import VectorStoreBackend
+
+
+def collection_missing(error: Exception) -> bool:
+    """Whether ``error`` says the collection was deleted, e.g. by a rebuild in another process."""
+    # NotFoundError in chromadb 1.x, InvalidCollectionException or ValueError before
+    return type(error).__name__ in ("NotFoundError", "InvalidCollectionException") or (
+        isinstance(error, ValueError) and "does not exist" in str(error)
+    )
+
+
+class ChromaBackend(VectorStoreBackend):
+    name = "chroma"
+    COLLECTION_NAME = "polidex_chunks"
+
+    def __init__(self, persist_path: Path, collection_name: str = COLLECTION_NAME):
+        self.persist_path = persist_path
+        self.collection_name = collection_name
+        self._client = None
+        self._collection = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import chromadb
+                    from chromadb.config import Settings
+
+                    self.persist_path.mkdir(parents=True, exist_ok=True)
+                    self._client = chromadb.PersistentClient(
+                        path=str(self.persist_path),
+                        settings=Settings(anonymized_telemetry=False),
+                    )
+        return self._client
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = self.client.get_or_create_collection(
+                name=self.collection_name,
+                metadata={"hnsw:space": "cosine"},
+            )
+        return self._collection
+
+    def _run(self, operation):
+        """Run ``operation`` on the collection, resolving it again if it was replaced."""
+        try:
+            return operation(self.collection)
+        except Exception as e:
+            if not collection_missing(e):
+                raise
+            self._collection = None
+            return operation(self.collection)
+
+    def add(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict],
+    ) -> None:
+        embeddings = embeddings.tolist() if hasattr(embeddings, "tolist") else embeddings
+        self._run(lambda c: c.add(ids=ids, embeddings=embeddings, metadatas=metadatas))
+
+    def query(
+        self,
+        query_embeddings: list[list[float]],
+        n_results: int,
+        where: dict | None = None,
+        include_embeddings: bool = False,
+        space_id: int | None = None,
+    ) -> dict:
+        # space_ids is a comma-separated string that Chroma's where filter
+        # can't match, so space scoping is left to the caller.
+        include = ["metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+        return self._run(lambda c: c.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=include,
+        ))
+
+    def delete_documents(self, document_ids: list[int]) -> None:
+        for document_id in document_ids:
+            self._run(lambda c: c.delete(where={"document_id": document_id}))
+
+    def get_by_document_id(self, document_id: int) -> dict:
+        return self._run(lambda c: c.get(
+            where={"document_id": document_id},
+            include=["metadatas"],
+        ))
+
+    def count(self) -> int:
+        return self._run(lambda c: c.count())
+
+    def scan(self, page_size: int):
+        offset = 0
+        while True:
+            page = self._run(lambda c: c.get(include=["metadatas"], limit=page_size, offset=offset))
+            if not page["ids"]:
+                return
+            offset += len(page["ids"])
+            yield page["ids"], page["metadatas"]
+
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        return set(self._run(lambda c: c.get(ids=ids, include=[]))["ids"]) if ids else set()
+
+    def delete_ids(self, ids: list[str]) -> None:
+        if ids:
+            self._run(lambda c: c.delete(ids=ids))
+
+    def update_metadatas(self, ids: list[str], metadatas: list[dict]) -> None:
+        if ids:
+            self._run(lambda c: c.update(ids=ids, metadatas=metadatas))
+
+    def get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        if not ids:
+            return {}
+        found = self._run(lambda c: c.get(ids=ids, include=["embeddings"]))
+        return dict(zip(found["ids"], found["embeddings"]))
+
+    def clear(self) -> None:
+        self.collection
+        self.client.delete_collection(self.collection_name)
+        self._collection = None
+
+    def _delete_collection(self, name: str) -> None:
+        try:
+            self.client.delete_collection(name)
+        except Exception as e:
+            if not collection_missing(e):
+                raise
+
+    def staging(self) -> "ChromaBackend":
+        """A new collection next to the live one; a running server keeps using the live one meanwhile."""
+        staging = ChromaBackend(self.persist_path, f"{self.collection_name}_rebuild")
+        staging._client = self.client
+        # Left over from a rebuild that did not finish
+        self._delete_collection(staging.collection_name)
+        return staging
+
+    def promote(self, staging: "ChromaBackend") -> None:
+        """Swap ``staging`` in under the live name and drop the old collection.
+
+        Renames keep collection ids, so servers holding the old collection
+        read it until it is deleted, then resolve the new one by name.
+        """
+        retired = f"{self.collection_name}_retired"
+        self._delete_collection(retired)
+        self.collection.modify(name=retired)
+        staging.collection.modify(name=self.collection_name)
+        self._delete_collection(retired)
+        self._collection = None
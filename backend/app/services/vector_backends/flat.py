@@ -0,0 +1,69 @@
+from pathlib import Path
+
+from app.services.vector_backends.base import VectorStoreBackend
+from app.services.vector_index import FlatVectorIndex
+
+
+class FlatBackend(VectorStoreBackend):
+    """In-process exact search over a memory-mapped NumPy matrix (see ``FlatVectorIndex``)."""
+
+    name = "flat"
+
+    def __init__(self, index_path: Path, precision: str = "float32", rescore_factor: int = 4):
+        self.index = FlatVectorIndex(index_path, precision=precision, rescore_factor=rescore_factor)
+
+    def add(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict],
+    ) -> None:
+        self.index.add(ids, embeddings, metadatas)
+
+    def query(
+        self,
+        query_embeddings: list[list[float]],
+        n_results: int,
+        where: dict | None = None,
+        include_embeddings: bool = False,
+        space_id: int | None = None,
+    ) -> dict:
+        document_id = None
+        if where:
+            if set(where) != {"document_id"}:
+                raise ValueError("The flat vector backend only filters on document_id")
+            document_id = where["document_id"]
+
+        results = [
+            self.index.query(embedding, n_results, include_embeddings, document_id=document_id, space_id=space_id)
+            for embedding in query_embeddings
+        ]
+        keys = ["ids", "metadatas", "distances"] + (["embeddings"] if include_embeddings else [])
+        return {key: [r[key][0] for r in results] for key in keys}
+
+    def delete_documents(self, document_ids: list[int]) -> None:
+        self.index.delete_documents(document_ids)
+
+    def get_by_document_id(self, document_id: int) -> dict:
+        return self.index.get_by_document_id(document_id)
+
+    def count(self) -> int:
+        return self.index.count()
+
+    def scan(self, page_size: int):
+        return self.index.scan(page_size)
+
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        return self.index.existing_ids(ids)
+
+    def delete_ids(self, ids: list[str]) -> None:
+        self.index.delete_ids(ids)
+
+    def update_metadatas(self, ids: list[str], metadatas: list[dict]) -> None:
+        self.index.update_metadatas(ids, metadatas)
+
+    def get_embeddings(self, ids: list[str]):
+        return self.index.get_embeddings(ids)
+
+    def clear(self) -> None:
+        self.index.clear()
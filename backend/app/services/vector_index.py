@@ -0,0 +1,692 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use is on the operator
+    fcntl = None
+
+
+class IndexLocked(RuntimeError):
+    pass
+
+
+# One flock per index directory per process, shared by every FlatVectorIndex
+# opened on it here: [lock file, open instances, owning pid]
+_process_locks: dict[Path, list] = {}
+_process_locks_guard = threading.Lock()
+
+
+def _lock_directory(path: Path) -> None:
+    key = path.resolve()
+    with _process_locks_guard:
+        entry = _process_locks.get(key)
+        if entry is not None and entry[2] == os.getpid():
+            entry[1] += 1
+            return
+        # An entry inherited through fork is the parent's lock, not ours
+        lock_file = open(key / ".lock", "a+")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.seek(0)
+                holder = lock_file.read().strip() or "unknown"
+                lock_file.close()
+                raise IndexLocked(
+                    f"Flat vector index at {key} is in use by process {holder}; "
+                    "it can only be opened by one process at a time"
+                )
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        _process_locks[key] = [lock_file, 1, os.getpid()]
+
+
+def _unlock_directory(path: Path) -> None:
+    key = path.resolve()
+    with _process_locks_guard:
+        entry = _process_locks.get(key)
+        if entry is None or entry[2] != os.getpid():
+            return
+        entry[1] -= 1
+        if entry[1] == 0:
+            entry[0].close()
+            del _process_locks[key]
+
+
+class FlatVectorIndex:
+    """Brute-force vector index stored as flat files next to a SQLite side-table.
+
+    Normalized float32 vectors live in an append-only file that is only ever
+    memory-mapped, so they cost page cache rather than heap. With ``float16``
+    or ``int8`` precision a quantized copy is held in memory and scanned to
+    pick ``n_results * rescore_factor`` candidates, which are then re-scored
+    exactly against the float32 rows. With ``float32`` precision the mapped
+    vectors are scanned directly.
+
+    Ids and metadata are kept in ``meta.sqlite`` and read only for the rows a
+    query returns; chunk text stays in the application database. The rows of each space (from the
+    comma-separated ``space_ids`` metadata) are kept as sorted index arrays,
+    so a space-scoped query scores only that space's rows. Deleted rows are
+    tombstoned and dropped by ``compact()``, which runs automatically once
+    enough have accumulated.
+
+    The in-memory row state is never reloaded from disk, so an index
+    directory belongs to one process: ``open()`` takes an exclusive lock on it
+    and raises ``IndexLocked`` if another process holds it. Adding an id that
+    already exists tombstones its old row.
+    """
+
+    PRECISIONS = ("float32", "float16", "int8")
+    BLOCK_ROWS = 4096
+    SUBSET_SCAN_FRACTION = 0.3
+    COMPACT_MIN_DEAD = 1000
+    COMPACT_DEAD_FRACTION = 0.25
+
+    def __init__(self, path: Path, precision: str = "int8", rescore_factor: int = 4):
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unknown vector index precision: {precision}")
+        self.path = Path(path)
+        self.precision = precision
+        self.rescore_factor = max(rescore_factor, 1)
+        self.dim: int | None = None
+        self._size = 0
+        self._live = np.zeros(0, dtype=bool)
+        self._document_ids = np.zeros(0, dtype=np.int64)
+        self._space_rows: dict[int, np.ndarray] = {}
+        self._codes: np.ndarray | None = None
+        self._scales: np.ndarray | None = None
+        self._vectors: np.ndarray | None = None
+        self._meta: sqlite3.Connection | None = None
+        self._generation = 0
+        # Generation of the row files in use; compaction writes the next one
+        self._file_generation = 0
+        self._locked = False
+        self._lock = threading.RLock()
+
+    ROW_FILE_STEMS = ("vectors", "codes", "scales")
+
+    def _row_file(self, stem: str, extension: str, generation: int | None = None) -> Path:
+        generation = self._file_generation if generation is None else generation
+        return self.path / (f"{stem}.{extension}" if generation == 0 else f"{stem}.{generation}.{extension}")
+
+    @property
+    def vectors_file(self) -> Path:
+        return self._row_file("vectors", "f32")
+
+    @property
+    def codes_file(self) -> Path:
+        return self._row_file("codes", "f16" if self.precision == "float16" else "i8")
+
+    @property
+    def scales_file(self) -> Path:
+        return self._row_file("scales", "f32")
+
+    @property
+    def code_dtype(self):
+        return np.float16 if self.precision == "float16" else np.int8
+
+    def open(self) -> "FlatVectorIndex":
+        with self._lock:
+            if self._meta is not None:
+                return self
+            self.path.mkdir(parents=True, exist_ok=True)
+            if not self._locked:
+                _lock_directory(self.path)
+                self._locked = True
+            meta = sqlite3.connect(self.path / "meta.sqlite", check_same_thread=False)
+            meta.execute("PRAGMA journal_mode=WAL")
+            meta.execute(
+                "CREATE TABLE IF NOT EXISTS rows ("
+                "row INTEGER PRIMARY KEY, chroma_id TEXT NOT NULL UNIQUE, document_id INTEGER NOT NULL, "
+                "metadata TEXT NOT NULL, space_ids TEXT NOT NULL DEFAULT '')"
+            )
+            columns = [c[1] for c in meta.execute("PRAGMA table_info(rows)")]
+            if "space_ids" not in columns:
+                meta.execute("ALTER TABLE rows ADD COLUMN space_ids TEXT NOT NULL DEFAULT ''")
+                meta.execute("UPDATE rows SET space_ids = COALESCE(json_extract(metadata, '$.space_ids'), '')")
+            meta.execute("CREATE INDEX IF NOT EXISTS ix_rows_document_id ON rows (document_id)")
+            meta.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            meta.commit()
+            self._meta = meta
+
+            files = meta.execute("SELECT value FROM info WHERE key = 'file_generation'").fetchone()
+            self._file_generation = int(files[0]) if files else 0
+            self._remove_stale_files()
+
+            dim = meta.execute("SELECT value FROM info WHERE key = 'dim'").fetchone()
+            if dim is None:
+                return self
+            self.dim = int(dim[0])
+            self._load()
+        return self
+
+    def _remove_stale_files(self) -> None:
+        """Delete row files of other generations, left behind by a compaction that did not finish."""
+        for f in self.path.iterdir():
+            parts = f.name.split(".")
+            if parts[0] not in self.ROW_FILE_STEMS:
+                continue
+            if len(parts) == 2:
+                generation = 0
+            elif len(parts) == 3 and parts[1].isdigit():
+                generation = int(parts[1])
+            else:
+                generation = None  # temporary file from an older compaction
+            if generation != self._file_generation:
+                f.unlink()
+
+    def _row_files(self) -> list[tuple[Path, int]]:
+        """Files holding one record per row, with their record size in bytes."""
+        files = [(self.vectors_file, 4 * self.dim)]
+        if self.precision != "float32":
+            files.append((self.codes_file, np.dtype(self.code_dtype).itemsize * self.dim))
+        if self.precision == "int8":
+            files.append((self.scales_file, 4))
+        return files
+
+    def _load(self) -> None:
+        # Rows are committed to meta only after their vectors are written, so
+        # anything past the last meta row, or past the end of the shortest
+        # file, is left over from an add that did not finish.
+        last = self._meta.execute("SELECT MAX(row) FROM rows").fetchone()[0]
+        size = last + 1 if last is not None else 0
+        for f, record_bytes in self._row_files():
+            size = min(size, f.stat().st_size // record_bytes if f.exists() else 0)
+        self._meta.execute("DELETE FROM rows WHERE row >= ?", (size,))
+        self._meta.commit()
+        self._truncate_rows(size)
+
+        if self.precision != "float32":
+            self._codes = np.fromfile(self.codes_file, dtype=self.code_dtype).reshape(size, self.dim)
+            if self.precision == "int8":
+                self._scales = np.fromfile(self.scales_file, dtype=np.float32)
+
+        self._size = size
+        self._live = np.zeros(size, dtype=bool)
+        self._document_ids = np.full(size, -1, dtype=np.int64)
+        records = self._meta.execute("SELECT row, document_id, space_ids FROM rows WHERE row < ?", (size,)).fetchall()
+        rows = np.array([r[0] for r in records], dtype=np.int64)
+        self._live[rows] = True
+        self._document_ids[rows] = [r[1] for r in records]
+
+        self._space_rows = self._index_spaces(rows, [r[2] for r in records])
+        self._remap()
+
+    def _index_spaces(self, rows: np.ndarray, labels: list[str]) -> dict[int, np.ndarray]:
+        space_rows: dict[int, list[np.ndarray]] = {}
+        if labels:
+            unique, inverse = np.unique(np.array(labels, dtype=object).astype(str), return_inverse=True)
+            for label_index, label in enumerate(unique):
+                members = rows[inverse == label_index]
+                for space_id in self.parse_spaces(label):
+                    space_rows.setdefault(space_id, []).append(members)
+        return {s: np.sort(np.concatenate(parts)) for s, parts in space_rows.items()}
+
+    @staticmethod
+    def parse_spaces(space_ids: str) -> list[int]:
+        return [int(s) for s in space_ids.split(",") if s]
+
+    def _remap(self) -> None:
+        if self._size == 0:
+            self._vectors = None
+            return
+        self._vectors = np.memmap(self.vectors_file, dtype=np.float32, mode="r", shape=(self._size, self.dim))
+
+    def _truncate_rows(self, size: int) -> None:
+        for f, record_bytes in self._row_files():
+            with open(f, "ab") as handle:
+                handle.truncate(size * record_bytes)
+
+    def _write_rows_at(self, target: Path, start: int, array: np.ndarray) -> None:
+        """Write ``array`` as rows ``start`` onwards, dropping anything already past ``start``."""
+        record_bytes = array.nbytes // len(array)
+        with open(target, "ab") as f:
+            f.truncate(start * record_bytes)
+        with open(target, "r+b") as f:
+            f.seek(start * record_bytes)
+            f.write(array.tobytes())
+
+    def _grow(self, array: np.ndarray | None, rows: int, fill=0) -> np.ndarray:
+        """Capacity-doubling buffer, so readers can keep slicing the old one while it is replaced."""
+        needed = self._size + rows
+        if array is not None and len(array) >= needed:
+            return array
+        capacity = max(needed, 2 * (len(array) if array is not None else 0), 1024)
+        shape = (capacity,) if array is None or array.ndim == 1 else (capacity, array.shape[1])
+        grown = np.full(shape, fill, dtype=array.dtype)
+        grown[:self._size] = array[:self._size]
+        return grown
+
+    def quantize(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        if self.precision == "float16":
+            return vectors.astype(np.float16), None
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def add(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]] | np.ndarray,
+        metadatas: list[dict],
+    ) -> None:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) == 0:
+            return
+        vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+        if len(set(ids)) != len(ids):
+            # Last occurrence wins, as with repeated adds
+            keep = sorted({chroma_id: i for i, chroma_id in enumerate(ids)}.values())
+            ids, vectors, metadatas = [ids[i] for i in keep], vectors[keep], [metadatas[i] for i in keep]
+
+        with self._lock:
+            self.open()
+            new_index = self.dim is None
+            if not new_index and vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+
+            start, count = self._size, len(vectors)
+            # Build every meta row before touching the files, so bad metadata fails cleanly
+            document_ids = [int(m["document_id"]) for m in metadatas]
+            space_labels = [str(m.get("space_ids", "")) for m in metadatas]
+            records = [
+                (start + i, ids[i], document_ids[i], json.dumps(metadatas[i]), space_labels[i])
+                for i in range(count)
+            ]
+            codes = scales = None
+            if self.precision != "float32":
+                codes, scales = self.quantize(vectors)
+
+            replaced = self._rows_for(ids)
+            if new_index:
+                self.dim = vectors.shape[1]
+            try:
+                if new_index:
+                    self._meta.execute("INSERT OR IGNORE INTO info (key, value) VALUES ('dim', ?)", (str(self.dim),))
+                    self._meta.execute("INSERT OR IGNORE INTO info (key, value) VALUES ('precision', ?)", (self.precision,))
+                if replaced:
+                    self._meta.executemany("DELETE FROM rows WHERE row = ?", [(r,) for r in replaced])
+                self._write_rows_at(self.vectors_file, start, vectors)
+                if codes is not None:
+                    self._write_rows_at(self.codes_file, start, codes)
+                if scales is not None:
+                    self._write_rows_at(self.scales_file, start, scales)
+                self._meta.executemany(
+                    "INSERT INTO rows (row, chroma_id, document_id, metadata, space_ids) VALUES (?, ?, ?, ?, ?)",
+                    records,
+                )
+                self._meta.commit()
+            except BaseException:
+                self._meta.rollback()
+                self._truncate_rows(start)
+                if new_index:
+                    self.dim = None
+                raise
+
+            added: dict[int, list[int]] = {}
+            for i, label in enumerate(space_labels):
+                for space_id in self.parse_spaces(label):
+                    added.setdefault(space_id, []).append(start + i)
+            space_rows = dict(self._space_rows)
+            for space_id, new_rows in added.items():
+                existing = space_rows.get(space_id, np.zeros(0, dtype=np.int64))
+                space_rows[space_id] = np.concatenate([existing, np.asarray(new_rows, dtype=np.int64)])
+
+            live = self._grow(self._live, count, fill=False)
+            if live is self._live:
+                live = live.copy()
+            live[np.asarray(replaced, dtype=np.int64)] = False
+            live[start:start + count] = True
+            doc_ids = self._grow(self._document_ids, count, fill=-1)
+            doc_ids[start:start + count] = document_ids
+            if codes is not None:
+                buffer = self._grow(self._codes if self._codes is not None else np.zeros((0, self.dim), self.code_dtype), count)
+                buffer[start:start + count] = codes
+                self._codes = buffer
+                if scales is not None:
+                    scale_buffer = self._grow(self._scales if self._scales is not None else np.zeros(0, np.float32), count)
+                    scale_buffer[start:start + count] = scales
+                    self._scales = scale_buffer
+            self._live, self._document_ids = live, doc_ids
+            self._space_rows = space_rows
+            self._size = start + count
+            self._remap()
+            if replaced:
+                self._maybe_compact()
+
+    def _snapshot(self):
+        """Consistent view of the row state; ``compact()`` replaces rather than mutates it."""
+        with self._lock:
+            size = self._size
+            return (
+                self._generation,
+                size,
+                self._live[:size],
+                self._document_ids[:size],
+                self._space_rows,
+                self._codes[:size] if self._codes is not None else None,
+                self._scales[:size] if self._scales is not None else None,
+                self._vectors,
+            )
+
+    def _scan(self, query: np.ndarray, size: int, codes, scales, vectors, rows: np.ndarray | None) -> np.ndarray:
+        """Approximate (quantized) or exact (float32) scores for ``rows``, or for every row."""
+        source = vectors if codes is None else codes
+        if rows is not None and len(rows) < self.SUBSET_SCAN_FRACTION * size:
+            scores = np.empty(len(rows), dtype=np.float32)
+            for start in range(0, len(rows), self.BLOCK_ROWS):
+                block = rows[start:start + self.BLOCK_ROWS]
+                scores[start:start + len(block)] = np.asarray(source[block], dtype=np.float32) @ query
+            return scores * scales[rows] if scales is not None else scores
+        if rows is not None:
+            # Gathering most of the rows costs more than scanning them all
+            return self._scan(query, size, codes, scales, vectors, None)[rows]
+
+        scores = np.empty(size, dtype=np.float32)
+        for start in range(0, size, self.BLOCK_ROWS):
+            end = min(start + self.BLOCK_ROWS, size)
+            scores[start:end] = np.asarray(source[start:end], dtype=np.float32) @ query
+        if scales is not None:
+            scores *= scales
+        return scores
+
+    def search(
+        self,
+        query_embedding: list[float] | np.ndarray,
+        n_results: int,
+        rows: np.ndarray | None = None,
+        document_id: int | None = None,
+        space_id: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Best ``n_results`` (row, cosine similarity) pairs, optionally restricted to ``rows``,
+        one document or one space."""
+        _, rows, scores = self._search(query_embedding, n_results, rows, document_id, space_id)
+        return rows, scores
+
+    def _search(
+        self,
+        query_embedding: list[float] | np.ndarray,
+        n_results: int,
+        rows: np.ndarray | None = None,
+        document_id: int | None = None,
+        space_id: int | None = None,
+    ) -> tuple[int, np.ndarray, np.ndarray]:
+        self.open()
+        generation, size, live, document_ids, space_rows, codes, scales, vectors = self._snapshot()
+        if size == 0 or n_results <= 0:
+            return generation, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) + 1e-12)
+
+        if space_id is not None:
+            rows = space_rows.get(space_id, np.zeros(0, dtype=np.int64))
+        if document_id is not None:
+            in_document = np.flatnonzero(document_ids == document_id)
+            rows = in_document if rows is None else np.intersect1d(rows, in_document)
+        if rows is not None:
+            rows = rows[rows < size]
+            rows = rows[live[rows]]
+            scores = self._scan(query, size, codes, scales, vectors, rows)
+        else:
+            rows = np.flatnonzero(live)
+            scores = self._scan(query, size, codes, scales, vectors, None)[rows]
+
+        if len(rows) == 0:
+            return generation, rows, scores
+
+        k = min(n_results if codes is None else n_results * self.rescore_factor, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        candidates, candidate_scores = rows[top], scores[top]
+
+        if codes is not None:
+            order = np.argsort(candidates)
+            candidates = candidates[order]
+            candidate_scores = np.asarray(vectors[candidates], dtype=np.float32) @ query
+
+        best = np.argsort(-candidate_scores)[:n_results]
+        return generation, candidates[best], candidate_scores[best]
+
+    def hydrate(self, rows: np.ndarray, include_embeddings: bool = False) -> dict:
+        """Ids, metadata (and optionally vectors) for ``rows``, in the given order."""
+        if len(rows) == 0:
+            result = {"ids": [], "metadatas": []}
+            if include_embeddings:
+                result["embeddings"] = []
+            return result
+
+        placeholders = ",".join("?" * len(rows))
+        with self._lock:
+            found = {
+                row: (chroma_id, metadata)
+                for row, chroma_id, metadata in self._meta.execute(
+                    f"SELECT row, chroma_id, metadata FROM rows WHERE row IN ({placeholders})",
+                    [int(r) for r in rows],
+                )
+            }
+        ordered = [found[int(r)] for r in rows]
+        result = {
+            "ids": [o[0] for o in ordered],
+            "metadatas": [json.loads(o[1]) for o in ordered],
+        }
+        if include_embeddings:
+            result["embeddings"] = np.asarray(self._vectors[np.asarray(rows)], dtype=np.float32)
+        return result
+
+    def query(
+        self,
+        query_embedding: list[float],
+        n_results: int = 5,
+        include_embeddings: bool = False,
+        document_id: int | None = None,
+        space_id: int | None = None,
+    ) -> dict:
+        """Single-query result in Chroma's shape (lists of lists, cosine distances)."""
+        while True:
+            generation, rows, scores = self._search(query_embedding, n_results, document_id=document_id, space_id=space_id)
+            with self._lock:
+                # Row numbers are only valid until the next compaction
+                if generation == self._generation:
+                    live = self._live[rows]
+                    rows, scores = rows[live], scores[live]
+                    hydrated = self.hydrate(rows, include_embeddings)
+                    break
+        result = {key: [value] for key, value in hydrated.items()}
+        result["distances"] = [(1.0 - scores).tolist()]
+        return result
+
+    def delete_documents(self, document_ids: list[int]) -> int:
+        with self._lock:
+            self.open()
+            if self._size == 0:
+                return 0
+            dead = np.isin(self._document_ids[:self._size], document_ids) & self._live[:self._size]
+            count = int(dead.sum())
+            self._meta.executemany("DELETE FROM rows WHERE document_id = ?", [(int(d),) for d in document_ids])
+            self._meta.commit()
+            live = self._live.copy()
+            live[:self._size] &= ~dead
+            self._live = live
+            if count:
+                self._maybe_compact()
+            return count
+
+    def delete_ids(self, ids: list[str]) -> int:
+        with self._lock:
+            self.open()
+            rows = self._rows_for(ids)
+            if not rows:
+                return 0
+            self._meta.executemany("DELETE FROM rows WHERE row = ?", [(r,) for r in rows])
+            self._meta.commit()
+            live = self._live.copy()
+            live[np.asarray(rows, dtype=np.int64)] = False
+            self._live = live
+            self._maybe_compact()
+            return len(rows)
+
+    def update_metadatas(self, ids: list[str], metadatas: list[dict]) -> None:
+        """Replace the stored metadata of ``ids`` and re-index their space membership."""
+        with self._lock:
+            self.open()
+            self._meta.executemany(
+                "UPDATE rows SET metadata = ?, space_ids = ? WHERE chroma_id = ?",
+                [(json.dumps(m), str(m.get("space_ids", "")), i) for i, m in zip(ids, metadatas)],
+            )
+            self._meta.commit()
+            records = self._meta.execute("SELECT row, space_ids FROM rows WHERE row < ?", (self._size,)).fetchall()
+            self._space_rows = self._index_spaces(np.array([r[0] for r in records], dtype=np.int64), [r[1] for r in records])
+
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        self.open()
+        with self._lock:
+            return {r[0] for r in self._lookup("chroma_id", ids)}
+
+    def scan(self, page_size: int):
+        """Yield ``(ids, metadatas)`` pages over every stored row, in row order."""
+        self.open()
+        after = -1
+        while True:
+            with self._lock:
+                page = self._meta.execute(
+                    "SELECT row, chroma_id, metadata FROM rows WHERE row > ? ORDER BY row LIMIT ?", (after, page_size)
+                ).fetchall()
+            if not page:
+                return
+            after = page[-1][0]
+            yield [r[1] for r in page], [json.loads(r[2]) for r in page]
+
+    def get_embeddings(self, ids: list[str]) -> dict[str, np.ndarray]:
+        """Stored float32 vectors (normalized) for whichever of ``ids`` exist."""
+        self.open()
+        with self._lock:
+            found = self._lookup("row, chroma_id", ids)
+            if not found:
+                return {}
+            vectors = np.asarray(self._vectors[np.array([r[0] for r in found], dtype=np.int64)], dtype=np.float32)
+        return {chroma_id: vectors[i] for i, (_, chroma_id) in enumerate(found)}
+
+    def clear(self) -> None:
+        """Delete every row and the files backing them."""
+        with self._lock:
+            self.open()
+            self._meta.close()
+            self._meta = None
+            self._vectors = None
+            for f in self.path.glob("*"):
+                if f.is_file() and f.name != ".lock":
+                    f.unlink()
+            self._generation += 1
+            self._file_generation = 0
+            self.dim = None
+            self._size = 0
+            self._live = np.zeros(0, dtype=bool)
+            self._document_ids = np.zeros(0, dtype=np.int64)
+            self._space_rows = {}
+            self._codes = None
+            self._scales = None
+
+    def _rows_for(self, ids: list[str]) -> list[int]:
+        return [r[0] for r in self._lookup("row", ids)]
+
+    def _lookup(self, column: str, ids: list[str]) -> list[tuple]:
+        found = []
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            found.extend(self._meta.execute(
+                f"SELECT {column} FROM rows WHERE chroma_id IN ({','.join('?' * len(batch))})", batch
+            ))
+        return found
+
+    def get_by_document_id(self, document_id: int) -> dict:
+        self.open()
+        with self._lock:
+            rows = self._meta.execute(
+                "SELECT chroma_id, metadata FROM rows WHERE document_id = ? ORDER BY row",
+                (document_id,),
+            ).fetchall()
+        return {
+            "ids": [r[0] for r in rows],
+            "metadatas": [json.loads(r[1]) for r in rows],
+        }
+
+    def count(self) -> int:
+        self.open()
+        return int(self._live[:self._size].sum())
+
+    def _maybe_compact(self) -> None:
+        dead = self._size - int(self._live[:self._size].sum())
+        if dead >= self.COMPACT_MIN_DEAD and dead >= self.COMPACT_DEAD_FRACTION * self._size:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the files without tombstoned rows and renumber the side-table."""
+        with self._lock:
+            self.open()
+            if self._size == 0:
+                return
+            keep = np.flatnonzero(self._live[:self._size])
+            new_rows = {int(old): new for new, old in enumerate(keep)}
+
+            # The compacted rows go to files of the next generation, which
+            # become current in the same meta transaction that renumbers the
+            # rows; until then the old files stay in use.
+            old_files = [f for f, _ in self._row_files()]
+            self._file_generation += 1
+            try:
+                np.asarray(self._vectors[keep]).tofile(self.vectors_file)
+                if self._codes is not None:
+                    self._codes[keep].tofile(self.codes_file)
+                if self._scales is not None:
+                    self._scales[keep].tofile(self.scales_file)
+
+                self._meta.executemany("UPDATE rows SET row = ? WHERE row = ?", [(-new - 1, old) for old, new in new_rows.items()])
+                self._meta.execute("UPDATE rows SET row = -row - 1")
+                self._meta.execute(
+                    "INSERT OR REPLACE INTO info (key, value) VALUES ('file_generation', ?)", (str(self._file_generation),)
+                )
+                self._meta.commit()
+            except BaseException:
+                self._meta.rollback()
+                self._file_generation -= 1
+                self._remove_stale_files()
+                raise
+
+            self._vectors = None
+            self._codes = None
+            self._scales = None
+            self._generation += 1
+            for f in old_files:
+                f.unlink(missing_ok=True)
+            self._load()
+
+    def disk_bytes(self) -> int:
+        return sum(f.stat().st_size for f in self.path.glob("*") if f.is_file())
+
+    def memory_bytes(self) -> int:
+        """Heap held by the index (quantized codes and row bookkeeping); mapped vectors are excluded."""
+        total = self._live.nbytes + self._document_ids.nbytes + sum(r.nbytes for r in self._space_rows.values())
+        if self._codes is not None:
+            total += self._codes.nbytes
+        if self._scales is not None:
+            total += self._scales.nbytes
+        return total
+
+    def close(self) -> None:
+        with self._lock:
+            if self._meta is not None:
+                self._meta.close()
+                self._meta = None
+            if self._locked:
+                _unlock_directory(self.path)
+                self._locked = False
+            self._vectors = None
@@ -1,74 +1,97 @@
-from pathlib import Path
+import threading
 
-import chromadb
-from chromadb.config import Settings
-
-from app.config import settings, BASE_DIR
+from app.config import settings
+from app.core.tracing import tracer
+from app.services.chunk_store import ChunkTextStore, chunk_texts
+from app.services.vector_backends import VectorStoreBackend, create_backend
 
 
 class VectorStoreService:
-    COLLECTION_NAME = "polidex_chunks"
-
-    def __init__(self, persist_dir: str = settings.chroma_persist_dir):
-        persist_path = Path(persist_dir)
-        if not persist_path.is_absolute():
-            persist_path = BASE_DIR / persist_dir
+    """Vector search over chunk embeddings; query results are hydrated with chunk text from SQLite."""
 
-        persist_path.mkdir(parents=True, exist_ok=True)
-
-        self._client = chromadb.PersistentClient(
-            path=str(persist_path),
-            settings=Settings(anonymized_telemetry=False),
-        )
-        self._collection = None
+    def __init__(
+        self,
+        backend: str | VectorStoreBackend = settings.vector_store_backend,
+        texts: ChunkTextStore = chunk_texts,
+    ):
+        self.texts = texts
+        if isinstance(backend, VectorStoreBackend):
+            self.backend_name = backend.name
+            self._backend = backend
+        else:
+            self.backend_name = backend
+            self._backend = None
+        self._lock = threading.Lock()
 
     @property
-    def collection(self):
-        if self._collection is None:
-            self._collection = self._client.get_or_create_collection(
-                name=self.COLLECTION_NAME,
-                metadata={"hnsw:space": "cosine"},
-            )
-        return self._collection
+    def backend(self) -> VectorStoreBackend:
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = create_backend(self.backend_name)
+        return self._backend
 
+    @tracer.traced("vector_store.add_chunks")
     def add_chunks(
         self,
         ids: list[str],
         embeddings: list[list[float]],
-        documents: list[str],
         metadatas: list[dict],
     ) -> None:
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=documents,
-            metadatas=metadatas,
-        )
+        self.backend.add(ids, embeddings, metadatas)
 
+    @tracer.traced("vector_store.query")
     def query(
         self,
         query_embedding: list[float],
         n_results: int = 5,
         where: dict | None = None,
+        include_embeddings: bool = False,
+        space_id: int | None = None,
     ) -> dict:
-        return self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            where=where,
-            include=["documents", "metadatas", "distances"],
-        )
+        return self.texts.hydrate(self.backend.query([query_embedding], n_results, where, include_embeddings, space_id))
 
+    @tracer.traced("vector_store.query_batch")
+    def query_batch(
+        self,
+        query_embeddings: list[list[float]],
+        n_results: int = 5,
+        where: dict | None = None,
+        include_embeddings: bool = False,
+        space_id: int | None = None,
+    ) -> dict:
+        return self.texts.hydrate(self.backend.query(query_embeddings, n_results, where, include_embeddings, space_id))
+
+    @tracer.traced("vector_store.delete_by_document_id")
     def delete_by_document_id(self, document_id: int) -> None:
-        self.collection.delete(where={"document_id": document_id})
+        self.backend.delete_documents([document_id])
 
+    @tracer.traced("vector_store.get_by_document_id")
     def get_by_document_id(self, document_id: int) -> dict:
-        return self.collection.get(
-            where={"document_id": document_id},
-            include=["documents", "metadatas"],
-        )
+        return self.backend.get_by_document_id(document_id)
 
     def count(self) -> int:
-        return self.collection.count()
+        return self.backend.count()
+
+    def scan(self, page_size: int = 1000):
+        return self.backend.scan(page_size)
+
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        return self.backend.existing_ids(ids)
+
+    @tracer.traced("vector_store.delete_ids")
+    def delete_ids(self, ids: list[str]) -> None:
+        self.backend.delete_ids(ids)
+
+    @tracer.traced("vector_store.update_metadatas")
+    def update_metadatas(self, ids: list[str], metadatas: list[dict]) -> None:
+        self.backend.update_metadatas(ids, metadatas)
+
+    def get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        return self.backend.get_embeddings(ids)
+
+    def clear(self) -> None:
+        self.backend.clear()
 
 
 vector_store = VectorStoreService()
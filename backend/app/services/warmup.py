@@ -0,0 +1,65 @@
+import logging
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+
+from app.models import engine
+from app.services.embedder import embedding_service
+from app.services.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupState:
+    ready: bool = False
+    error: str | None = None
+    phases: dict[str, float] = field(default_factory=dict)
+
+
+class WarmupService:
+    def __init__(self):
+        self.state = WarmupState()
+
+    def run(self) -> WarmupState:
+        phases = [
+            ("database", self._touch_database),
+            ("embedding_model", self._load_model),
+            ("embedding_encode", self._encode_dummy),
+            ("vector_store", self._open_collection),
+        ]
+
+        total_start = time.perf_counter()
+        for name, phase in phases:
+            start = time.perf_counter()
+            try:
+                phase()
+            except Exception as e:
+                logger.exception(f"Warm-up phase '{name}' failed")
+                self.state.error = f"{name}: {e}"
+                return self.state
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.state.phases[name] = round(elapsed_ms, 2)
+            logger.info(f"Warm-up phase '{name}' took {elapsed_ms:.1f} ms")
+
+        total_ms = (time.perf_counter() - total_start) * 1000
+        logger.info(f"Warm-up complete in {total_ms:.1f} ms")
+        self.state.ready = True
+        return self.state
+
+    def _touch_database(self) -> None:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    def _load_model(self) -> None:
+        embedding_service.load()
+
+    def _encode_dummy(self) -> None:
+        embedding_service.embed("warm-up")
+
+    def _open_collection(self) -> None:
+        vector_store.count()
+
+
+warmup_service = WarmupService()
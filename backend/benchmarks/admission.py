@@ -0,0 +1,121 @@
+"""Load shedding at the LLM stage when the upstream provider saturates.
+
+Sends queries at a fixed arrival rate through the real ``OpenRouterClient``
+to the in-process fake OpenRouter, whose ``--upstream-capacity`` concurrent
+completions make latency grow once the offered load exceeds what it can
+serve. Each query goes through a ``StageLimiter`` as the pipeline's LLM
+stage does, first unlimited (the previous behaviour) and then with the
+given concurrency, queue and expected-wait limits::
+
+    python -m benchmarks.admission --rps 40 --duration 20 --upstream-capacity 20
+
+Reports, per mode, queries answered within ``--client-timeout``, answered
+too late, and shed with 503, latency of answered queries, how fast shed
+queries were told, and the peak number of queries held in the process.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+
+from app.core.admission import Overloaded, StageLimiter
+from app.core.openrouter import ChatMessage, OpenRouterClient
+from benchmarks.fake_openrouter import FakeConfig, create_app
+from benchmarks.harness import percentile
+
+MODEL = "fake/model"
+MESSAGES = [ChatMessage(role="user", content="ping")]
+
+
+async def run(limiter: StageLimiter, args) -> dict:
+    fake = create_app(FakeConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 10, max_concurrency=args.upstream_capacity,
+    ), seed=0)
+    client = OpenRouterClient(
+        api_key="test",
+        default_model=MODEL,
+        base_url="http://fake/api/v1",
+        transport=httpx.ASGITransport(app=fake),
+    )
+    client.max_retries = 0
+    client.timeout = 3600.0
+
+    answered: list[float] = []
+    shed: list[float] = []
+    outstanding = peak = 0
+
+    async def query() -> None:
+        nonlocal outstanding, peak
+        outstanding += 1
+        peak = max(peak, outstanding)
+        started = time.perf_counter()
+        try:
+            async with limiter.slot():
+                await client.chat(MESSAGES)
+            answered.append(time.perf_counter() - started)
+        except Overloaded:
+            shed.append(time.perf_counter() - started)
+        finally:
+            outstanding -= 1
+
+    tasks = []
+    interval = 1 / args.rps
+    started = time.perf_counter()
+    for i in range(int(args.rps * args.duration)):
+        await asyncio.sleep(max(0.0, started + i * interval - time.perf_counter()))
+        tasks.append(asyncio.create_task(query()))
+    await asyncio.gather(*tasks)
+    await client.aclose()
+
+    in_time = [s for s in answered if s <= args.client_timeout]
+    return {
+        "offered": len(tasks),
+        "in_time": len(in_time),
+        "late": len(answered) - len(in_time),
+        "shed": len(shed),
+        "answered_p50_ms": percentile(answered, 50) * 1000,
+        "answered_p99_ms": percentile(answered, 99) * 1000,
+        "shed_p99_ms": percentile(shed, 99) * 1000,
+        "peak_outstanding": peak,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rps", type=float, default=40.0, help="query arrival rate")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--latency-ms", type=float, default=1000.0, help="upstream latency of one completion")
+    parser.add_argument("--upstream-capacity", type=int, default=20, help="completions the upstream serves at once")
+    parser.add_argument("--concurrency", type=int, default=20, help="LLM stage slots in limited mode")
+    parser.add_argument("--queue", type=int, default=40, help="LLM stage queue bound in limited mode")
+    parser.add_argument("--max-wait-ms", type=float, default=2000.0)
+    parser.add_argument("--client-timeout", type=float, default=5.0, help="seconds after which an answer is useless")
+    args = parser.parse_args()
+
+    modes = {
+        "unlimited": StageLimiter("llm", 0, 0, 0.0),
+        "limited": StageLimiter("llm", args.concurrency, args.queue, args.max_wait_ms / 1000),
+    }
+    print(
+        f"{args.rps:.0f} queries/s for {args.duration:.0f}s; upstream serves {args.upstream_capacity} "
+        f"at {args.latency_ms:.0f} ms (~{args.upstream_capacity * 1000 / args.latency_ms:.0f}/s)"
+    )
+    header = (
+        f"{'mode':<11}{'offered':>8}{'in time':>9}{'late':>7}{'shed':>7}"
+        f"{'p50 ms':>9}{'p99 ms':>9}{'shed p99':>10}{'peak held':>11}"
+    )
+    print(header)
+    print("-" * len(header))
+    for mode, limiter in modes.items():
+        r = asyncio.run(run(limiter, args))
+        print(
+            f"{mode:<11}{r['offered']:>8}{r['in_time']:>9}{r['late']:>7}{r['shed']:>7}"
+            f"{r['answered_p50_ms']:>9.0f}{r['answered_p99_ms']:>9.0f}{r['shed_p99_ms']:>10.1f}{r['peak_outstanding']:>11}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Deterministic synthetic corpora for benchmarks."""
+import random
+from pathlib import Path
+
+VOCABULARY = (
+    "space document chunk embedding vector query answer retrieval context model "
+    "index search latency token budget upload policy customer billing account "
+    "invoice refund shipping order product feature release version update error "
+    "request response header payload schema field record table storage backup "
+    "security access key permission admin user team workspace project report"
+).split()
+
+
+def make_text(rng: random.Random, words: int) -> str:
+    paragraphs = []
+    remaining = words
+    while remaining > 0:
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            length = min(remaining, rng.randint(6, 20))
+            if length <= 0:
+                break
+            sentence = " ".join(rng.choice(VOCABULARY) for _ in range(length))
+            sentences.append(sentence.capitalize() + rng.choice([".", ".", ".", "?", "!"]))
+            remaining -= length
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+
+def make_corpus(documents: int, words_per_document: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [make_text(rng, words_per_document) for _ in range(documents)]
+
+
+def write_files(directory: Path, text: str, stem: str = "sample") -> dict[str, Path]:
+    """Write ``text`` as .txt, .md, .docx and .pdf files and return them by suffix."""
+    directory.mkdir(parents=True, exist_ok=True)
+    files = {}
+
+    txt_path = directory / f"{stem}.txt"
+    txt_path.write_text(text, encoding="utf-8")
+    files[".txt"] = txt_path
+
+    md_path = directory / f"{stem}.md"
+    md_path.write_text(f"# {stem}\n\n{text}", encoding="utf-8")
+    files[".md"] = md_path
+
+    from docx import Document as DocxDocument
+
+    docx_path = directory / f"{stem}.docx"
+    doc = DocxDocument()
+    for paragraph in text.split("\n\n"):
+        doc.add_paragraph(paragraph)
+    doc.save(docx_path)
+    files[".docx"] = docx_path
+
+    import fitz
+
+    pdf_path = directory / f"{stem}.pdf"
+    pdf = fitz.open()
+    paragraphs = text.split("\n\n")
+    per_page = 4
+    for i in range(0, len(paragraphs), per_page):
+        page = pdf.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), "\n\n".join(paragraphs[i:i + per_page]), fontsize=8)
+    pdf.save(pdf_path)
+    pdf.close()
+    files[".pdf"] = pdf_path
+
+    return files
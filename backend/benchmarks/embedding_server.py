@@ -0,0 +1,146 @@
+"""Memory and throughput of per-worker embedding models versus the shared embedding server.
+
+For each worker count, starts that many processes issuing single-query
+embeds from several threads each, first with every process loading its own
+model, then with all of them talking to one ``app.embedding_server`` over a
+Unix socket. Reports embeds/sec, p50/p99 latency, total resident memory and,
+for the server, how many texts went into each model call::
+
+    python -m benchmarks.embedding_server --workers 1,2,4 --threads 4 --duration 10
+"""
+import argparse
+import multiprocessing
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from app.config import settings
+from app.services.embedder import EmbeddingService
+from benchmarks.harness import percentile
+from benchmarks.load import DEFAULT_QUESTIONS
+
+
+def rss_bytes(pid: str | int = "self") -> int:
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * 4096
+
+
+def run_worker(model: str, server_url: str, threads: int, duration: float, start_at: float, results) -> None:
+    service = EmbeddingService(model, server_url=server_url)
+    service.load()
+    service.embed("warm-up")
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def loop(offset: int) -> None:
+        local = []
+        i = offset
+        while time.time() < start_at + duration:
+            started = time.perf_counter()
+            service.embed(DEFAULT_QUESTIONS[i % len(DEFAULT_QUESTIONS)])
+            local.append((time.perf_counter() - started) * 1000)
+            i += 1
+        with lock:
+            latencies.extend(local)
+
+    time.sleep(max(start_at - time.time(), 0))
+    pool = [threading.Thread(target=loop, args=(t,)) for t in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put({"latencies": latencies, "rss": rss_bytes()})
+
+
+def server_stats(socket: Path) -> float:
+    transport = httpx.HTTPTransport(uds=str(socket))
+    with httpx.Client(transport=transport, base_url="http://embedding-server") as client:
+        values = {}
+        for line in client.get("/metrics").text.splitlines():
+            name, _, value = line.partition(" ")
+            if name in ("polidex_embedding_batch_size_sum", "polidex_embedding_batch_size_count"):
+                values[name] = float(value)
+    count = values.get("polidex_embedding_batch_size_count", 0)
+    return values.get("polidex_embedding_batch_size_sum", 0) / count if count else 0.0
+
+
+def measure(args, workers: int, server_url: str) -> dict:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    # Leave time for every process to import and load before the clock starts.
+    start_at = time.time() + args.startup_seconds
+    processes = [
+        context.Process(
+            target=run_worker, args=(args.model, server_url, args.threads, args.duration, start_at, results)
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = [ms for report in reports for ms in report["latencies"]]
+    return {
+        "embeds_per_second": len(latencies) / args.duration,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "rss_bytes": sum(report["rss"] for report in reports),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker process counts")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent requests per worker")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--startup-seconds", type=float, default=20.0)
+    parser.add_argument("--model", default=settings.embedding_model)
+    parser.add_argument("--max-batch", type=int, default=settings.embedding_server_max_batch)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.embedding_server_max_wait_ms)
+    args = parser.parse_args()
+
+    header = f"{'mode':<8}{'workers':>8}{'embeds/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'RSS MB':>9}{'texts/call':>12}"
+    print(f"{args.threads} threads per worker, {args.duration:.0f}s per run")
+    print(header)
+    print("-" * len(header))
+    workdir = Path(tempfile.mkdtemp(prefix="polidex-embed-"))
+    try:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            local = measure(args, workers, server_url="")
+            print(
+                f"{'local':<8}{workers:>8}{local['embeds_per_second']:>10.0f}{local['p50_ms']:>9.1f}"
+                f"{local['p99_ms']:>9.1f}{local['rss_bytes'] / 1e6:>9.0f}{'':>12}"
+            )
+
+            socket = workdir / f"embed-{workers}.sock"
+            server = subprocess.Popen([
+                sys.executable, "-m", "app.embedding_server", "--socket", str(socket), "--model", args.model,
+                "--max-batch", str(args.max_batch), "--max-wait-ms", str(args.max_wait_ms),
+            ])
+            try:
+                EmbeddingService(args.model, server_url=f"unix://{socket}").load(timeout=args.startup_seconds * 3)
+                shared = measure(args, workers, server_url=f"unix://{socket}")
+                texts_per_call = server_stats(socket)
+                rss = shared["rss_bytes"] + rss_bytes(server.pid)
+            finally:
+                server.terminate()
+                server.wait()
+            print(
+                f"{'server':<8}{workers:>8}{shared['embeds_per_second']:>10.0f}{shared['p50_ms']:>9.1f}"
+                f"{shared['p99_ms']:>9.1f}{rss / 1e6:>9.0f}{texts_per_call:>12.1f}"
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Event-loop lag while request handlers hit the database, sync Session versus AsyncSession.
+
+Replays the database work of an external query under concurrency: API key
+lookup, usage update, query log insert and a document listing. In ``sync``
+mode the statements run through a blocking ``Session`` on the event loop, as
+the handlers did before the async path; in ``async`` mode they go through
+``APIKeyService``/``QueryLogger`` on an ``AsyncSession``. A probe task sleeps
+for ``--tick-ms`` in a loop and records how late it wakes up::
+
+    python -m benchmarks.event_loop_lag --documents 500 --concurrency 32 --duration 5
+"""
+import argparse
+import asyncio
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, selectinload
+
+from app.models import Base, APIKey, Document, QueryLog
+from app.services.api_key_service import APIKeyService
+from app.services.query_logger import query_logger
+from benchmarks.harness import percentile
+from benchmarks.index_rebuild import CHUNKS_PER_DOCUMENT, populate
+
+
+async def probe(tick: float, stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append((time.perf_counter() - started - tick) * 1000)
+
+
+def listing():
+    return select(Document).options(selectinload(Document.spaces)).order_by(Document.created_at.desc())
+
+
+async def sync_request(session_factory, api_key_id: int) -> None:
+    with session_factory() as db:
+        api_key = db.get(APIKey, api_key_id)
+        api_key.request_count += 1
+        api_key.last_used_at = datetime.utcnow()
+        db.commit()
+        db.add(QueryLog(
+            api_key_id=api_key_id, query_text="q", response_text="a", chunks_retrieved=3,
+            latency_ms=1.0, model_used="m", source="bench",
+        ))
+        db.commit()
+        db.scalars(listing()).all()
+    await asyncio.sleep(0)
+
+
+async def async_request(session_factory, service: APIKeyService, raw_key: str) -> None:
+    async with session_factory() as db:
+        api_key = await service.verify(db, raw_key)
+        await service.update_usage(db, api_key)
+        await query_logger.log(
+            db, query_text="q", response_text="a", chunks_retrieved=3,
+            latency_ms=1.0, model_used="m", source="bench", api_key_id=api_key.id,
+        )
+        (await db.scalars(listing())).all()
+
+
+async def run(mode: str, args, path: Path, service: APIKeyService, api_key_id: int, raw_key: str) -> dict:
+    if mode == "sync":
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+        request = lambda: sync_request(session_factory, api_key_id)  # noqa: E731
+    else:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        request = lambda: async_request(session_factory, service, raw_key)  # noqa: E731
+        # One Argon2 check up front; both modes then measure the cached-key path
+        async with session_factory() as db:
+            await service.verify(db, raw_key)
+
+    stop = asyncio.Event()
+    lags: list[float] = []
+    completed = 0
+
+    async def client() -> None:
+        nonlocal completed
+        while not stop.is_set():
+            await request()
+            completed += 1
+
+    probe_task = asyncio.create_task(probe(args.tick_ms / 1000, stop, lags))
+    clients = [asyncio.create_task(client()) for _ in range(args.concurrency)]
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(probe_task, *clients)
+    if mode == "async":
+        await engine.dispose()
+    else:
+        engine.dispose()
+
+    return {
+        "requests_per_second": completed / args.duration,
+        "lag_p50_ms": percentile(lags, 50),
+        "lag_p99_ms": percentile(lags, 99),
+        "lag_max_ms": max(lags, default=0.0),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=400, help="documents in the listing")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--tick-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="polidex-loop-"))
+    try:
+        path = workdir / "bench.db"
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        populate(session_factory, args.documents * CHUNKS_PER_DOCUMENT, dim=8, seed=0)
+        service = APIKeyService()
+        with session_factory() as db:
+            api_key, raw_key = service.create(db, name="bench", space_id=1)
+            api_key_id = api_key.id
+        engine.dispose()
+
+        print(f"{args.concurrency} concurrent requests, {args.documents} documents, {args.duration:.0f}s per mode")
+        header = f"{'mode':<8}{'req/s':>9}{'lag p50':>10}{'lag p99':>10}{'lag max':>10}"
+        print(header)
+        print("-" * len(header))
+        for mode in ("sync", "async"):
+            r = asyncio.run(run(mode, args, path, service, api_key_id, raw_key))
+            print(
+                f"{mode:<8}{r['requests_per_second']:>9.0f}{r['lag_p50_ms']:>10.1f}"
+                f"{r['lag_p99_ms']:>10.1f}{r['lag_max_ms']:>10.1f}"
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""Local stand-in for the OpenRouter chat completions API.
+
+Serves ``POST /chat/completions`` (also under ``/api/v1``) with configurable
+latency, jitter, error injection and usage/cost payloads, including
+``"stream": true`` server-sent events, deterministic first-N failures and a
+slow tail (``slow_rate`` of requests take ``slow_latency_ms``). With
+``max_concurrency`` set, non-streaming completions beyond that many queue
+upstream, so latency grows with load like a saturated provider. Point the backend at it with::
+
+    python -m benchmarks.fake_openrouter --port 8001 --latency-ms 800 --error-rate 0.02
+    OPENROUTER_BASE_URL=http://127.0.0.1:8001/api/v1 uvicorn app.main:app
+
+Behaviour can be changed while running via ``PUT /_fake/config`` and request
+counters are available from ``GET /_fake/stats``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field, asdict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = 500.0
+    jitter_ms: float = 100.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    fail_first_n: int = 0
+    slow_rate: float = 0.0
+    slow_latency_ms: float = 5000.0
+    completion_tokens: int = 120
+    cost_per_1k_tokens: float = 0.0005
+    stream_chunks: int = 12
+    max_concurrency: int = 0
+    model_latency_ms: dict[str, float] = field(default_factory=dict)
+    model_error_rate: dict[str, float] = field(default_factory=dict)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def create_app(config: FakeConfig | None = None, seed: int | None = None) -> FastAPI:
+    app = FastAPI(title="Fake OpenRouter")
+    app.state.config = config or FakeConfig()
+    app.state.stats = Counter()
+    rng = random.Random(seed)
+    capacity = asyncio.Semaphore(app.state.config.max_concurrency) if app.state.config.max_concurrency else None
+
+    def completion_text(model: str, tokens: int) -> str:
+        words = ["The", "answer", "is", "based", "on", "the", "provided", "context."]
+        return f"[{model}] " + " ".join(words[i % len(words)] for i in range(tokens))
+
+    def usage_payload(prompt_tokens: int, completion_tokens: int) -> dict:
+        cfg: FakeConfig = app.state.config
+        total = prompt_tokens + completion_tokens
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total,
+            "cost": round(total / 1000 * cfg.cost_per_1k_tokens, 8),
+        }
+
+    async def chat_completions(request: Request):
+        cfg: FakeConfig = app.state.config
+        body = await request.json()
+        model = body.get("model", "fake/model")
+        stats = app.state.stats
+        stats["requests"] += 1
+        stats[f"model:{model}"] += 1
+
+        latency = cfg.model_latency_ms.get(model, cfg.latency_ms)
+        latency = max(0.0, rng.gauss(latency, cfg.jitter_ms)) if cfg.jitter_ms else latency
+        if cfg.slow_rate and rng.random() < cfg.slow_rate:
+            latency = cfg.slow_latency_ms
+            stats["slow"] += 1
+        error_rate = cfg.model_error_rate.get(model, cfg.error_rate)
+
+        if stats["requests"] <= cfg.fail_first_n or rng.random() < error_rate:
+            await asyncio.sleep(latency / 1000 / 4)
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=cfg.error_status,
+                content={"error": {"code": cfg.error_status, "message": "Injected failure"}},
+            )
+
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in body.get("messages", []))
+        completion_tokens = min(body.get("max_tokens") or cfg.completion_tokens, cfg.completion_tokens)
+        content = completion_text(model, completion_tokens)
+        completion_id = f"gen-{uuid.uuid4().hex[:12]}"
+
+        if not body.get("stream"):
+            if capacity is None:
+                await asyncio.sleep(latency / 1000)
+            else:
+                async with capacity:
+                    await asyncio.sleep(latency / 1000)
+            stats["completed"] += 1
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage_payload(prompt_tokens, completion_tokens),
+            }
+
+        async def events():
+            words = content.split(" ")
+            per_chunk = max(1, len(words) // max(cfg.stream_chunks, 1))
+            delay = latency / 1000 / max(cfg.stream_chunks, 1)
+            for i in range(0, len(words), per_chunk):
+                await asyncio.sleep(delay)
+                piece = " ".join(words[i:i + per_chunk]) + " "
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "usage": usage_payload(prompt_tokens, completion_tokens),
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+            stats["completed"] += 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app.add_api_route("/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/api/v1/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/_fake/config")
+    async def get_config():
+        return asdict(app.state.config)
+
+    @app.put("/_fake/config")
+    async def update_config(request: Request):
+        updates = await request.json()
+        current = asdict(app.state.config)
+        current.update({k: v for k, v in updates.items() if k in current})
+        app.state.config = FakeConfig(**current)
+        return current
+
+    @app.get("/_fake/stats")
+    async def get_stats():
+        return dict(app.state.stats)
+
+    @app.delete("/_fake/stats")
+    async def reset_stats():
+        app.state.stats.clear()
+        return {}
+
+    return app
+
+
+def parse_mapping(values: list[str]) -> dict[str, float]:
+    mapping = {}
+    for value in values:
+        key, _, number = value.rpartition("=")
+        mapping[key] = float(number)
+    return mapping
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--fail-first-n", type=int, default=0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency-ms", type=float, default=5000.0)
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--cost-per-1k-tokens", type=float, default=0.0005)
+    parser.add_argument("--max-concurrency", type=int, default=0, help="completions served at once; 0 is unlimited")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=MS")
+    parser.add_argument("--model-error-rate", action="append", default=[], metavar="MODEL=RATE")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = FakeConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        fail_first_n=args.fail_first_n,
+        slow_rate=args.slow_rate,
+        slow_latency_ms=args.slow_latency_ms,
+        completion_tokens=args.completion_tokens,
+        cost_per_1k_tokens=args.cost_per_1k_tokens,
+        max_concurrency=args.max_concurrency,
+        model_latency_ms=parse_mapping(args.model_latency),
+        model_error_rate=parse_mapping(args.model_error_rate),
+    )
+    uvicorn.run(create_app(config, seed=args.seed), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Timing, memory and baseline-comparison helpers shared by the benchmark scripts."""
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+
+@dataclass
+class BenchResult:
+    name: str
+    iterations: int
+    ops_per_sec: float
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    peak_memory_kb: float
+    params: dict = field(default_factory=dict)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def run_benchmark(
+    name: str,
+    fn: Callable[[], object],
+    iterations: int = 20,
+    warmup: int = 2,
+    ops_per_call: int = 1,
+    params: dict | None = None,
+) -> BenchResult:
+    """Time ``fn`` ``iterations`` times, then measure its peak allocation in a separate traced run.
+
+    ``ops_per_call`` lets a call that processes a batch report per-item throughput.
+    """
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    samples = []
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    total_s = sum(samples) / 1000
+    return BenchResult(
+        name=name,
+        iterations=iterations,
+        ops_per_sec=round(iterations * ops_per_call / total_s, 2) if total_s else 0.0,
+        mean_ms=round(statistics.fmean(samples), 4),
+        p50_ms=round(percentile(samples, 50), 4),
+        p99_ms=round(percentile(samples, 99), 4),
+        peak_memory_kb=round(peak / 1024, 1),
+        params=params or {},
+    )
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def save_results(path: Path, results: list[BenchResult], params: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "environment": environment(),
+        "params": params,
+        "results": {r.name: asdict(r) for r in results},
+    }
+    path.write_text(json.dumps(payload, indent=2))
+
+
+def load_results(path: Path) -> dict[str, dict]:
+    return json.loads(path.read_text())["results"]
+
+
+def compare(results: list[BenchResult], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Return a message per benchmark whose throughput or median latency regressed beyond ``threshold``."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if not base:
+            continue
+
+        if base["ops_per_sec"] and result.ops_per_sec < base["ops_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{result.name}: ops/sec {result.ops_per_sec:.2f} vs baseline {base['ops_per_sec']:.2f}"
+            )
+        if base["p50_ms"] and result.p50_ms > base["p50_ms"] * (1 + threshold):
+            regressions.append(
+                f"{result.name}: p50 {result.p50_ms:.3f} ms vs baseline {base['p50_ms']:.3f} ms"
+            )
+    return regressions
+
+
+def print_table(results: list[BenchResult], baseline: dict[str, dict] | None = None) -> None:
+    header = f"{'benchmark':<28}{'ops/sec':>12}{'p50 ms':>12}{'p99 ms':>12}{'peak KiB':>12}"
+    if baseline:
+        header += f"{'vs base':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        line = f"{r.name:<28}{r.ops_per_sec:>12.2f}{r.p50_ms:>12.3f}{r.p99_ms:>12.3f}{r.peak_memory_kb:>12.1f}"
+        if baseline and r.name in baseline and baseline[r.name]["ops_per_sec"]:
+            change = r.ops_per_sec / baseline[r.name]["ops_per_sec"] - 1
+            line += f"{change:>+10.1%}"
+        print(line)
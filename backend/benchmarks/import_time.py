@@ -0,0 +1,98 @@
+"""Import-time budget check for the application entry point.
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter and
+fails when the cumulative import time exceeds the budget or when any of the
+heavy dependencies that must stay lazy get imported.
+
+    python -m benchmarks.import_time --budget-ms 1500
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+DEFERRED_MODULES = [
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "chromadb",
+    "fitz",
+    "docx",
+]
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = parse_importtime(result.stderr)
+
+    probe = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+    )
+    loaded = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:15]
+    return {
+        "module": module,
+        "cumulative_ms": timings.get(module, (0, 0))[1] / 1000,
+        "deferred_modules_loaded": json.loads(loaded.stdout),
+        "slowest_self_ms": {name: self_us / 1000 for name, (self_us, _) in slowest},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--runs", type=int, default=3, help="best-of-N to smooth out noise")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    reports = [measure(args.module) for _ in range(args.runs)]
+    report = min(reports, key=lambda r: r["cumulative_ms"])
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {report['module']}: {report['cumulative_ms']:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        for name, ms in report["slowest_self_ms"].items():
+            print(f"  {ms:8.1f} ms  {name}")
+
+    failed = False
+    if report["cumulative_ms"] > args.budget_ms:
+        print(f"FAIL: import time {report['cumulative_ms']:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    if report["deferred_modules_loaded"]:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(report['deferred_modules_loaded'])}")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
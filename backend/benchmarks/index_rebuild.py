@@ -0,0 +1,90 @@
+"""Throughput of rebuilding a vector index from the embeddings stored with each chunk.
+
+Fills a scratch SQLite database with synthetic documents and chunks carrying
+packed embeddings, then times ``IndexBuilder.rebuild`` into each backend and
+reports chunks/sec. No embedding model is loaded::
+
+    python -m benchmarks.index_rebuild --chunks 200000 --dim 384
+    python -m benchmarks.index_rebuild --backends flat --batch-size 10000
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Chunk, Document, Space, document_spaces
+from app.services.chunk_store import pack_embeddings
+from app.services.index_builder import IndexBuilder
+from app.services.vector_backends import create_backend
+from benchmarks.vector_storage import make_vectors
+
+CHUNKS_PER_DOCUMENT = 20
+
+
+def populate(session_factory, chunks: int, dim: int, seed: int) -> None:
+    data, _ = make_vectors(chunks, dim, 1, seed)
+    documents = (chunks + CHUNKS_PER_DOCUMENT - 1) // CHUNKS_PER_DOCUMENT
+    with session_factory() as db:
+        db.execute(insert(Space), [{"id": 1, "name": "bench"}])
+        db.execute(insert(Document), [
+            {"id": d + 1, "filename": f"doc-{d}.md", "file_type": "md", "file_size": 0,
+             "file_path": "", "content_hash": f"hash-{d}", "chunk_count": CHUNKS_PER_DOCUMENT}
+            for d in range(documents)
+        ])
+        db.execute(insert(document_spaces), [{"document_id": d + 1, "space_id": 1} for d in range(documents)])
+        for start in range(0, chunks, 10000):
+            end = min(start + 10000, chunks)
+            blobs = pack_embeddings(data[start:end])
+            db.execute(insert(Chunk), [
+                {"document_id": i // CHUNKS_PER_DOCUMENT + 1, "chunk_index": i % CHUNKS_PER_DOCUMENT,
+                 "content": f"chunk {i}", "start_char": 0, "end_char": 0, "chroma_id": f"c{i}",
+                 "embedding": blobs[i - start]}
+                for i in range(start, end)
+            ])
+        db.commit()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--backends", default="flat,chroma")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    backends = args.backends.split(",")
+    if "chroma" in backends:
+        try:
+            import chromadb  # noqa: F401
+        except ImportError:
+            print("chromadb not installed, skipping the Chroma backend")
+            backends.remove("chroma")
+
+    workdir = Path(tempfile.mkdtemp(prefix="polidex-rebuild-"))
+    try:
+        engine = create_engine(f"sqlite:///{workdir / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        populate(session_factory, args.chunks, args.dim, args.seed)
+
+        print(f"{args.chunks} chunks x {args.dim} dims, batches of {args.batch_size}")
+        header = f"{'backend':<10}{'seconds':>10}{'chunks/s':>12}"
+        print(header)
+        print("-" * len(header))
+        for name in backends:
+            backend = create_backend(name, workdir / name)
+            report = IndexBuilder(args.batch_size, session_factory).rebuild(backend)
+            assert backend.count() == args.chunks
+            print(f"{name:<10}{report.seconds:>10.2f}{report.chunks_per_second:>12.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""Open-loop load driver for a running Polidex backend.
+
+Sends a weighted mix of external queries (``/api/v1/query``), admin chat
+(``/api/chat/query``) and document uploads (``/api/documents/upload``) at a
+target request rate and reports throughput, latency percentiles and error
+rates per endpoint. Pair it with ``benchmarks.fake_openrouter`` so LLM calls
+stay local and free::
+
+    python -m benchmarks.load --api-key pdx_... --space-id 1 --rps 20 --duration 60 \\
+        --mix query=0.8,chat=0.15,upload=0.05 --output benchmarks/results/load.json
+
+Admin chat and uploads carry per-client rate limits (30/min and 10/min); those
+rejections are reported as 429s rather than counted as server errors.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from benchmarks.corpus import make_text
+from benchmarks.harness import percentile
+
+DEFAULT_QUESTIONS = [
+    "How do I create a new space?",
+    "What file types can I upload?",
+    "How do API keys work?",
+    "How are documents chunked?",
+    "What does the query endpoint return?",
+    "How do I revoke an API key?",
+]
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int
+    latency_ms: float
+    error: str | None = None
+
+
+class LoadDriver:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.samples: list[Sample] = []
+        self.questions = DEFAULT_QUESTIONS
+        if args.questions:
+            self.questions = [q for q in Path(args.questions).read_text().splitlines() if q.strip()]
+        self.mix = self._parse_mix(args.mix)
+        self.in_flight = asyncio.Semaphore(args.max_in_flight)
+        self.dropped = 0
+
+    def _parse_mix(self, mix: str) -> list[tuple[str, float]]:
+        weights = []
+        for part in mix.split(","):
+            name, _, weight = part.partition("=")
+            if name not in ("query", "chat", "upload"):
+                raise ValueError(f"Unknown endpoint in mix: {name}")
+            weights.append((name, float(weight or 1)))
+        return weights
+
+    def _pick_endpoint(self) -> str:
+        names, weights = zip(*self.mix)
+        return self.rng.choices(names, weights=weights)[0]
+
+    def _admin_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.args.admin_token}"} if self.args.admin_token else {}
+
+    async def _send(self, client: httpx.AsyncClient, endpoint: str) -> httpx.Response:
+        if endpoint == "query":
+            return await client.post(
+                "/api/v1/query",
+                headers={"X-API-Key": self.args.api_key},
+                json={"query": self.rng.choice(self.questions), "top_k": self.args.top_k},
+            )
+        if endpoint == "chat":
+            return await client.post(
+                "/api/chat/query",
+                headers=self._admin_headers(),
+                json={"query": self.rng.choice(self.questions), "space_id": self.args.space_id, "top_k": self.args.top_k},
+            )
+        content = f"# Load test {uuid.uuid4()}\n\n" + make_text(self.rng, self.args.upload_words)
+        return await client.post(
+            "/api/documents/upload",
+            headers=self._admin_headers(),
+            files={"file": (f"load-{uuid.uuid4().hex[:8]}.md", content.encode(), "text/markdown")},
+            data={"space_ids": str(self.args.space_id)},
+        )
+
+    async def _fire(self, client: httpx.AsyncClient, endpoint: str) -> None:
+        async with self.in_flight:
+            start = time.perf_counter()
+            try:
+                response = await self._send(client, endpoint)
+                status, error = response.status_code, None
+                if status >= 400:
+                    error = response.text[:200]
+            except httpx.HTTPError as e:
+                status, error = 0, f"{type(e).__name__}: {e}"
+            self.samples.append(Sample(endpoint, status, (time.perf_counter() - start) * 1000, error))
+
+    async def run(self) -> None:
+        limits = httpx.Limits(max_connections=self.args.max_in_flight, max_keepalive_connections=self.args.max_in_flight)
+        async with httpx.AsyncClient(base_url=self.args.base_url, timeout=self.args.timeout, limits=limits) as client:
+            tasks = []
+            started = time.perf_counter()
+            next_at = started
+            while next_at - started < self.args.duration:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self.in_flight.locked():
+                    self.dropped += 1
+                else:
+                    tasks.append(asyncio.create_task(self._fire(client, self._pick_endpoint())))
+                next_at += self.rng.expovariate(self.args.rps) if self.args.poisson else 1 / self.args.rps
+            await asyncio.gather(*tasks)
+            self.elapsed = time.perf_counter() - started
+
+    def report(self) -> dict:
+        by_endpoint = defaultdict(list)
+        for sample in self.samples:
+            by_endpoint[sample.endpoint].append(sample)
+
+        endpoints = {}
+        for endpoint, samples in sorted(by_endpoint.items()):
+            ok = [s.latency_ms for s in samples if 200 <= s.status < 400]
+            statuses = Counter(str(s.status) for s in samples)
+            errors = sum(1 for s in samples if s.status == 0 or s.status >= 500)
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "throughput_rps": round(len(ok) / self.elapsed, 2),
+                "p50_ms": round(percentile(ok, 50), 1),
+                "p95_ms": round(percentile(ok, 95), 1),
+                "p99_ms": round(percentile(ok, 99), 1),
+                "error_rate": round(errors / len(samples), 4),
+                "rate_limited": statuses.get("429", 0),
+                "statuses": dict(statuses),
+                "sample_errors": sorted({s.error for s in samples if s.error})[:3],
+            }
+
+        return {
+            "target_rps": self.args.rps,
+            "achieved_rps": round(len(self.samples) / self.elapsed, 2),
+            "duration_s": round(self.elapsed, 2),
+            "dropped_at_client": self.dropped,
+            "endpoints": endpoints,
+        }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"target {report['target_rps']} rps, achieved {report['achieved_rps']} rps "
+        f"over {report['duration_s']} s ({report['dropped_at_client']} dropped at client)"
+    )
+    header = f"{'endpoint':<10}{'requests':>10}{'ok rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}{'429s':>7}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<10}{stats['requests']:>10}{stats['throughput_rps']:>10.2f}{stats['p50_ms']:>10.1f}"
+            f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['error_rate']:>9.1%}{stats['rate_limited']:>7}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--admin-token", default="")
+    parser.add_argument("--space-id", type=int, required=True, help="space used for admin chat and uploads")
+    parser.add_argument("--rps", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--mix", default="query=0.8,chat=0.15,upload=0.05")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times instead of fixed")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--upload-words", type=int, default=1500)
+    parser.add_argument("--questions", help="file with one question per line")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the report as JSON")
+    args = parser.parse_args()
+
+    driver = LoadDriver(args)
+    asyncio.run(driver.run())
+    report = driver.report()
+    print_report(report)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""Micro-benchmarks for the ingestion and retrieval hot paths.
+
+Each stage runs in isolation against a synthetic corpus: the vector store
+stages use random unit vectors so they do not depend on the embedding model,
+and the API key stage uses an in-memory SQLite database.
+
+    python -m benchmarks.micro --documents 20 --words 3000 --output benchmarks/results/latest.json
+    python -m benchmarks.micro --baseline benchmarks/results/baseline.json --threshold 0.15
+"""
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.corpus import make_corpus, write_files
+from benchmarks.harness import BenchResult, run_benchmark, save_results, load_results, compare, print_table
+
+STAGES = ["chunk", "extract", "embed", "vector_add", "vector_query", "api_key_verify"]
+
+
+def random_unit_vectors(rng: random.Random, count: int, dimension: int) -> list[list[float]]:
+    vectors = []
+    for _ in range(count):
+        vector = [rng.gauss(0, 1) for _ in range(dimension)]
+        norm = sum(v * v for v in vector) ** 0.5
+        vectors.append([v / norm for v in vector])
+    return vectors
+
+
+def bench_chunk(args, corpus: list[str], workdir: Path) -> list[BenchResult]:
+    from app.services.chunker import TextChunker
+
+    chunker = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    return [run_benchmark(
+        "chunk",
+        lambda: [chunker.chunk(text) for text in corpus],
+        iterations=args.iterations,
+        ops_per_call=len(corpus),
+        params={"documents": len(corpus), "words": args.words},
+    )]
+
+
+def bench_extract(args, corpus: list[str], workdir: Path) -> list[BenchResult]:
+    from app.services.document_processor import DocumentProcessor
+
+    processor = DocumentProcessor()
+    files = write_files(workdir / "extract", corpus[0])
+    return [
+        run_benchmark(
+            f"extract{suffix}",
+            lambda path=path: processor.extract_text(path),
+            iterations=args.iterations,
+            params={"bytes": path.stat().st_size},
+        )
+        for suffix, path in files.items()
+    ]
+
+
+def bench_embed(args, corpus: list[str], workdir: Path) -> list[BenchResult]:
+    from app.services.chunker import TextChunker
+    from app.services.embedder import EmbeddingService
+
+    chunks = [c.content for c in TextChunker(args.chunk_size, args.chunk_overlap).chunk(corpus[0])]
+    batch = (chunks * (args.batch_size // max(len(chunks), 1) + 1))[:args.batch_size]
+    service = EmbeddingService()
+    service.load()
+
+    return [run_benchmark(
+        "embed_batch",
+        lambda: service.embed_batch(batch),
+        iterations=max(args.iterations // 4, 3),
+        warmup=1,
+        ops_per_call=len(batch),
+        params={"batch_size": len(batch), "model": service.model_name},
+    )]
+
+
+def _store(workdir: Path, name: str):
+    from sqlalchemy import create_engine
+
+    from app.config import settings
+    from app.models import Base
+    from app.services.chunk_store import ChunkTextStore
+    from app.services.vector_backends import create_backend
+    from app.services.vector_store import VectorStoreService
+
+    engine = create_engine(f"sqlite:///{workdir / name}.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return VectorStoreService(create_backend(settings.vector_store_backend, workdir / name), ChunkTextStore(engine))
+
+
+def _populated_store(args, workdir: Path, name: str):
+    from sqlalchemy import insert
+
+    from app.models import Chunk
+
+    rng = random.Random(args.seed)
+    store = _store(workdir, name)
+    vectors = random_unit_vectors(rng, args.vectors, args.dimension)
+    for start in range(0, args.vectors, 1000):
+        end = min(start + 1000, args.vectors)
+        with store.texts.engine.begin() as conn:
+            conn.execute(insert(Chunk), [
+                {"document_id": i // 20, "chunk_index": i % 20, "content": f"chunk {i}",
+                 "start_char": 0, "end_char": 0, "chroma_id": f"seed-{i}"}
+                for i in range(start, end)
+            ])
+        store.add_chunks(
+            ids=[f"seed-{i}" for i in range(start, end)],
+            embeddings=vectors[start:end],
+            metadatas=[
+                {"document_id": i // 20, "filename": f"doc-{i // 20}.md", "chunk_index": i % 20, "space_ids": "1"}
+                for i in range(start, end)
+            ],
+        )
+    return store, rng
+
+
+def bench_vector_add(args, corpus: list[str], workdir: Path) -> list[BenchResult]:
+    rng = random.Random(args.seed)
+    store = _store(workdir, "vector_add")
+    vectors = random_unit_vectors(rng, args.batch_size, args.dimension)
+    counter = iter(range(sys.maxsize))
+
+    def add_batch():
+        run = next(counter)
+        store.add_chunks(
+            ids=[f"run-{run}-{i}" for i in range(len(vectors))],
+            embeddings=vectors,
+            metadatas=[
+                {"document_id": run, "filename": f"doc-{run}.md", "chunk_index": i, "space_ids": "1"}
+                for i in range(len(vectors))
+            ],
+        )
+
+    return [run_benchmark(
+        "vector_add",
+        add_batch,
+        iterations=args.iterations,
+        ops_per_call=len(vectors),
+        params={"batch_size": len(vectors), "dimension": args.dimension},
+    )]
+
+
+def bench_vector_query(args, corpus: list[str], workdir: Path) -> list[BenchResult]:
+    store, rng = _populated_store(args, workdir, "vector_query")
+    queries = random_unit_vectors(rng, 64, args.dimension)
+    cursor = iter(range(sys.maxsize))
+
+    return [run_benchmark(
+        "vector_query",
+        lambda: store.query(queries[next(cursor) % len(queries)], n_results=args.top_k * 3),
+        iterations=args.iterations * 5,
+        params={"vectors": args.vectors, "dimension": args.dimension, "n_results": args.top_k * 3},
+    )]
+
+
+def bench_api_key_verify(args, corpus: list[str], workdir: Path) -> list[BenchResult]:
+    import asyncio
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.models import Base, Space
+    from app.services.api_key_service import APIKeyService
+
+    path = workdir / "api_keys.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    service = APIKeyService()
+
+    space = Space(name="bench")
+    db.add(space)
+    db.commit()
+    _, raw_key = service.create(db, name="bench", space_id=space.id)
+    for i in range(args.api_keys - 1):
+        service.create(db, name=f"other-{i}", space_id=space.id)
+    db.close()
+
+    loop = asyncio.new_event_loop()
+    async_db = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{path}"))()
+
+    # Cold verifies hash the key on every call; cached ones hit the verified-key cache
+    services = {"api_key_verify": APIKeyService(cache_ttl=0), "api_key_verify_cached": service}
+    try:
+        return [
+            run_benchmark(
+                name,
+                lambda verifier=verifier: loop.run_until_complete(verifier.verify(async_db, raw_key)),
+                iterations=args.iterations,
+                params={"api_keys": args.api_keys, "cache_ttl": verifier.cache_ttl},
+            )
+            for name, verifier in services.items()
+        ]
+    finally:
+        loop.run_until_complete(async_db.close())
+        loop.close()
+
+
+BENCHMARKS = {
+    "chunk": bench_chunk,
+    "extract": bench_extract,
+    "embed": bench_embed,
+    "vector_add": bench_vector_add,
+    "vector_query": bench_vector_query,
+    "api_key_verify": bench_api_key_verify,
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated subset of {STAGES}")
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--words", type=int, default=3000, help="words per synthetic document")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--vectors", type=int, default=10000, help="vectors preloaded for vector_query")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--api-keys", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare against a previous results file")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    corpus = make_corpus(args.documents, args.words, seed=args.seed)
+    results: list[BenchResult] = []
+    with tempfile.TemporaryDirectory(prefix="polidex-bench-") as tmp:
+        for stage in stages:
+            results.extend(BENCHMARKS[stage](args, corpus, Path(tmp)))
+
+    baseline = load_results(args.baseline) if args.baseline else None
+    print_table(results, baseline)
+
+    if args.output:
+        save_results(args.output, results, params=vars(args) | {"output": str(args.output), "baseline": str(args.baseline)})
+        print(f"\nResults written to {args.output}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
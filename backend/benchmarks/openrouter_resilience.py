@@ -0,0 +1,185 @@
+"""Resilience scenarios for the OpenRouter client against the local fake server.
+
+Runs the real ``OpenRouterClient`` over an in-process ASGI transport (no
+sockets, no API spend) and checks retries, model fallback, the circuit
+breaker and request hedging::
+
+    python -m benchmarks.openrouter_resilience
+    python -m benchmarks.openrouter_resilience --requests 400 --slow-rate 0.05
+
+Exits non-zero if any scenario does not behave as expected. The hedging
+scenario prints p50/p99 with hedging off and on for the same slow-tail
+distribution.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+
+from app.core.openrouter import ChatMessage, OpenRouterClient
+from benchmarks.fake_openrouter import FakeConfig, create_app
+from benchmarks.harness import percentile
+
+PRIMARY = "fake/primary"
+FALLBACK = "fake/fallback"
+MESSAGES = [ChatMessage(role="user", content="ping")]
+
+
+def make_client(config: FakeConfig, seed: int, **overrides) -> tuple[OpenRouterClient, object]:
+    fake = create_app(config, seed=seed)
+    client = OpenRouterClient(
+        api_key="test",
+        default_model=PRIMARY,
+        base_url="http://fake/api/v1",
+        transport=httpx.ASGITransport(app=fake),
+    )
+    client.retry_backoff = 0.01
+    for key, value in overrides.items():
+        setattr(client, key, value)
+    return client, fake
+
+
+async def scenario_retry(seed: int) -> list[str]:
+    client, fake = make_client(FakeConfig(latency_ms=5, jitter_ms=0, fail_first_n=2), seed, max_retries=2)
+    response = await client.chat(MESSAGES)
+    await client.aclose()
+    failures = []
+    if response.model != PRIMARY:
+        failures.append(f"retry: expected {PRIMARY}, got {response.model}")
+    if fake.state.stats["requests"] != 3:
+        failures.append(f"retry: expected 3 upstream attempts, saw {fake.state.stats['requests']}")
+    return failures
+
+
+async def scenario_fallback(seed: int) -> list[str]:
+    config = FakeConfig(latency_ms=5, jitter_ms=0, model_error_rate={PRIMARY: 1.0})
+    client, fake = make_client(config, seed, max_retries=1, fallback_models=[FALLBACK])
+    response = await client.chat(MESSAGES)
+    await client.aclose()
+    failures = []
+    if response.model != FALLBACK:
+        failures.append(f"fallback: expected {FALLBACK}, got {response.model}")
+    if fake.state.stats[f"model:{PRIMARY}"] != 2:
+        failures.append(f"fallback: expected 2 primary attempts, saw {fake.state.stats[f'model:{PRIMARY}']}")
+    return failures
+
+
+async def scenario_fatal(seed: int) -> list[str]:
+    config = FakeConfig(latency_ms=5, jitter_ms=0, error_rate=1.0, error_status=401)
+    client, fake = make_client(config, seed, max_retries=3, fallback_models=[FALLBACK])
+    failures = []
+    try:
+        await client.chat(MESSAGES)
+        failures.append("fatal: expected ValueError on 401")
+    except ValueError:
+        pass
+    await client.aclose()
+    if fake.state.stats["requests"] != 1:
+        failures.append(f"fatal: 401 should not be retried or fall back, saw {fake.state.stats['requests']} attempts")
+    return failures
+
+
+async def scenario_breaker(seed: int) -> list[str]:
+    config = FakeConfig(latency_ms=5, jitter_ms=0, model_error_rate={PRIMARY: 1.0})
+    client, fake = make_client(
+        config, seed,
+        max_retries=0,
+        fallback_models=[FALLBACK],
+        breaker_threshold=3,
+        breaker_cooldown=0.2,
+    )
+    for _ in range(10):
+        await client.chat(MESSAGES)
+    failures = []
+    if fake.state.stats[f"model:{PRIMARY}"] != 3:
+        failures.append(f"breaker: expected 3 primary attempts before opening, saw {fake.state.stats[f'model:{PRIMARY}']}")
+
+    fake.state.config.model_error_rate = {}
+    await asyncio.sleep(0.25)
+    response = await client.chat(MESSAGES)
+    await client.aclose()
+    if response.model != PRIMARY or client.breaker(PRIMARY).state != "closed":
+        failures.append("breaker: half-open probe should close the circuit once the primary recovers")
+    return failures
+
+
+async def timed_run(client: OpenRouterClient, requests: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await client.chat(MESSAGES)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+async def scenario_hedging(args) -> tuple[list[str], dict]:
+    config = FakeConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.latency_ms / 10,
+        slow_rate=args.slow_rate,
+        slow_latency_ms=args.slow_latency_ms,
+    )
+    results = {}
+    for hedge in (False, True):
+        client, fake = make_client(config, args.seed, hedge_enabled=hedge, hedge_min_delay=0.0)
+        latencies = await timed_run(client, args.requests, args.concurrency)
+        await client.aclose()
+        results["on" if hedge else "off"] = {
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "upstream_requests": fake.state.stats["requests"],
+        }
+
+    failures = []
+    if results["on"]["p99_ms"] >= results["off"]["p99_ms"]:
+        failures.append("hedging: p99 did not improve")
+    return failures, results
+
+
+async def run(args) -> int:
+    failures: list[str] = []
+    for name, scenario in (
+        ("retry", scenario_retry),
+        ("fallback", scenario_fallback),
+        ("fatal", scenario_fatal),
+        ("breaker", scenario_breaker),
+    ):
+        found = await scenario(args.seed)
+        print(f"{name:<10}{'FAIL' if found else 'ok'}")
+        failures.extend(found)
+
+    found, results = await scenario_hedging(args)
+    failures.extend(found)
+    print(f"{'hedging':<10}{'FAIL' if found else 'ok'}")
+    for mode, stats in results.items():
+        print(
+            f"  hedge {mode:<4} p50 {stats['p50_ms']:>8.1f} ms  p99 {stats['p99_ms']:>8.1f} ms  "
+            f"upstream requests {stats['upstream_requests']}"
+        )
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--slow-rate", type=float, default=0.03)
+    parser.add_argument("--slow-latency-ms", type=float, default=500.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""Serialization time and bytes on the wire for the large admin listings.
+
+Seeds a scratch database with documents and query logs carrying realistic
+response text, then:
+
+* times building the listing payloads the old way (per-row ``model_validate``
+  into the response model, then ``json.dumps``) against plain row dicts
+  rendered with orjson, and
+* calls the routes through the app, with and without ``?fields=``
+  projection, and reports latency and response size uncompressed, gzip and
+  (when the ``brotli`` package is installed) brotli::
+
+    python -m benchmarks.serialization --documents 2000 --logs 500
+"""
+import argparse
+import json
+import logging
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from app.api.schemas import DocumentListResponse, DocumentResponse, QueryLogListResponse, QueryLogResponse
+from app.config import settings
+from app.core.compression import brotli
+from app.main import app
+from app.models import Base, Document, QueryLog, Space, document_spaces, get_async_db, get_db
+from app.services.query_logger import query_logger
+from benchmarks.corpus import make_text
+from benchmarks.harness import percentile
+
+ROUTES = [
+    "/api/documents",
+    "/api/documents?fields=id,filename,chunk_count",
+    "/api/stats/logs?limit={logs}",
+    "/api/stats/logs?limit={logs}&fields=id,query_text,latency_ms,created_at",
+    "/api/stats/usage?limit={logs}",
+    "/api/stats/usage?limit={logs}&fields=id,cost,created_at",
+]
+
+
+def seed(session_factory, documents: int, logs: int, seed: int) -> None:
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with session_factory() as db:
+        db.execute(insert(Space), [{"id": s + 1, "name": f"space-{s}"} for s in range(10)])
+        db.execute(insert(Document), [
+            {"id": d + 1, "filename": f"document-{d}.pdf", "file_type": "pdf", "file_size": rng.randint(10_000, 5_000_000),
+             "file_path": f"./data/uploads/{d:064x}_document-{d}.pdf", "content_hash": f"{d:064x}",
+             "chunk_count": rng.randint(5, 400), "created_at": now - timedelta(minutes=d)}
+            for d in range(documents)
+        ])
+        db.execute(insert(document_spaces), [
+            {"document_id": d + 1, "space_id": s}
+            for d in range(documents) for s in {d % 10 + 1, (d * 7) % 10 + 1}
+        ])
+        db.execute(insert(QueryLog), [
+            {"api_key_id": None, "query_text": make_text(rng, 15), "response_text": make_text(rng, 250),
+             "chunks_retrieved": 5, "latency_ms": rng.uniform(200, 3000), "model_used": "anthropic/claude-3-haiku",
+             "source": "external_api", "prompt_tokens": 900, "completion_tokens": 300, "cost": 0.0006,
+             "stage_timings": {"auth": 0.4, "embed": 12.1, "retrieve": 3.2, "pack": 0.8, "generate": 950.0},
+             "created_at": now - timedelta(seconds=i)}
+            for i in range(logs)
+        ])
+        db.commit()
+
+
+def timed(fn, iterations: int) -> tuple[float, bytes]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        payload = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return percentile(samples, 50), payload
+
+
+def serialization(session_factory, args) -> None:
+    with session_factory() as db:
+        documents = db.scalars(select(Document).options(selectinload(Document.spaces))).all()
+        fields = list(DocumentResponse.model_fields)
+        log_fields = list(QueryLogResponse.model_fields)
+        log_rows = query_logger.get_recent(db, log_fields, limit=args.logs)
+        log_objects = db.scalars(select(QueryLog).order_by(QueryLog.created_at.desc()).limit(args.logs)).all()
+
+        cases = {
+            "documents": (
+                lambda: json.dumps(jsonable_encoder(DocumentListResponse(
+                    documents=[DocumentResponse.model_validate(d) for d in documents], total=len(documents),
+                ))).encode(),
+                lambda: orjson.dumps({"documents": [
+                    {name: [{"id": s.id, "name": s.name} for s in d.spaces] if name == "spaces" else getattr(d, name)
+                     for name in fields}
+                    for d in documents
+                ], "total": len(documents)}),
+            ),
+            "logs": (
+                lambda: json.dumps(jsonable_encoder(QueryLogListResponse(
+                    logs=[QueryLogResponse.model_validate(log) for log in log_objects], total=len(log_objects),
+                ))).encode(),
+                lambda: orjson.dumps({"logs": log_rows, "total": len(log_rows)}),
+            ),
+        }
+        print(f"{'payload':<12}{'pydantic+json ms':>18}{'dicts+orjson ms':>17}{'speedup':>9}")
+        for name, (before, after) in cases.items():
+            before_ms, _ = timed(before, args.iterations)
+            after_ms, _ = timed(after, args.iterations)
+            print(f"{name:<12}{before_ms:>18.2f}{after_ms:>17.2f}{before_ms / after_ms:>8.1f}x")
+
+
+def routes(path: Path, args) -> None:
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_session_factory = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{path}"), expire_on_commit=False)
+
+    def override_get_db():
+        with session_factory() as db:
+            yield db
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    headers = {"Authorization": f"Bearer {settings.admin_token}"} if settings.admin_token else {}
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+
+    print(f"\n{'route':<72}{'p50 ms':>8}" + "".join(f"{e + ' KB':>12}" for e in encodings))
+    try:
+        client = TestClient(app)
+        for route in ROUTES:
+            route = route.format(logs=args.logs)
+            sizes = []
+            for encoding in encodings:
+                response = client.get(route, headers={**headers, "Accept-Encoding": encoding})
+                response.raise_for_status()
+                sizes.append(int(response.headers["content-length"]))
+            p50, _ = timed(lambda: client.get(route, headers={**headers, "Accept-Encoding": "identity"}), args.iterations)
+            print(f"{route:<72}{p50:>8.1f}" + "".join(f"{size / 1024:>12.1f}" for size in sizes))
+    finally:
+        app.dependency_overrides.clear()
+    if brotli is None:
+        print("brotli not installed; install it to serve br-encoded responses")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--logs", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    workdir = Path(tempfile.mkdtemp(prefix="polidex-serialization-"))
+    try:
+        path = workdir / "bench.db"
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        seed(session_factory, args.documents, args.logs, args.seed)
+
+        print(f"{args.documents} documents, {args.logs} query logs, p50 of {args.iterations} runs\n")
+        serialization(session_factory, args)
+        routes(path, args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
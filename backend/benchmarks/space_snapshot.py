@@ -0,0 +1,67 @@
+"""Throughput and size of space snapshot export and import.
+
+Fills a scratch database with one synthetic space, exports it to an archive,
+then imports the archive into a second, empty database and flat vector
+index. Reports chunks/sec for both directions and the archive size against
+the raw text plus float32 vectors it carries::
+
+    python -m benchmarks.space_snapshot --chunks 100000 --dim 384
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.services.chunk_store import ChunkTextStore
+from app.services.snapshot import SpaceSnapshot
+from app.services.vector_backends import create_backend
+from app.services.vector_store import VectorStoreService
+from benchmarks.index_rebuild import populate
+
+
+def database(path: Path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--segment-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="polidex-snapshot-"))
+    try:
+        _, source_sessions = database(workdir / "source.db")
+        populate(source_sessions, args.chunks, args.dim, args.seed)
+        archive = workdir / "space.tar"
+
+        with source_sessions() as db, open(archive, "wb") as target:
+            exported = SpaceSnapshot(args.segment_size).export_space(db, 1, target)
+
+        target_engine, target_sessions = database(workdir / "target.db")
+        store = VectorStoreService(create_backend("flat", workdir / "index"), ChunkTextStore(target_engine))
+        with target_sessions() as db, open(archive, "rb") as source:
+            imported = SpaceSnapshot(args.segment_size, store).import_space(db, source, name="imported")
+        assert imported.chunks == args.chunks and store.count() == args.chunks
+
+        raw_bytes = sum(len(f"chunk {i}") for i in range(args.chunks)) + args.chunks * args.dim * 4
+        print(f"{args.chunks} chunks x {args.dim} dims, segments of {args.segment_size}")
+        print(f"archive {exported.bytes / 1e6:.1f} MB ({exported.bytes / raw_bytes:.2f}x text + float32 vectors)")
+        print(f"export  {exported.seconds:>7.2f}s {exported.chunks_per_second:>10.0f} chunks/s")
+        print(f"import  {imported.seconds:>7.2f}s {imported.chunks_per_second:>10.0f} chunks/s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
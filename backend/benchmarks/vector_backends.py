@@ -0,0 +1,135 @@
+"""Latency and recall of the vector store backends for space-scoped queries.
+
+Builds one synthetic corpus split into spaces of different sizes, loads it
+into each backend through the ``VectorStoreBackend`` interface, and queries
+every space the way the RAG pipeline does (``top_k * 3`` hits, then keep the
+space's chunks). Recall@k is measured against exact float32 search within
+the space::
+
+    python -m benchmarks.vector_backends --spaces 1000,10000,50000 --other 100000
+    python -m benchmarks.vector_backends --backends flat,flat:int8
+
+Chroma is skipped when ``chromadb`` is not installed.
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services.vector_backends import create_backend
+from app.config import settings
+from benchmarks.harness import percentile
+from benchmarks.vector_storage import make_vectors
+
+BATCH = 5000
+OTHER_SPACE = 0
+
+
+def build_backend(spec: str, path: Path):
+    name, _, precision = spec.partition(":")
+    if name == "flat":
+        settings.vector_index_precision = precision or "float32"
+    return create_backend(name, path)
+
+
+def load(backend, data: np.ndarray, space_of: np.ndarray) -> float:
+    start = time.perf_counter()
+    for s in range(0, len(data), BATCH):
+        end = min(s + BATCH, len(data))
+        backend.add(
+            [f"c{i}" for i in range(s, end)],
+            data[s:end].tolist(),
+            [
+                {"document_id": i // 20, "filename": f"doc-{i // 20}.md", "chunk_index": i % 20,
+                 "space_ids": str(space_of[i])}
+                for i in range(s, end)
+            ],
+        )
+    return time.perf_counter() - start
+
+
+def run_space(backend, probes: np.ndarray, space_id: int, truth: list[set[str]], k: int) -> dict:
+    latencies, recalls = [], []
+    for probe, expected in zip(probes, truth):
+        start = time.perf_counter()
+        results = backend.query([probe.tolist()], n_results=k * 3, space_id=space_id)
+        hits = [
+            chunk_id
+            for chunk_id, meta in zip(results["ids"][0], results["metadatas"][0])
+            if str(space_id) in str(meta["space_ids"]).split(",")
+        ][:k]
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(hits) & expected) / len(expected))
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spaces", default="1000,10000,50000", help="rows per measured space")
+    parser.add_argument("--other", type=int, default=50000, help="rows in an unmeasured space")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--backends", default="chroma,flat,flat:int8")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.spaces.split(",")]
+    total = sum(sizes) + args.other
+    data, probes = make_vectors(total, args.dim, args.queries, args.seed)
+    rng = np.random.default_rng(args.seed)
+    space_of = rng.permutation(np.repeat(np.arange(len(sizes) + 1), [args.other] + sizes))
+
+    normalized = data / np.linalg.norm(data, axis=1, keepdims=True)
+    normalized_probes = probes / np.linalg.norm(probes, axis=1, keepdims=True)
+    truth = {}
+    for space_id in range(1, len(sizes) + 1):
+        rows = np.flatnonzero(space_of == space_id)
+        scores = normalized_probes @ normalized[rows].T
+        truth[space_id] = [{f"c{rows[i]}" for i in np.argsort(-row)[:args.k]} for row in scores]
+
+    specs = args.backends.split(",")
+    workdir = Path(tempfile.mkdtemp(prefix="polidex-backends-"))
+    results = {}
+    try:
+        for spec in specs:
+            if spec == "chroma":
+                try:
+                    import chromadb  # noqa: F401
+                except ImportError:
+                    print("chromadb not installed, skipping the Chroma backend")
+                    continue
+            backend = build_backend(spec, workdir / spec.replace(":", "-"))
+            load_s = load(backend, data, space_of)
+            results[spec] = {"load_s": round(load_s, 2), "spaces": {}}
+            for space_id, size in enumerate(sizes, start=1):
+                results[spec]["spaces"][size] = run_space(backend, probes, space_id, truth[space_id], args.k)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{total} rows x {args.dim} dims in spaces of {args.spaces} (+{args.other}), {args.queries} queries")
+    header = f"{'backend':<12}{'space rows':>12}{'p50 ms':>10}{'p99 ms':>10}{'recall':>10}"
+    print(header)
+    print("-" * len(header))
+    for spec, result in results.items():
+        for size, stats in result["spaces"].items():
+            print(f"{spec:<12}{size:>12}{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats[f'recall@{args.k}']:>10.4f}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
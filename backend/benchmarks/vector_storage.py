@@ -0,0 +1,199 @@
+"""Memory, load time, latency and recall of the vector storage options.
+
+Builds the same synthetic corpus (clustered, normalized vectors) into the
+flat index at each precision and, when ``chromadb`` is installed, into a
+Chroma HNSW collection. Each store is then reopened in a fresh subprocess to
+measure cold load time and resident memory, and queried for p50/p99 latency
+and recall@k against exact float32 search::
+
+    python -m benchmarks.vector_storage --rows 200000 --dim 384
+    python -m benchmarks.vector_storage --rows 1000000 --precisions int8 --no-chroma
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services.vector_index import FlatVectorIndex
+from benchmarks.harness import percentile
+
+BATCH = 5000
+
+
+def make_vectors(rows: int, dim: int, queries: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(rows // 100, 1), dim)).astype(np.float32)
+    data = centers[rng.integers(0, len(centers), rows)] + 0.6 * rng.normal(size=(rows, dim)).astype(np.float32)
+    probes = centers[rng.integers(0, len(centers), queries)] + 0.6 * rng.normal(size=(queries, dim)).astype(np.float32)
+    return data, probes
+
+
+def metadata(i: int) -> dict:
+    return {"document_id": i // 20, "filename": f"doc-{i // 20}.md", "chunk_index": i % 20, "space_ids": "1"}
+
+
+def dir_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096
+
+
+def build(kind: str, path: Path, data: np.ndarray) -> float:
+    start = time.perf_counter()
+    if kind == "chroma":
+        collection = open_chroma(path)
+        for s in range(0, len(data), BATCH):
+            end = min(s + BATCH, len(data))
+            collection.add(
+                ids=[f"c{i}" for i in range(s, end)],
+                embeddings=data[s:end].tolist(),
+                metadatas=[metadata(i) for i in range(s, end)],
+            )
+    else:
+        index = FlatVectorIndex(path, precision=kind)
+        for s in range(0, len(data), BATCH):
+            end = min(s + BATCH, len(data))
+            index.add(
+                [f"c{i}" for i in range(s, end)],
+                data[s:end],
+                [metadata(i) for i in range(s, end)],
+            )
+        index.close()
+    return time.perf_counter() - start
+
+
+def open_chroma(path: Path):
+    import chromadb
+    from chromadb.config import Settings
+
+    client = chromadb.PersistentClient(path=str(path), settings=Settings(anonymized_telemetry=False))
+    return client.get_or_create_collection(name="bench", metadata={"hnsw:space": "cosine"})
+
+
+def measure(kind: str, path: Path, probes_file: Path, k: int, rescore: int) -> dict:
+    """Runs in a fresh process: cold open, resident memory, query latency and returned ids."""
+    probes = np.load(probes_file)
+    baseline = rss_bytes()
+    start = time.perf_counter()
+    if kind == "chroma":
+        collection = open_chroma(path)
+
+        def search(q):
+            return collection.query(query_embeddings=[q.tolist()], n_results=k, include=["distances"])["ids"][0]
+    else:
+        index = FlatVectorIndex(path, precision=kind, rescore_factor=rescore).open()
+
+        def search(q):
+            rows, _ = index.search(q, k)
+            return index.hydrate(rows)["ids"]
+
+    search(probes[0])
+    load_s = time.perf_counter() - start
+    loaded_rss = rss_bytes()
+
+    latencies, found = [], []
+    for q in probes:
+        t = time.perf_counter()
+        found.append(search(q))
+        latencies.append((time.perf_counter() - t) * 1000)
+
+    return {
+        "load_ms": load_s * 1000,
+        "rss_bytes": loaded_rss - baseline,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "ids": found,
+    }
+
+
+def recall(found: list[list[str]], truth: list[set[str]]) -> float:
+    return float(np.mean([len(set(f) & t) / len(t) for f, t in zip(found, truth)]))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--precisions", default="float32,float16,int8")
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--no-chroma", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--measure", nargs=3, metavar=("KIND", "PATH", "PROBES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        kind, path, probes = args.measure
+        print(json.dumps(measure(kind, Path(path), Path(probes), args.k, args.rescore_factor)))
+        return 0
+
+    kinds = args.precisions.split(",")
+    if not args.no_chroma:
+        try:
+            import chromadb  # noqa: F401
+            kinds.append("chroma")
+        except ImportError:
+            print("chromadb not installed, skipping the Chroma baseline")
+
+    data, probes = make_vectors(args.rows, args.dim, args.queries, args.seed)
+    normalized = data / np.linalg.norm(data, axis=1, keepdims=True)
+    truth = [
+        {f"c{i}" for i in np.argsort(-(normalized @ (q / np.linalg.norm(q))))[:args.k]}
+        for q in probes
+    ]
+
+    workdir = Path(tempfile.mkdtemp(prefix="polidex-vectors-"))
+    probes_file = workdir / "probes.npy"
+    np.save(probes_file, probes)
+    results = {}
+    try:
+        for kind in kinds:
+            path = workdir / kind
+            build_s = build(kind, path, data)
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.vector_storage", "-k", str(args.k),
+                 "--rescore-factor", str(args.rescore_factor), "--measure", kind, str(path), str(probes_file)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            measured = json.loads(output.strip().splitlines()[-1])
+            results[kind] = {
+                "build_s": round(build_s, 2),
+                "disk_mb": round(dir_bytes(path) / 1e6, 1),
+                "rss_mb": round(measured["rss_bytes"] / 1e6, 1),
+                "load_ms": round(measured["load_ms"], 1),
+                "p50_ms": round(measured["p50_ms"], 2),
+                "p99_ms": round(measured["p99_ms"], 2),
+                f"recall@{args.k}": round(recall(measured["ids"], truth), 4),
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.rows} rows x {args.dim} dims, {args.queries} queries, rescore factor {args.rescore_factor}")
+    header = f"{'store':<10}{'build s':>9}{'disk MB':>9}{'RSS MB':>9}{'load ms':>9}{'p50 ms':>9}{'p99 ms':>9}{'recall':>9}"
+    print(header)
+    print("-" * len(header))
+    for kind, r in results.items():
+        print(
+            f"{kind:<10}{r['build_s']:>9.2f}{r['disk_mb']:>9.1f}{r['rss_mb']:>9.1f}{r['load_ms']:>9.1f}"
+            f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r[f'recall@{args.k}']:>9.4f}"
+        )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"rows": args.rows, "dim": args.dim, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+import sqlite3
+from pathlib import Path
+
+DB_PATH = Path(__file__).parent.parent / "data" / "polidex.db"
+
+
+def migrate():
+    if not DB_PATH.exists():
+        print("Database not found, skipping migration (will be created with new schema)")
+        return
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("PRAGMA table_info(query_logs)")
+    columns = [col[1] for col in cursor.fetchall()]
+
+    if "degraded" not in columns:
+        print("Adding degraded column...")
+        cursor.execute("ALTER TABLE query_logs ADD COLUMN degraded BOOLEAN NOT NULL DEFAULT 0")
+
+    conn.commit()
+    conn.close()
+    print("Migration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,76 @@
+"""Drop the chunk text copies kept by the vector stores.
+
+Chunk text is read from the ``chunks`` table at query time, so the copies in
+Chroma (document metadata and its full-text index) and in the flat index
+side-table are dead weight. Run with the API stopped; each store is vacuumed
+afterwards to return the space to the filesystem.
+"""
+import sqlite3
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+CHROMA_DB_PATH = DATA_DIR / "chroma" / "chroma.sqlite3"
+FLAT_META_PATH = DATA_DIR / "vector_index" / "meta.sqlite"
+CHROMA_FULLTEXT_TABLES = ("embedding_fulltext_search", "embedding_fulltext")
+
+
+def tables(cursor) -> set[str]:
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def vacuum(path: Path, conn: sqlite3.Connection, before: int) -> None:
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    print(f"{path}: {before / 1e6:.1f} MB -> {path.stat().st_size / 1e6:.1f} MB")
+
+
+def migrate_chroma():
+    if not CHROMA_DB_PATH.exists():
+        print("Chroma database not found, skipping")
+        return
+
+    before = CHROMA_DB_PATH.stat().st_size
+    conn = sqlite3.connect(CHROMA_DB_PATH)
+    cursor = conn.cursor()
+    existing = tables(cursor)
+
+    if "embedding_metadata" in existing:
+        cursor.execute("DELETE FROM embedding_metadata WHERE key = 'chroma:document'")
+        print(f"Removed {cursor.rowcount} chunk texts from Chroma metadata")
+    for table in CHROMA_FULLTEXT_TABLES:
+        if table in existing:
+            cursor.execute(f"DELETE FROM {table}")
+            print(f"Cleared Chroma full-text index {table}")
+
+    vacuum(CHROMA_DB_PATH, conn, before)
+
+
+def migrate_flat_index():
+    if not FLAT_META_PATH.exists():
+        print("Flat vector index not found, skipping")
+        return
+
+    before = FLAT_META_PATH.stat().st_size
+    conn = sqlite3.connect(FLAT_META_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("PRAGMA table_info(rows)")
+    columns = [col[1] for col in cursor.fetchall()]
+
+    if "document" in columns:
+        print("Dropping document column from the flat index...")
+        cursor.execute("ALTER TABLE rows DROP COLUMN document")
+
+    vacuum(FLAT_META_PATH, conn, before)
+
+
+def migrate():
+    migrate_chroma()
+    migrate_flat_index()
+    print("Migration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
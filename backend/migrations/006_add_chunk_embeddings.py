@@ -0,0 +1,28 @@
+import sqlite3
+from pathlib import Path
+
+DB_PATH = Path(__file__).parent.parent / "data" / "polidex.db"
+
+
+def migrate():
+    if not DB_PATH.exists():
+        print("Database not found, skipping migration (will be created with new schema)")
+        return
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("PRAGMA table_info(chunks)")
+    columns = [col[1] for col in cursor.fetchall()]
+
+    if "embedding" not in columns:
+        print("Adding embedding column...")
+        cursor.execute("ALTER TABLE chunks ADD COLUMN embedding BLOB")
+
+    conn.commit()
+    conn.close()
+    print("Migration complete! Run 'python -m app.cli backfill-embeddings' to copy existing vectors from the vector store.")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,24 @@
+"""Import-time budget for the application entry point.
+
+Each check imports ``app.main`` in a fresh interpreter through
+``benchmarks.import_time``, which also prints the slowest modules.
+"""
+from benchmarks.import_time import DEFERRED_MODULES, measure
+
+MODULE = "app.main"
+BUDGET_MS = 1500.0
+RUNS = 3
+
+
+def test_heavy_dependencies_stay_lazy():
+    loaded = measure(MODULE)["deferred_modules_loaded"]
+    assert not loaded, f"{MODULE} imports {', '.join(loaded)} eagerly; expected none of {DEFERRED_MODULES}"
+
+
+def test_import_time_within_budget():
+    # Best of a few runs to smooth out a cold disk cache or a busy machine
+    report = min((measure(MODULE) for _ in range(RUNS)), key=lambda r: r["cumulative_ms"])
+    slowest = ", ".join(f"{name} {ms:.0f} ms" for name, ms in list(report["slowest_self_ms"].items())[:5])
+    assert report["cumulative_ms"] <= BUDGET_MS, (
+        f"importing {MODULE} took {report['cumulative_ms']:.0f} ms (budget {BUDGET_MS:.0f} ms); slowest: {slowest}"
+    )
@@ -0,0 +1,137 @@
+"""Retries, model fallback, circuit breaker and hedging of the OpenRouter client.
+
+The real ``OpenRouterClient`` talks to the fake OpenRouter over an in-process
+ASGI transport, so no sockets are opened and no API credit is spent.
+``benchmarks.openrouter_resilience`` reports the hedging latencies.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.openrouter import ChatMessage, OpenRouterClient
+from app.core.resilience import CircuitBreaker
+from benchmarks.fake_openrouter import FakeConfig, create_app
+from benchmarks.harness import percentile
+
+PRIMARY = "fake/primary"
+FALLBACK = "fake/fallback"
+MESSAGES = [ChatMessage(role="user", content="ping")]
+
+
+def make_client(config: FakeConfig, seed: int = 0, **overrides) -> tuple[OpenRouterClient, object]:
+    fake = create_app(config, seed=seed)
+    client = OpenRouterClient(
+        api_key="test",
+        default_model=PRIMARY,
+        base_url="http://fake/api/v1",
+        transport=httpx.ASGITransport(app=fake),
+    )
+    client.retry_backoff = 0.01
+    client.hedge_enabled = False
+    for key, value in overrides.items():
+        setattr(client, key, value)
+    return client, fake
+
+
+async def test_retries_transient_errors():
+    client, fake = make_client(FakeConfig(latency_ms=5, jitter_ms=0, fail_first_n=2), max_retries=2)
+    response = await client.chat(MESSAGES)
+    await client.aclose()
+    assert response.model == PRIMARY
+    assert fake.state.stats["requests"] == 3
+
+
+async def test_falls_back_when_primary_keeps_failing():
+    config = FakeConfig(latency_ms=5, jitter_ms=0, model_error_rate={PRIMARY: 1.0})
+    client, fake = make_client(config, max_retries=1, fallback_models=[FALLBACK])
+    response = await client.chat(MESSAGES)
+    await client.aclose()
+    assert response.model == FALLBACK
+    assert fake.state.stats[f"model:{PRIMARY}"] == 2
+
+
+async def test_fatal_status_is_not_retried_or_fallen_back():
+    config = FakeConfig(latency_ms=5, jitter_ms=0, error_rate=1.0, error_status=401)
+    client, fake = make_client(config, max_retries=3, fallback_models=[FALLBACK])
+    with pytest.raises(ValueError):
+        await client.chat(MESSAGES)
+    await client.aclose()
+    assert fake.state.stats["requests"] == 1
+
+
+async def test_breaker_opens_then_closes_after_a_successful_probe():
+    config = FakeConfig(latency_ms=5, jitter_ms=0, model_error_rate={PRIMARY: 1.0})
+    client, fake = make_client(
+        config, max_retries=0, fallback_models=[FALLBACK], breaker_threshold=3, breaker_cooldown=0.2,
+    )
+    for _ in range(10):
+        await client.chat(MESSAGES)
+    assert fake.state.stats[f"model:{PRIMARY}"] == 3
+
+    fake.state.config.model_error_rate = {}
+    await asyncio.sleep(0.25)
+    response = await client.chat(MESSAGES)
+    await client.aclose()
+    assert response.model == PRIMARY
+    assert client.breaker(PRIMARY).state == CircuitBreaker.CLOSED
+
+
+async def test_cancelled_probe_lets_the_next_probe_through():
+    config = FakeConfig(latency_ms=5, jitter_ms=0, model_error_rate={PRIMARY: 1.0})
+    client, fake = make_client(
+        config, max_retries=0, fallback_models=[FALLBACK], breaker_threshold=1, breaker_cooldown=0.05,
+    )
+    await client.chat(MESSAGES)
+    await asyncio.sleep(0.1)
+
+    fake.state.config.model_error_rate = {}
+    fake.state.config.model_latency_ms = {PRIMARY: 1000}
+    probe = asyncio.create_task(client.chat(MESSAGES))
+    await asyncio.sleep(0.05)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert client.breaker(PRIMARY).allow()
+    await client.aclose()
+
+
+async def test_cancelling_a_hedged_request_cancels_its_attempts():
+    client, fake = make_client(
+        FakeConfig(latency_ms=200, jitter_ms=0), hedge_enabled=True, hedge_min_delay=0.0,
+    )
+    await asyncio.gather(*(client.chat(MESSAGES) for _ in range(20)))
+
+    # Cancelled while still waiting on the primary, before a hedge is sent
+    fake.state.config.latency_ms = 1000
+    request = asyncio.create_task(client.chat(MESSAGES))
+    await asyncio.sleep(0.05)
+    request.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+    await asyncio.sleep(0)
+
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+    await client.aclose()
+
+
+async def test_hedging_cuts_the_slow_tail():
+    config = FakeConfig(latency_ms=20, jitter_ms=2, slow_rate=0.03, slow_latency_ms=500)
+    p99 = {}
+    for hedge in (False, True):
+        client, _ = make_client(config, seed=0, hedge_enabled=hedge, hedge_min_delay=0.0)
+        semaphore = asyncio.Semaphore(20)
+        latencies: list[float] = []
+
+        async def one():
+            async with semaphore:
+                start = asyncio.get_running_loop().time()
+                await client.chat(MESSAGES)
+                latencies.append(asyncio.get_running_loop().time() - start)
+
+        await asyncio.gather(*(one() for _ in range(300)))
+        await client.aclose()
+        p99[hedge] = percentile(latencies, 99)
+
+    assert p99[True] < p99[False]
@@ -0,0 +1,131 @@
+"""SQL statements per request for the admin read routes.
+
+Seeds two scratch databases, one ``SCALE`` times larger than the other, calls
+every admin listing and detail route against each and counts the statements
+they execute. A route whose count grows with the number of rows has an N+1
+query or a lazy load in a loop.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.main import app
+from app.models import Base, APIKey, Chunk, Document, QueryLog, Space, document_spaces, get_async_db, get_db
+
+# Spaces in the small database (documents grow as ROWS^2), and how many times more the large one has
+ROWS = 3
+SCALE = 4
+
+ROUTES = [
+    "/api/spaces",
+    "/api/spaces/1",
+    "/api/documents",
+    "/api/documents?space_id=1",
+    "/api/documents/1",
+    "/api/api-keys",
+    "/api/api-keys?space_id=1",
+    "/api/stats/logs",
+    "/api/stats/overview",
+    "/api/stats/usage",
+]
+
+
+def seed(session_factory, rows: int) -> None:
+    """``rows`` spaces, each owning ``rows`` documents (also linked to the next
+    space) and ``rows`` API keys, plus ``rows * rows`` query logs."""
+    now = datetime.utcnow()
+    documents = rows * rows
+    with session_factory() as db:
+        db.execute(insert(Space), [{"id": s + 1, "name": f"space-{s}"} for s in range(rows)])
+        db.execute(insert(Document), [
+            {"id": d + 1, "filename": f"doc-{d}.md", "file_type": "md", "file_size": 0,
+             "file_path": "", "content_hash": f"hash-{d}", "chunk_count": 2}
+            for d in range(documents)
+        ])
+        links = {(d + 1, d // rows + 1) for d in range(documents)}
+        links |= {(d + 1, (d // rows + 1) % rows + 1) for d in range(documents)}
+        db.execute(insert(document_spaces), [{"document_id": d, "space_id": s} for d, s in sorted(links)])
+        db.execute(insert(Chunk), [
+            {"document_id": d // 2 + 1, "chunk_index": d % 2, "content": "text",
+             "start_char": 0, "end_char": 4, "chroma_id": f"c{d}"}
+            for d in range(documents * 2)
+        ])
+        db.execute(insert(APIKey), [
+            {"name": f"key-{k}", "space_id": k % rows + 1, "key_hash": f"h{k}", "key_prefix": "pdx_", "created_at": now}
+            for k in range(rows * rows)
+        ])
+        db.execute(insert(QueryLog), [
+            {"query_text": "q", "response_text": "a", "chunks_retrieved": 3, "latency_ms": 1.0,
+             "model_used": "m", "source": "api", "created_at": now}
+            for _ in range(rows * rows)
+        ])
+        db.commit()
+
+
+@contextmanager
+def counted_database(path: Path, rows: int):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(session_factory, rows)
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    statements: list[str] = []
+    for counted in (engine, async_engine.sync_engine):
+        event.listen(counted, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        yield statements
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+def count_statements(client: TestClient, statements: list[str], route: str, headers: dict) -> list[str]:
+    statements.clear()
+    response = client.get(route, headers=headers)
+    response.raise_for_status()
+    return list(statements)
+
+
+@pytest.fixture(scope="module")
+def statement_counts(tmp_path_factory) -> dict[str, dict[str, list[str]]]:
+    headers = {"Authorization": f"Bearer {settings.admin_token}"} if settings.admin_token else {}
+    # No lifespan: the routes are exercised without warm-up, seeding or background tasks.
+    client = TestClient(app)
+    counts = {}
+    for label, rows in (("small", ROWS), ("large", ROWS * SCALE)):
+        with counted_database(tmp_path_factory.mktemp("queries") / f"{label}.db", rows) as statements:
+            counts[label] = {route: count_statements(client, statements, route, headers) for route in ROUTES}
+    return counts
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_statements_do_not_grow_with_rows(statement_counts, route):
+    small, large = statement_counts["small"][route], statement_counts["large"][route]
+    statements = "\n".join(f"    {' '.join(sql.split())[:160]}" for sql in large)
+    assert len(large) <= len(small), (
+        f"{route} runs {len(small)} statements with {ROWS} spaces and {len(large)} with {ROWS * SCALE}:\n{statements}"
+    )
@@ -44,6 +44,9 @@ export interface QueryLog {
   prompt_tokens: number
   completion_tokens: number
   cost: number
+  stage_timings?: Record<string, number> | null
+  coalesced?: boolean
+  degraded?: boolean
   created_at: string
 }
 